@@ -0,0 +1,64 @@
+from typing import Dict, Iterable, List
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Query, Session, selectinload
+from app.models.idea import Idea, Tag
+
+# SQLite host parameters per IN (...) lookup or multi-row INSERT
+LOOKUP_CHUNK = 500
+
+def idea_query(db: Session, documents: bool = False, action_plans: bool = False) -> Query:
+    """Query for ideas with their tags loaded up front
+
+    Each eager relationship costs one extra SELECT ... IN for the whole
+    result, where iterating it lazily would cost one query per idea. Use
+    it for anything that returns ideas with their tags; documents and
+    action plans are loaded too when asked for.
+    """
+    options = [selectinload(Idea.tags)]
+    if documents:
+        options.append(selectinload(Idea.documents))
+    if action_plans:
+        options.append(selectinload(Idea.action_plans))
+    return db.query(Idea).options(*options)
+
+def _tags_named(db: Session, names: List[str]) -> List[Tag]:
+    tags = []
+    for start in range(0, len(names), LOOKUP_CHUNK):
+        tags.extend(db.query(Tag).filter(Tag.name.in_(names[start:start + LOOKUP_CHUNK])).all())
+    return tags
+
+def get_or_create_tags(db: Session, names: Iterable[str]) -> Dict[str, Tag]:
+    """Tags by name, creating the ones that don't exist yet
+
+    Existing tags come from one SELECT ... IN; the missing ones are
+    inserted in one statement and selected back. ON CONFLICT DO NOTHING
+    lets a concurrent writer create the same name first without failing
+    this transaction: the second select finds its row either way.
+    """
+    wanted = list(dict.fromkeys(names))
+    tags = {tag.name: tag for tag in _tags_named(db, wanted)} if wanted else {}
+    missing = [name for name in wanted if name not in tags]
+    for start in range(0, len(missing), LOOKUP_CHUNK):
+        db.execute(
+            sqlite_insert(Tag)
+            .values([{"name": name} for name in missing[start:start + LOOKUP_CHUNK]])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+    if missing:
+        tags.update((tag.name, tag) for tag in _tags_named(db, missing))
+    return tags
+
+def set_idea_tags(db: Session, idea: Idea, names: Iterable[str], tags: Dict[str, Tag] = None):
+    """Make idea.tags exactly these names, writing only the associations that change
+
+    tags is a name -> Tag map already resolved with get_or_create_tags
+    (e.g. once for a whole import); otherwise the names are resolved here.
+    """
+    names = list(dict.fromkeys(names))
+    if tags is None:
+        tags = get_or_create_tags(db, names)
+    wanted = set(names)
+    for tag in [tag for tag in idea.tags if tag.name not in wanted]:
+        idea.tags.remove(tag)
+    current = {tag.name for tag in idea.tags}
+    idea.tags.extend(tags[name] for name in names if name not in current)
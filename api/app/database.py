@@ -1,19 +1,84 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import re
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database URL - use the same database as the Node.js backend
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///../data/ideas.db")
 
+# Directory for files that live next to the database (indexes, caches)
+DATA_DIR = os.getenv("DATA_DIR", "../data")
+
+# SQLite connection profile, applied to every new connection ("" keeps SQLite's default)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),  # readers don't wait for writers
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),  # fsync at checkpoints, not every commit
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),  # negative means KiB: 64 MiB per connection
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# PRAGMA values are interpolated, so only integers and bare keywords pass
+_PRAGMA_VALUE = re.compile(r"-?\d+|[A-Za-z_]+")
+
+def sqlite_pragma_statements(pragmas: dict = None) -> list:
+    """PRAGMA statements for a profile, rejecting unknown names and values that aren't integers or keywords"""
+    statements = []
+    for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+        if name not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma: {name!r}")
+        value = str(value).strip()
+        if value == "":
+            continue
+        if not _PRAGMA_VALUE.fullmatch(value):
+            raise ValueError(f"Invalid value for SQLite pragma {name}: {value!r}")
+        statements.append(f"PRAGMA {name}={value}")
+    return statements
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict = None):
+    """Run the (validated) connection profile on a raw DB-API connection"""
+    statements = sqlite_pragma_statements(pragmas)
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+def configure_sqlite(engine, pragmas: dict = None):
+    """Apply the connection profile to every connection the engine opens"""
+    sqlite_pragma_statements(pragmas)  # fail at startup, not on the first connection
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 )
+if DATABASE_URL.startswith("sqlite"):
+    configure_sqlite(engine)
+
+def optimize_database(bind=None):
+    """Let SQLite refresh the planner statistics its recent queries could use; run at shutdown"""
+    bind = bind or engine
+    if bind.dialect.name != "sqlite":
+        return
+    try:
+        with bind.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+    except Exception as e:
+        logger.warning(f"PRAGMA optimize failed: {e}")
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, LargeBinary, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,7 +8,9 @@ idea_tags = Table(
     'idea_tags',
     Base.metadata,
     Column('idea_id', Integer, ForeignKey('ideas.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    # The primary key serves idea -> tags; this serves tag -> ideas (tag filters, Tag.ideas)
+    Index('ix_idea_tags_tag_id', 'tag_id', 'idea_id')
 )
 
 class Idea(Base):
@@ -20,8 +22,14 @@ class Idea(Base):
     content = Column(Text)
     category = Column(String)
     status = Column(String, default="seedling")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    
+    __table_args__ = (
+        # Category filters and category x status breakdowns; status filters and stale-idea reviews
+        Index("ix_ideas_category_status", "category", "status"),
+        Index("ix_ideas_status_updated_at", "status", "updated_at"),
+    )
     
     # Relationships
     tags = relationship("Tag", secondary=idea_tags, back_populates="ideas")
@@ -42,7 +50,7 @@ class Document(Base):
     __tablename__ = "documents"
     
     id = Column(Integer, primary_key=True, index=True)
-    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False)
+    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     content = Column(Text)
     document_type = Column(String, default="uploaded")
@@ -63,7 +71,7 @@ class DocumentVersion(Base):
     __tablename__ = "document_versions"
     
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     version_number = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -76,7 +84,7 @@ class ActionPlan(Base):
     __tablename__ = "action_plans"
     
     id = Column(Integer, primary_key=True, index=True)
-    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False)
+    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     timeline = Column(String, nullable=False)
@@ -94,8 +102,90 @@ class Embedding(Base):
     __tablename__ = "embeddings"
     
     idea_id = Column(Integer, ForeignKey("ideas.id"), primary_key=True)
-    embedding = Column(Text, nullable=False)  # JSON string of embedding vector
-    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    model = Column(String, primary_key=True)  # Embedding model that produced the vector (one row per model)
+    embedding = Column(LargeBinary, nullable=False)  # Packed vector bytes (see dtype/dimension)
+    dtype = Column(String, nullable=False, default="float32")  # NumPy dtype of the packed vector
+    dimension = Column(Integer, nullable=False, default=384)  # Number of components in the vector
+    content_hash = Column(String)  # sha256 of the text the vector was generated from
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Relationships
-    idea = relationship("Idea", back_populates="embeddings") 
\ No newline at end of file
+    idea = relationship("Idea", back_populates="embeddings") 
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+    
+    id = Column(Integer, primary_key=True)  # Id in the chunk similarity index
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    idea_id = Column(Integer, ForeignKey("ideas.id"), nullable=False, index=True)  # Idea the chunk's matches count for
+    model = Column(String, nullable=False)  # Embedding model that produced the vector
+    chunk_index = Column(Integer, nullable=False)  # Position in the document
+    start_offset = Column(Integer, nullable=False)  # Character span in Document.content
+    end_offset = Column(Integer, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # Packed vector bytes (see dtype/dimension)
+    dtype = Column(String, nullable=False, default="float32")
+    dimension = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=False)  # sha256 of the embedded text; unchanged chunks are reused
+    updated_at = Column(DateTime, nullable=False, index=True)
+
+class EmbeddingModel(Base):
+    __tablename__ = "embedding_models"
+    
+    name = Column(String, primary_key=True)  # Ollama model name
+    dimension = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)  # active (serves queries), building (shadow index), retired (awaiting cleanup)
+    created_at = Column(DateTime, nullable=False)
+    activated_at = Column(DateTime)
+    retired_at = Column(DateTime)
+
+class IdeaNeighbor(Base):
+    __tablename__ = "idea_neighbors"
+    
+    idea_id = Column(Integer, ForeignKey("ideas.id"), primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("ideas.id"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)  # Cosine similarity of the two embeddings
+    rank = Column(Integer, nullable=False)  # 0 = most similar
+    
+    __table_args__ = (
+        # The last rank of a full list holds its cut-off score
+        Index("ix_idea_neighbors_rank_score", "rank", "score"),
+    )
+
+class EmbeddingJob(Base):
+    __tablename__ = "embedding_jobs"
+    
+    entity_type = Column(String, primary_key=True)  # "idea" or "document"
+    entity_id = Column(Integer, primary_key=True)
+    enqueued_at = Column(DateTime, nullable=False)  # Oldest unprocessed request (queue lag)
+    requested_at = Column(DateTime, nullable=False)  # Latest request; repeated updates coalesce here
+    available_at = Column(DateTime, nullable=False, index=True)  # Not before (worker lease / retry backoff)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+class EmbeddingRefreshJob(Base):
+    __tablename__ = "embedding_refresh_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False)  # running, paused, cancelled, completed, failed
+    active = Column(Boolean, unique=True)  # True while running or paused, NULL after: at most one such job
+    model = Column(String, nullable=False)
+    force = Column(Boolean, nullable=False, default=False)
+    last_idea_id = Column(Integer, nullable=False, default=0)  # Checkpoint: ideas up to this id are done
+    max_idea_id = Column(Integer, nullable=False)  # Newer ideas are embedded by the queue instead
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    embedded = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    active_seconds = Column(Float, nullable=False, default=0.0)  # Time spent running, for the ETA
+    runner = Column(String)  # Token of the run that owns the checkpoint
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False)  # Last checkpoint; a stale one means the run died
+    finished_at = Column(DateTime)
+
+class CacheGeneration(Base):
+    __tablename__ = "cache_generations"
+    
+    name = Column(String, primary_key=True)  # Table whose writes this counter tracks
+    value = Column(Integer, nullable=False)  # Bumped on every committed write to the table
@@ -8,7 +8,7 @@ from datetime import datetime
 router = APIRouter()
 
 @router.get("/ideas/{idea_id}/action-plan", response_model=ActionPlanResponse)
-async def get_action_plan(idea_id: int, db: Session = Depends(get_db)):
+def get_action_plan(idea_id: int, db: Session = Depends(get_db)):
     """Get action plan for an idea"""
     action_plan = db.query(ActionPlanModel).filter(ActionPlanModel.idea_id == idea_id).first()
     
@@ -18,7 +18,7 @@ async def get_action_plan(idea_id: int, db: Session = Depends(get_db)):
     return ActionPlanResponse(success=True, data=action_plan)
 
 @router.get("/ideas/{idea_id}/action-plans/{action_plan_id}", response_model=ActionPlanResponse)
-async def get_action_plan_by_id(idea_id: int, action_plan_id: int, db: Session = Depends(get_db)):
+def get_action_plan_by_id(idea_id: int, action_plan_id: int, db: Session = Depends(get_db)):
     """Get a specific action plan"""
     action_plan = db.query(ActionPlanModel).filter(
         ActionPlanModel.id == action_plan_id,
@@ -31,7 +31,7 @@ async def get_action_plan_by_id(idea_id: int, action_plan_id: int, db: Session =
     return ActionPlanResponse(success=True, data=action_plan)
 
 @router.post("/ideas/{idea_id}/action-plans", response_model=ActionPlanResponse, status_code=201)
-async def create_action_plan(
+def create_action_plan(
     idea_id: int, 
     action_plan: ActionPlanCreate, 
     db: Session = Depends(get_db)
@@ -59,7 +59,7 @@ async def create_action_plan(
     )
 
 @router.put("/ideas/{idea_id}/action-plans/{action_plan_id}", response_model=ActionPlanResponse)
-async def update_action_plan(
+def update_action_plan(
     idea_id: int, 
     action_plan_id: int, 
     action_plan_update: ActionPlanUpdate, 
@@ -90,7 +90,7 @@ async def update_action_plan(
     )
 
 @router.delete("/ideas/{idea_id}/action-plans/{action_plan_id}")
-async def delete_action_plan(idea_id: int, action_plan_id: int, db: Session = Depends(get_db)):
+def delete_action_plan(idea_id: int, action_plan_id: int, db: Session = Depends(get_db)):
     """Delete an action plan"""
     db_action_plan = db.query(ActionPlanModel).filter(
         ActionPlanModel.id == action_plan_id,
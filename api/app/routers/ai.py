@@ -9,7 +9,7 @@ import os
 router = APIRouter()
 
 @router.post("/generate-summary/{idea_id}")
-async def generate_idea_summary(
+def generate_idea_summary(
     idea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -78,7 +78,7 @@ async def generate_idea_summary(
         raise HTTPException(status_code=500, detail=f"Summary generation error: {str(e)}")
 
 @router.post("/suggest-tags/{idea_id}")
-async def suggest_tags_for_idea(
+def suggest_tags_for_idea(
     idea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -134,7 +134,7 @@ async def suggest_tags_for_idea(
         raise HTTPException(status_code=500, detail=f"Tag suggestion error: {str(e)}")
 
 @router.post("/improve-content/{idea_id}")
-async def improve_idea_content(
+def improve_idea_content(
     idea_id: int,
     improvement_type: str = "clarity",  # clarity, structure, completeness
     db: Session = Depends(get_db)
@@ -194,7 +194,7 @@ async def improve_idea_content(
         raise HTTPException(status_code=500, detail=f"Content improvement error: {str(e)}")
 
 @router.post("/research-suggestions/{idea_id}")
-async def get_research_suggestions(
+def get_research_suggestions(
     idea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -256,7 +256,7 @@ async def get_research_suggestions(
         raise HTTPException(status_code=500, detail=f"Research suggestion error: {str(e)}")
 
 @router.post("/validate-action-plan/{action_plan_id}")
-async def validate_action_plan(
+def validate_action_plan(
     action_plan_id: int,
     db: Session = Depends(get_db)
 ):
@@ -6,11 +6,15 @@ from typing import List, Dict, Any
 from app.database import get_db
 from app.models.idea import Idea, Document, ActionPlan
 from app.schemas.idea import IdeaResponse
+from app.services.cache_service import GenerationCache
 
 router = APIRouter()
 
+# Growth patterns only change when ideas are written
+growth_patterns_cache = GenerationCache("ideas")
+
 @router.get("/usage")
-async def get_usage_analytics(
+def get_usage_analytics(
     period: str = "month",  # day, week, month, year
     db: Session = Depends(get_db)
 ):
@@ -76,7 +80,7 @@ async def get_usage_analytics(
         raise HTTPException(status_code=500, detail=f"Error generating analytics: {str(e)}")
 
 @router.get("/ideas/{idea_id}/insights")
-async def get_idea_insights(
+def get_idea_insights(
     idea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -125,36 +129,39 @@ async def get_idea_insights(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
 
+def _load_growth_patterns(db: Session) -> dict:
+    # Calculate average time in each stage
+    stage_stats = db.query(
+        Idea.status,
+        func.avg(func.julianday(Idea.updated_at) - func.julianday(Idea.created_at)).label('avg_days')
+    ).group_by(Idea.status).all()
+
+    # Get category-specific growth rates
+    category_growth = db.query(
+        Idea.category,
+        Idea.status,
+        func.count(Idea.id).label('count')
+    ).group_by(Idea.category, Idea.status).all()
+
+    # Get monthly trends
+    monthly_trends = db.query(
+        func.strftime('%Y-%m', Idea.created_at).label('month'),
+        func.count(Idea.id).label('count')
+    ).group_by(func.strftime('%Y-%m', Idea.created_at)).order_by(desc('month')).limit(12).all()
+
+    return {
+        "stage_averages": [{"stage": stage, "avg_days": avg_days} for stage, avg_days in stage_stats],
+        "category_growth": [{"category": cat, "status": status, "count": count} for cat, status, count in category_growth],
+        "monthly_trends": [{"month": month, "count": count} for month, count in monthly_trends]
+    }
+
 @router.get("/growth-patterns")
-async def get_growth_patterns(db: Session = Depends(get_db)):
+def get_growth_patterns(db: Session = Depends(get_db)):
     """Get growth pattern analytics across all ideas."""
     try:
-        # Calculate average time in each stage
-        stage_stats = db.query(
-            Idea.status,
-            func.avg(func.julianday(Idea.updated_at) - func.julianday(Idea.created_at)).label('avg_days')
-        ).group_by(Idea.status).all()
-
-        # Get category-specific growth rates
-        category_growth = db.query(
-            Idea.category,
-            Idea.status,
-            func.count(Idea.id).label('count')
-        ).group_by(Idea.category, Idea.status).all()
-
-        # Get monthly trends
-        monthly_trends = db.query(
-            func.strftime('%Y-%m', Idea.created_at).label('month'),
-            func.count(Idea.id).label('count')
-        ).group_by(func.strftime('%Y-%m', Idea.created_at)).order_by(desc('month')).limit(12).all()
-
         return {
             "success": True,
-            "data": {
-                "stage_averages": [{"stage": stage, "avg_days": avg_days} for stage, avg_days in stage_stats],
-                "category_growth": [{"category": cat, "status": status, "count": count} for cat, status, count in category_growth],
-                "monthly_trends": [{"month": month, "count": count} for month, count in monthly_trends]
-            }
+            "data": growth_patterns_cache.get(db, _load_growth_patterns)
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating growth patterns: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating growth patterns: {str(e)}")
\ No newline at end of file
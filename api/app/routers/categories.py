@@ -1,45 +1,171 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.idea import Idea as IdeaModel, Tag as TagModel
-from app.services.embedding_service import embedding_service
-from typing import List
+from app.services.neighbor_service import neighbor_service
+from app.services.model_versions import model_versions, ModelBuildConflict
+from app.services.refresh_jobs import refresh_jobs, RefreshJobConflict
+from app.services.cache_service import GenerationCache
+from typing import List, Optional
 
 router = APIRouter()
 
-@router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
-    """Get all available categories"""
+class EmbeddingModelRequest(BaseModel):
+    model: str
+    dimension: Optional[int] = None  # Checked against the model's output if given
+
+# Rebuilt only when another request (in any worker) writes the source table
+categories_cache = GenerationCache("ideas")
+tags_cache = GenerationCache("tags")
+
+def _load_categories(db: Session) -> List[str]:
     # Get unique categories from ideas
     categories = db.query(IdeaModel.category).filter(
         IdeaModel.category.isnot(None)
     ).distinct().all()
     
-    category_list = [cat[0] for cat in categories if cat[0]]
-    
+    return [cat[0] for cat in categories if cat[0]]
+
+def _load_tags(db: Session) -> List[dict]:
+    tags = db.query(TagModel).all()
+    return [{"id": tag.id, "name": tag.name} for tag in tags]
+
+@router.get("/categories")
+def get_categories(db: Session = Depends(get_db)):
+    """Get all available categories"""
     return {
         "success": True,
-        "data": category_list
+        "data": categories_cache.get(db, _load_categories)
     }
 
 @router.get("/tags")
-async def get_tags(db: Session = Depends(get_db)):
+def get_tags(db: Session = Depends(get_db)):
     """Get all available tags"""
-    tags = db.query(TagModel).all()
-    
     return {
         "success": True,
-        "data": [{"id": tag.id, "name": tag.name} for tag in tags]
+        "data": tags_cache.get(db, _load_tags)
     }
 
 @router.post("/embeddings/update-all")
-async def update_all_embeddings(db: Session = Depends(get_db)):
-    """Update all embeddings using local Ollama model"""
+def update_all_embeddings(
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False, description="Regenerate even embeddings whose text and model are unchanged"),
+    db: Session = Depends(get_db)
+):
+    """Start a background job re-embedding every idea whose text or model changed"""
     try:
-        result = embedding_service.update_all_embeddings(db)
-        return result
+        job = refresh_jobs.start(db, force=force)
+    except RefreshJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    background_tasks.add_task(refresh_jobs.run, job.id)
+    return {
+        "success": True,
+        "data": refresh_jobs.describe(job),
+        "message": "Embedding update initiated"
+    }
+
+@router.get("/embeddings/update-all")
+def get_embedding_update(job_id: Optional[int] = Query(None, description="Job to report on (default: the latest)"), db: Session = Depends(get_db)):
+    """Progress, ETA and error counts of a bulk embedding update"""
+    job = refresh_jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Embedding update not found")
+    return {
+        "success": True,
+        "data": refresh_jobs.describe(job)
+    }
+
+@router.post("/embeddings/update-all/{job_id}/pause")
+def pause_embedding_update(job_id: int, db: Session = Depends(get_db)):
+    """Stop a running embedding update at its next checkpoint"""
+    job = refresh_jobs.pause(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No running embedding update with this id")
+    return {"success": True, "data": refresh_jobs.describe(job), "message": "Embedding update paused"}
+
+@router.post("/embeddings/update-all/{job_id}/resume")
+def resume_embedding_update(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Continue a paused embedding update (or one whose worker died) from its checkpoint"""
+    try:
+        job = refresh_jobs.resume(db, job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RefreshJobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    background_tasks.add_task(refresh_jobs.run, job.id)
+    return {"success": True, "data": refresh_jobs.describe(job), "message": "Embedding update resumed"}
+
+@router.post("/embeddings/update-all/{job_id}/cancel")
+def cancel_embedding_update(job_id: int, db: Session = Depends(get_db)):
+    """Stop an embedding update for good; embeddings written so far are kept"""
+    job = refresh_jobs.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No running or paused embedding update with this id")
+    return {"success": True, "data": refresh_jobs.describe(job), "message": "Embedding update cancelled"}
+
+@router.get("/embeddings/neighbors/check")
+def check_neighbor_table(db: Session = Depends(get_db)):
+    """Verify the precomputed related-idea lists against a brute-force recompute"""
+    return {
+        "success": True,
+        "data": neighbor_service.check_consistency(db)
+    }
+
+@router.post("/embeddings/neighbors/rebuild")
+def rebuild_neighbor_table(db: Session = Depends(get_db)):
+    """Recompute every precomputed related-idea list"""
+    try:
+        return {
+            "success": True,
+            "data": {"ideas": neighbor_service.rebuild(db)}
+        }
     except Exception as e:
         return {
             "success": False,
-            "error": f"Failed to update embeddings: {str(e)}"
-        } 
\ No newline at end of file
+            "error": f"Failed to rebuild neighbor lists: {str(e)}"
+        }
+
+@router.get("/embeddings/models")
+def get_embedding_models(db: Session = Depends(get_db)):
+    """List embedding model versions: the active one, a shadow build in progress, retired ones"""
+    return {
+        "success": True,
+        "data": model_versions.status(db)
+    }
+
+@router.post("/embeddings/models")
+def start_embedding_model(request: EmbeddingModelRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Start (or resume) a shadow build of a new embedding model; it becomes active at 100% coverage"""
+    try:
+        status = model_versions.start(db, request.model, request.dimension)
+    except ModelBuildConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=503, detail=f"Embedding model {request.model} is unavailable")
+    
+    background_tasks.add_task(model_versions.build, request.model)
+    return {
+        "success": True,
+        "data": status,
+        "message": f"Building {request.model} embeddings in the background"
+    }
+
+@router.delete("/embeddings/models/{model_name:path}")
+def cancel_embedding_model(model_name: str, db: Session = Depends(get_db)):
+    """Abandon a shadow build and delete its partial embeddings"""
+    if not model_versions.cancel(db, model_name):
+        raise HTTPException(status_code=404, detail="No shadow build for this model")
+    return {"success": True, "message": f"Cancelled the {model_name} build"}
+
+@router.post("/embeddings/models/gc")
+def collect_embedding_garbage(db: Session = Depends(get_db)):
+    """Delete embeddings of retired models"""
+    return {
+        "success": True,
+        "data": {"deleted_embeddings": model_versions.collect_garbage(db)}
+    }
@@ -260,7 +260,7 @@ async def save_conversation(request: Request):
         raise HTTPException(status_code=500, detail=f"Save conversation error: {str(e)}")
 
 @router.get("/conversation/{idea_id}")
-async def load_conversation(idea_id: int, db: Session = Depends(get_db)):
+def load_conversation(idea_id: int, db: Session = Depends(get_db)):
     """Load a saved chat conversation"""
     try:
         # TODO: Implement conversation loading from database
@@ -275,7 +275,7 @@ async def load_conversation(idea_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Load conversation error: {str(e)}")
 
 @router.get("/models")
-async def get_available_models():
+def get_available_models():
     """Get available AI models for each provider"""
     try:
         models = ai_service.get_available_models()
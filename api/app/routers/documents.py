@@ -4,6 +4,8 @@ from typing import List, Optional
 from app.database import get_db
 from app.schemas.document import Document, DocumentCreate, DocumentUpdate, DocumentResponse, DocumentsResponse
 from app.models.idea import Document as DocumentModel
+from app.services.chunk_service import chunk_service
+from app.services.embedding_queue import embedding_queue
 from datetime import datetime
 import os
 import shutil
@@ -65,13 +67,13 @@ def save_uploaded_file(file: UploadFile, idea_id: int) -> str:
     return str(file_path)
 
 @router.get("/ideas/{idea_id}/documents", response_model=DocumentsResponse)
-async def get_documents(idea_id: int, db: Session = Depends(get_db)):
+def get_documents(idea_id: int, db: Session = Depends(get_db)):
     """Get all documents for an idea"""
     documents = db.query(DocumentModel).filter(DocumentModel.idea_id == idea_id).all()
     return DocumentsResponse(success=True, data=documents)
 
 @router.get("/ideas/{idea_id}/documents/{document_id}", response_model=DocumentResponse)
-async def get_document(idea_id: int, document_id: int, db: Session = Depends(get_db)):
+def get_document(idea_id: int, document_id: int, db: Session = Depends(get_db)):
     """Get a specific document"""
     document = db.query(DocumentModel).filter(
         DocumentModel.id == document_id,
@@ -84,7 +86,7 @@ async def get_document(idea_id: int, document_id: int, db: Session = Depends(get
     return DocumentResponse(success=True, data=document)
 
 @router.post("/ideas/{idea_id}/documents", response_model=DocumentResponse, status_code=201)
-async def create_document(
+def create_document(
     idea_id: int, 
     document: DocumentCreate, 
     db: Session = Depends(get_db)
@@ -99,8 +101,14 @@ async def create_document(
     )
     
     db.add(db_document)
+    db.flush()
+    
+    # Chunk and embed in the background; the job commits with the document
+    if db_document.content:
+        embedding_queue.enqueue(db, db_document.id, "document")
     db.commit()
     db.refresh(db_document)
+    embedding_queue.notify()
     
     return DocumentResponse(
         success=True, 
@@ -109,7 +117,7 @@ async def create_document(
     )
 
 @router.post("/ideas/{idea_id}/documents/upload", response_model=DocumentResponse, status_code=201)
-async def upload_document(
+def upload_document(
     idea_id: int,
     file: UploadFile = File(...),
     title: Optional[str] = Form(None),
@@ -142,8 +150,13 @@ async def upload_document(
     )
     
     db.add(db_document)
+    db.flush()
+    
+    if db_document.content:
+        embedding_queue.enqueue(db, db_document.id, "document")
     db.commit()
     db.refresh(db_document)
+    embedding_queue.notify()
     
     return DocumentResponse(
         success=True, 
@@ -152,7 +165,7 @@ async def upload_document(
     )
 
 @router.put("/ideas/{idea_id}/documents/{document_id}", response_model=DocumentResponse)
-async def update_document(
+def update_document(
     idea_id: int, 
     document_id: int, 
     document_update: DocumentUpdate, 
@@ -167,14 +180,21 @@ async def update_document(
     if not db_document:
         raise HTTPException(status_code=404, detail="Document not found")
     
+    previous_text = (db_document.title, db_document.content)
+    
     # Update fields
     update_data = document_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_document, field, value)
     
     db_document.updated_at = datetime.utcnow()
+    
+    # Re-chunk in the background when the chunked text changed; unchanged chunks keep their vectors
+    if (db_document.title, db_document.content) != previous_text:
+        embedding_queue.enqueue(db, db_document.id, "document")
     db.commit()
     db.refresh(db_document)
+    embedding_queue.notify()
     
     return DocumentResponse(
         success=True, 
@@ -183,7 +203,7 @@ async def update_document(
     )
 
 @router.delete("/ideas/{idea_id}/documents/{document_id}")
-async def delete_document(idea_id: int, document_id: int, db: Session = Depends(get_db)):
+def delete_document(idea_id: int, document_id: int, db: Session = Depends(get_db)):
     """Delete a document"""
     db_document = db.query(DocumentModel).filter(
         DocumentModel.id == document_id,
@@ -200,13 +220,15 @@ async def delete_document(idea_id: int, document_id: int, db: Session = Depends(
         except OSError:
             pass  # File might already be deleted
     
+    chunk_ids = chunk_service.delete_document_chunks(db, [document_id])
     db.delete(db_document)
     db.commit()
+    chunk_service.remove_chunks(chunk_ids)
     
     return {"success": True, "message": "Document deleted successfully"}
 
 @router.post("/ideas/{idea_id}/documents/{document_id}/set-overview")
-async def set_document_as_overview(idea_id: int, document_id: int, db: Session = Depends(get_db)):
+def set_document_as_overview(idea_id: int, document_id: int, db: Session = Depends(get_db)):
     """Set a document as the overview document for an idea"""
     # First, unset any existing overview documents for this idea
     existing_overview = db.query(DocumentModel).filter(
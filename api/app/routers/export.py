@@ -8,13 +8,14 @@ import io
 from datetime import datetime
 from typing import List, Optional
 from app.database import get_db
-from app.models.idea import Idea, Document, ActionPlan, Tag
+from app.models.idea import Idea, Tag
+from app.crud.idea import LOOKUP_CHUNK, idea_query, get_or_create_tags, set_idea_tags
 from app.schemas.idea import IdeaCreate
 
 router = APIRouter()
 
 @router.get("/ideas")
-async def export_ideas(
+def export_ideas(
     format: str = Query("json", description="Export format (json, csv, markdown)"),
     category: Optional[str] = Query(None, description="Filter by category"),
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -22,7 +23,7 @@ async def export_ideas(
     db: Session = Depends(get_db)
 ):
     """Export ideas in various formats."""
-    query = db.query(Idea)
+    query = idea_query(db)
 
     try:
 
@@ -117,21 +118,20 @@ async def export_ideas(
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
 
 @router.get("/idea/{idea_id}/full")
-async def export_full_idea(
+def export_full_idea(
     idea_id: int,
     format: str = Query("json", description="Export format (json, markdown, html)"),
     db: Session = Depends(get_db)
 ):
     """Export a complete idea with all related data."""
-    idea = db.query(Idea).filter(Idea.id == idea_id).first()
+    idea = idea_query(db, documents=True, action_plans=True).filter(Idea.id == idea_id).first()
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
 
     try:
 
-        # Get related documents and action plans
-        documents = db.query(Document).filter(Document.idea_id == idea_id).all()
-        action_plans = db.query(ActionPlan).filter(ActionPlan.idea_id == idea_id).all()
+        documents = idea.documents
+        action_plans = idea.action_plans
 
         if format == "json":
             data = {
@@ -271,8 +271,11 @@ async def export_full_idea(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
 
+def _is_tag_list(tags) -> bool:
+    return isinstance(tags, list) and all(isinstance(tag_name, str) for tag_name in tags)
+
 @router.post("/import/ideas")
-async def import_ideas(
+def import_ideas(
     ideas_data: List[dict],
     db: Session = Depends(get_db)
 ):
@@ -281,14 +284,30 @@ async def import_ideas(
         imported_count = 0
         errors = []
 
+        # Existing titles and every tag the import names, each resolved in bulk up front
+        titles = list({idea_data.get("title") for idea_data in ideas_data if isinstance(idea_data.get("title"), str)})
+        existing_titles = set()
+        for start in range(0, len(titles), LOOKUP_CHUNK):
+            existing_titles.update(
+                title for (title,) in db.query(Idea.title).filter(Idea.title.in_(titles[start:start + LOOKUP_CHUNK]))
+            )
+        tags = get_or_create_tags(db, [
+            tag_name
+            for idea_data in ideas_data if _is_tag_list(idea_data.get("tags"))
+            for tag_name in idea_data["tags"]
+        ])
+
         for idea_data in ideas_data:
             try:
                 # Check for duplicates based on title
-                existing = db.query(Idea).filter(Idea.title == idea_data.get("title")).first()
-                if existing:
+                if idea_data.get("title") in existing_titles:
                     errors.append(f"Duplicate idea: {idea_data.get('title')}")
                     continue
 
+                # Malformed tags fail the entry here, before any tag is attached
+                if "tags" in idea_data and not _is_tag_list(idea_data["tags"]):
+                    raise ValueError(f"tags must be a list of strings, got {idea_data['tags']!r}")
+
                 # Create new idea
                 idea = Idea(
                     title=idea_data.get("title"),
@@ -297,18 +316,13 @@ async def import_ideas(
                     category=idea_data.get("category", "general"),
                     status=idea_data.get("status", "seedling")
                 )
-                db.add(idea)
-                db.flush()  # Get the ID
-
-                # Add tags
+                # Add tags (before the idea is flushed, so its empty collection isn't loaded)
                 if "tags" in idea_data:
-                    for tag_name in idea_data["tags"]:
-                        tag = db.query(Tag).filter(Tag.name == tag_name).first()
-                        if not tag:
-                            tag = Tag(name=tag_name)
-                            db.add(tag)
-                        idea.tags.append(tag)
+                    set_idea_tags(db, idea, idea_data["tags"], tags)
+                db.add(idea)
+                db.flush()
 
+                existing_titles.add(idea.title)
                 imported_count += 1
 
             except Exception as e:
@@ -3,14 +3,18 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.schemas.idea import Idea, IdeaCreate, IdeaUpdate, IdeaResponse, IdeasResponse, SearchQuery, RelatedIdea, RelatedIdeasResponse
-from app.models.idea import Idea as IdeaModel, Tag as TagModel
+from app.models.idea import Idea as IdeaModel
+from app.crud.idea import idea_query, set_idea_tags
 from app.services.embedding_service import embedding_service
+from app.services.neighbor_service import neighbor_service
+from app.services.embedding_queue import embedding_queue
+from app.services.chunk_service import chunk_service
 from datetime import datetime
 
 router = APIRouter()
 
 @router.get("/ideas", response_model=IdeasResponse)
-async def get_all_ideas(
+def get_all_ideas(
     q: Optional[str] = Query(None, description="Search query"),
     category: Optional[str] = Query(None, description="Filter by category"),
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -18,7 +22,7 @@ async def get_all_ideas(
     db: Session = Depends(get_db)
 ):
     """Get all ideas with optional filtering"""
-    query = db.query(IdeaModel)
+    query = idea_query(db)
     
     if q:
         query = query.filter(IdeaModel.title.contains(q) | IdeaModel.description.contains(q))
@@ -32,18 +36,18 @@ async def get_all_ideas(
     return IdeasResponse(success=True, data=ideas)
 
 @router.get("/ideas/search", response_model=IdeasResponse)
-async def search_ideas(q: str = Query(..., description="Search query"), db: Session = Depends(get_db)):
+def search_ideas(q: str = Query(..., description="Search query"), db: Session = Depends(get_db)):
     """Search ideas by query string"""
-    ideas = db.query(IdeaModel).filter(
+    ideas = idea_query(db).filter(
         IdeaModel.title.contains(q) | IdeaModel.description.contains(q)
     ).all()
     
     return IdeasResponse(success=True, data=ideas)
 
 @router.get("/ideas/{idea_id}", response_model=IdeaResponse)
-async def get_idea_by_id(idea_id: int, db: Session = Depends(get_db)):
+def get_idea_by_id(idea_id: int, db: Session = Depends(get_db)):
     """Get a specific idea by ID"""
-    idea = db.query(IdeaModel).filter(IdeaModel.id == idea_id).first()
+    idea = idea_query(db).filter(IdeaModel.id == idea_id).first()
     
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
@@ -51,7 +55,7 @@ async def get_idea_by_id(idea_id: int, db: Session = Depends(get_db)):
     return IdeaResponse(success=True, data=idea)
 
 @router.post("/ideas", response_model=IdeaResponse, status_code=201)
-async def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
+def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
     """Create a new idea"""
     db_idea = IdeaModel(
         title=idea.title,
@@ -61,27 +65,19 @@ async def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
         status=idea.status
     )
     
+    db.add(db_idea)
+    
     # Handle tags
     if idea.tags:
-        for tag_name in idea.tags:
-            # Get or create tag
-            tag = db.query(TagModel).filter(TagModel.name == tag_name).first()
-            if not tag:
-                tag = TagModel(name=tag_name)
-                db.add(tag)
-                db.flush()  # Get the tag ID
-            db_idea.tags.append(tag)
+        set_idea_tags(db, db_idea, idea.tags)
     
-    db.add(db_idea)
+    db.flush()
+    
+    # Embed in the background; the job commits with the idea
+    embedding_queue.enqueue(db, db_idea.id)
     db.commit()
     db.refresh(db_idea)
-    
-    # Generate embedding for the new idea
-    try:
-        embedding_service.update_idea_embedding(db, db_idea)
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Failed to generate embedding for idea {db_idea.id}: {e}")
+    embedding_queue.notify()
     
     return IdeaResponse(
         success=True, 
@@ -90,40 +86,34 @@ async def create_idea(idea: IdeaCreate, db: Session = Depends(get_db)):
     )
 
 @router.put("/ideas/{idea_id}", response_model=IdeaResponse)
-async def update_idea(idea_id: int, idea_update: IdeaUpdate, db: Session = Depends(get_db)):
+def update_idea(idea_id: int, idea_update: IdeaUpdate, db: Session = Depends(get_db)):
     """Update an existing idea"""
     db_idea = db.query(IdeaModel).filter(IdeaModel.id == idea_id).first()
     
     if not db_idea:
         raise HTTPException(status_code=404, detail="Idea not found")
     
+    previous_text = embedding_service.get_idea_text_for_embedding(db_idea)
+    
     # Update fields
     update_data = idea_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         if field != "tags":
             setattr(db_idea, field, value)
     
-    # Handle tags
-    if idea_update.tags is not None:
-        db_idea.tags.clear()
-        for tag_name in idea_update.tags:
-            tag = db.query(TagModel).filter(TagModel.name == tag_name).first()
-            if not tag:
-                tag = TagModel(name=tag_name)
-                db.add(tag)
-                db.flush()
-            db_idea.tags.append(tag)
+    # Handle tags (only when sent; the schema defaults them to [])
+    if "tags" in update_data and idea_update.tags is not None:
+        set_idea_tags(db, db_idea, idea_update.tags)
     
     db_idea.updated_at = datetime.utcnow()
+    
+    # Re-embed in the background when the embedded text changed (not for e.g. status);
+    # repeated edits coalesce into one job
+    if embedding_service.get_idea_text_for_embedding(db_idea) != previous_text:
+        embedding_queue.enqueue(db, db_idea.id)
     db.commit()
     db.refresh(db_idea)
-    
-    # Update embedding for the modified idea
-    try:
-        embedding_service.update_idea_embedding(db, db_idea)
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Failed to update embedding for idea {db_idea.id}: {e}")
+    embedding_queue.notify()
     
     return IdeaResponse(
         success=True, 
@@ -132,7 +122,7 @@ async def update_idea(idea_id: int, idea_update: IdeaUpdate, db: Session = Depen
     )
 
 @router.delete("/ideas/{idea_id}")
-async def delete_idea(idea_id: int, db: Session = Depends(get_db)):
+def delete_idea(idea_id: int, db: Session = Depends(get_db)):
     """Delete an idea and all related data"""
     db_idea = db.query(IdeaModel).filter(IdeaModel.id == idea_id).first()
     
@@ -143,6 +133,7 @@ async def delete_idea(idea_id: int, db: Session = Depends(get_db)):
         # Delete related documents first
         from app.models.idea import Document
         documents = db.query(Document).filter(Document.idea_id == idea_id).all()
+        chunk_ids = chunk_service.delete_document_chunks(db, [doc.id for doc in documents])
         for doc in documents:
             db.delete(doc)
         
@@ -165,6 +156,11 @@ async def delete_idea(idea_id: int, db: Session = Depends(get_db)):
         db.delete(db_idea)
         db.commit()
         
+        # Drop the idea from the in-memory similarity index
+        embedding_service.remove_idea_embedding(idea_id)
+        chunk_service.remove_chunks(chunk_ids)
+        neighbor_service.remove_idea(db, idea_id)
+        
         return {"success": True, "message": "Idea deleted successfully"}
         
     except Exception as e:
@@ -172,10 +168,12 @@ async def delete_idea(idea_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to delete idea: {str(e)}")
 
 @router.get("/ideas/{idea_id}/related", response_model=RelatedIdeasResponse)
-async def get_related_ideas(
+def get_related_ideas(
     idea_id: int, 
     limit: int = Query(5, description="Number of related ideas to return"),
     min_similarity: float = Query(0.3, description="Minimum similarity threshold (0.0-1.0)"),
+    exact: bool = Query(False, description="Bypass the approximate index and scan every vector"),
+    ef: Optional[int] = Query(None, description="HNSW search breadth (higher = better recall, slower)"),
     db: Session = Depends(get_db)
 ):
     """Get AI-powered related ideas using semantic similarity with local embeddings"""
@@ -184,13 +182,23 @@ async def get_related_ideas(
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
     
-    # Get similar ideas using embedding service
-    similar_ideas = embedding_service.get_similar_ideas(
-        db=db, 
-        idea_id=idea_id, 
-        limit=limit, 
-        min_similarity=min_similarity
-    )
+    # Precomputed neighbor lists cover the default query; anything else searches live
+    similar_ideas = None
+    if not exact and ef is None and limit <= neighbor_service.k:
+        similar_ideas = neighbor_service.get_related(db, idea_id, limit, min_similarity)
+    
+    if similar_ideas is None:
+        similar_ideas = embedding_service.get_similar_ideas(
+            db=db, 
+            idea_id=idea_id, 
+            limit=limit, 
+            min_similarity=min_similarity,
+            exact=exact,
+            ef=ef
+        )
+    
+    # Ideas whose documents resemble this one count by their best chunk
+    similar_ideas = chunk_service.add_related(db, idea_id, similar_ideas, limit, min_similarity)
     
     related_data = []
     for similar_idea in similar_ideas:
@@ -1,54 +1,250 @@
+import asyncio
+import time
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, desc, func
 from typing import List, Optional
+from datetime import datetime
 from app.database import get_db
 from app.models.idea import Idea, Tag
+from app.crud.idea import idea_query
 from app.schemas.idea import IdeaResponse
+from app.services.embedding_service import embedding_service
+from app.services.search_service import FUSION_METHODS, fuse_rankings, lexical_search
+from app.services.filter_index import idea_filter_index
+from app.services.chunk_service import chunk_service, merge_rankings
 
 router = APIRouter()
 
+def _timed(function, *args, **kwargs):
+    """Run function(*args, **kwargs), returning (result, elapsed milliseconds)"""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 2)
+
+def _ideas_by_id(db: Session, idea_ids: List[int]) -> dict:
+    """Fetch ideas and their tags in two queries"""
+    return {
+        idea.id: idea
+        for idea in idea_query(db).filter(Idea.id.in_(idea_ids)).all()
+    }
+
+def _search_result(idea: Idea, **scores) -> dict:
+    return {
+        "id": idea.id,
+        "title": idea.title,
+        "description": idea.description,
+        "category": idea.category,
+        "status": idea.status,
+        **scores,
+        "tags": [{"id": tag.id, "name": tag.name} for tag in idea.tags]
+    }
+
 @router.get("/semantic")
-async def semantic_search(
+def semantic_search(
     q: str = Query(..., description="Search query"),
     limit: int = Query(10, description="Number of results to return"),
+    offset: int = Query(0, description="Pagination offset"),
+    min_similarity: Optional[float] = Query(None, description="Minimum cosine similarity"),
     db: Session = Depends(get_db)
 ):
     """Perform semantic search across ideas using AI embeddings."""
     try:
-        # For now, implement basic text search
-        # TODO: Implement actual semantic search with embeddings
-        ideas = db.query(Idea).filter(
-            or_(
-                Idea.title.ilike(f"%{q}%"),
-                Idea.description.ilike(f"%{q}%"),
-                Idea.content.ilike(f"%{q}%")
+        search_type = "semantic"
+        # Ideas match on their own text or on a chunk of their documents
+        matches = chunk_service.search_ideas(db, q, limit=limit, offset=offset, min_similarity=min_similarity)
+        if matches is None:
+            # Embedding model unavailable
+            search_type = "lexical"
+            matches = lexical_search(db, q, limit, offset)
+
+        ideas_by_id = _ideas_by_id(db, [idea_id for idea_id, _ in matches])
+        results = [
+            _search_result(ideas_by_id[idea_id], relevance_score=score)
+            for idea_id, score in matches if idea_id in ideas_by_id
+        ]
+
+        return {
+            "success": True,
+            "data": {
+                "query": q,
+                "search_type": search_type,
+                "results": results,
+                "total_results": len(results),
+                "offset": offset
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
+
+@router.get("/hybrid")
+async def hybrid_search(
+    q: str = Query(..., description="Search query"),
+    limit: int = Query(10, description="Number of results to return"),
+    offset: int = Query(0, description="Pagination offset"),
+    fusion: str = Query("rrf", description="Fusion method (rrf/weighted)"),
+    vector_weight: float = Query(0.5, ge=0.0, le=1.0, description="Weight of the vector ranking; lexical gets the rest"),
+    candidates: int = Query(50, ge=1, description="Candidates taken from each ranking before fusion"),
+    db: Session = Depends(get_db)
+):
+    """Combine keyword and embedding search into one ranking."""
+    if fusion not in FUSION_METHODS:
+        raise HTTPException(status_code=400, detail=f"fusion must be one of {', '.join(FUSION_METHODS)}")
+
+    try:
+        started = time.perf_counter()
+        depth = max(candidates, offset + limit)
+
+        # The keyword query and the query embedding (an Ollama round trip) run side by side
+        (lexical, lexical_ms), (query_vector, embedding_ms) = await asyncio.gather(
+            run_in_threadpool(_timed, lexical_search, db, q, depth),
+            run_in_threadpool(_timed, embedding_service.embed_query, q)
+        )
+
+        # The database work runs on the thread pool too, keeping the event loop free
+        vector, vector_ms = [], 0.0
+        if query_vector is not None:
+            vector, vector_ms = await run_in_threadpool(
+                _timed,
+                lambda: merge_rankings(
+                    embedding_service.search_vectors(db, query_vector, depth),
+                    chunk_service.search(db, query_vector, depth)
+                )[:depth]
             )
-        ).limit(limit).all()
+
+        weights = {"vector": vector_weight, "lexical": 1.0 - vector_weight}
+        fused, fusion_ms = _timed(fuse_rankings, {"vector": vector, "lexical": lexical}, weights, fusion)
+
+        page = fused[offset:offset + limit]
+        ideas_by_id = await run_in_threadpool(_ideas_by_id, db, [entry["id"] for entry in page])
+        results = [
+            _search_result(
+                ideas_by_id[entry["id"]],
+                relevance_score=entry["score"],
+                vector_score=entry.get("vector_score"),
+                vector_rank=entry.get("vector_rank"),
+                lexical_score=entry.get("lexical_score"),
+                lexical_rank=entry.get("lexical_rank")
+            )
+            for entry in page if entry["id"] in ideas_by_id
+        ]
 
         return {
             "success": True,
             "data": {
                 "query": q,
-                "results": [
-                    {
-                        "id": idea.id,
-                        "title": idea.title,
-                        "description": idea.description,
-                        "category": idea.category,
-                        "status": idea.status,
-                        "relevance_score": 0.85,  # Placeholder
-                        "tags": [{"id": tag.id, "name": tag.name} for tag in idea.tags]
-                    } for idea in ideas
-                ],
-                "total_results": len(ideas)
+                "search_type": "hybrid" if query_vector is not None else "lexical",
+                "fusion": fusion,
+                "weights": weights,
+                "results": results,
+                "pagination": {
+                    "total": len(fused),
+                    "limit": limit,
+                    "offset": offset
+                },
+                "timings_ms": {
+                    "lexical": lexical_ms,
+                    "embedding": embedding_ms,
+                    "vector": vector_ms,
+                    "fusion": fusion_ms,
+                    "total": round((time.perf_counter() - started) * 1000, 2)
+                }
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
+
+@router.get("/ideas/similar")
+def filtered_similarity_search(
+    q: Optional[str] = Query(None, description="Search query to embed"),
+    idea_id: Optional[int] = Query(None, description="Find ideas similar to this idea instead of a query"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    tags: Optional[str] = Query(None, description="Comma-separated tags (any match)"),
+    date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    min_similarity: Optional[float] = Query(None, description="Minimum cosine similarity"),
+    limit: int = Query(10, description="Number of results"),
+    offset: int = Query(0, description="Pagination offset"),
+    db: Session = Depends(get_db)
+):
+    """Similarity search restricted to ideas matching the filters."""
+    if not q and idea_id is None:
+        raise HTTPException(status_code=400, detail="Either q or idea_id is required")
+    try:
+        filters = {
+            "category": category,
+            "status": status,
+            "tags": [tag.strip() for tag in tags.split(",")] if tags else None,
+            "date_from": datetime.fromisoformat(date_from) if date_from else None,
+            "date_to": datetime.fromisoformat(date_to) if date_to else None
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    try:
+        started = time.perf_counter()
+
+        # Candidate ids from in-memory attribute masks; only these vectors get scored
+        candidate_ids = None
+        filter_ms = 0.0
+        if any(filters.values()):
+            candidate_ids, filter_ms = _timed(lambda: idea_filter_index.get(db).matching_ids(**filters))
+
+        if idea_id is not None:
+            query_vector, embedding_ms = _timed(embedding_service.get_idea_vector, db, idea_id)
+            if query_vector is None:
+                raise HTTPException(status_code=404, detail="Idea has no embedding")
+        else:
+            query_vector, embedding_ms = _timed(embedding_service.embed_query, q)
+            if query_vector is None:
+                raise HTTPException(status_code=503, detail="Embedding model unavailable")
+
+        matches = []
+        vector_ms = 0.0
+        if candidate_ids is None or candidate_ids.size:
+            matches, vector_ms = _timed(
+                embedding_service.search_vectors,
+                db,
+                query_vector,
+                offset + limit,
+                exclude_ids=[idea_id] if idea_id is not None else (),
+                min_similarity=min_similarity,
+                candidate_ids=candidate_ids
+            )
+            matches = matches[offset:]
+
+        ideas_by_id = _ideas_by_id(db, [match_id for match_id, _ in matches])
+        results = [
+            _search_result(ideas_by_id[match_id], relevance_score=score)
+            for match_id, score in matches if match_id in ideas_by_id
+        ]
+
+        return {
+            "success": True,
+            "data": {
+                "results": results,
+                "candidates": None if candidate_ids is None else int(candidate_ids.size),
+                "pagination": {
+                    "limit": limit,
+                    "offset": offset
+                },
+                "timings_ms": {
+                    "filter": filter_ms,
+                    "embedding": embedding_ms,
+                    "vector": vector_ms,
+                    "total": round((time.perf_counter() - started) * 1000, 2)
+                }
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
 @router.get("/ideas/filter")
-async def advanced_filter_ideas(
+def advanced_filter_ideas(
     q: Optional[str] = Query(None, description="Search query"),
     category: Optional[str] = Query(None, description="Filter by category"),
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -63,7 +259,7 @@ async def advanced_filter_ideas(
 ):
     """Advanced filtering and sorting for ideas."""
     try:
-        query = db.query(Idea)
+        query = idea_query(db)
 
         # Apply filters
         if q:
@@ -136,20 +332,20 @@ async def advanced_filter_ideas(
         raise HTTPException(status_code=500, detail=f"Filter error: {str(e)}")
 
 @router.get("/ideas/{idea_id}/recommendations")
-async def get_idea_recommendations(
+def get_idea_recommendations(
     idea_id: int,
     limit: int = Query(5, description="Number of recommendations"),
     db: Session = Depends(get_db)
 ):
     """Get AI-powered recommendations for related ideas."""
-    idea = db.query(Idea).filter(Idea.id == idea_id).first()
+    idea = idea_query(db).filter(Idea.id == idea_id).first()
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
 
     try:
 
         # Find related ideas based on category and tags
-        related_ideas = db.query(Idea).filter(
+        related_ideas = idea_query(db).filter(
             and_(
                 Idea.id != idea_id,
                 or_(
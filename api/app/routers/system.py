@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 import psutil
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.idea import Idea, Document, ActionPlan
+from app.services.embedding_queue import embedding_queue
+from app.services.circuit_breaker import ollama_breaker
+from app.services.embedding_service import embedding_service
 
 router = APIRouter()
 
@@ -118,7 +121,7 @@ async def update_ai_settings(ai_settings: AISettings):
         raise HTTPException(status_code=500, detail=f"AI settings update error: {str(e)}")
 
 @router.get("/health")
-async def get_system_health(db: Session = Depends(get_db)):
+def get_system_health(db: Session = Depends(get_db)):
     """Get detailed system health information."""
     try:
         # Database health - since we can successfully query the database later, mark as healthy
@@ -140,8 +143,11 @@ async def get_system_health(db: Session = Depends(get_db)):
         if os.path.exists(db_file_path):
             db_size_mb = os.path.getsize(db_file_path) / (1024 * 1024)
 
+        # AI features degrade (CRUD keeps working) while the model server's circuit is open
+        ollama_status = ollama_breaker.stats()
+
         health_data = {
-            "status": "healthy" if db_status == "healthy" else "degraded",
+            "status": "healthy" if db_status == "healthy" and ollama_status["state"] == "closed" else "degraded",
             "timestamp": datetime.now().isoformat(),
             "database": {
                 "status": db_status,
@@ -161,7 +167,10 @@ async def get_system_health(db: Session = Depends(get_db)):
                 "version": "1.0.0",
                 "uptime": "running",  # TODO: Calculate actual uptime
                 "endpoints_available": True
-            }
+            },
+            "embedding_queue": embedding_queue.stats(db),
+            "embedding_cache": embedding_service.vector_cache.stats(),
+            "ollama": ollama_status
         }
 
         return {
@@ -172,8 +181,38 @@ async def get_system_health(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check error: {str(e)}")
 
+@router.get("/embedding-queue")
+def get_embedding_queue_status(db: Session = Depends(get_db)):
+    """Get background embedding queue depth and lag."""
+    try:
+        return {
+            "success": True,
+            "data": embedding_queue.stats(db)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Embedding queue status error: {str(e)}")
+
+@router.get("/embedding-cache")
+async def get_embedding_cache_status():
+    """Get persistent embedding cache size, hit rate and the model time it saved."""
+    return {
+        "success": True,
+        "data": embedding_service.vector_cache.stats()
+    }
+
+@router.delete("/embedding-cache")
+def clear_embedding_cache(model: Optional[str] = Query(None, description="Only drop this model's vectors")):
+    """Drop cached vectors, e.g. after pulling new weights under the same model name."""
+    try:
+        return {
+            "success": True,
+            "data": {"deleted": embedding_service.vector_cache.clear(model)}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Embedding cache clear error: {str(e)}")
+
 @router.get("/stats")
-async def get_system_statistics(db: Session = Depends(get_db)):
+def get_system_statistics(db: Session = Depends(get_db)):
     """Get comprehensive system statistics."""
     try:
         # Basic counts
@@ -289,11 +328,11 @@ async def get_system_configuration():
         raise HTTPException(status_code=500, detail=f"Configuration error: {str(e)}")
 
 @router.post("/maintenance/backup")
-async def create_system_backup(db: Session = Depends(get_db)):
+def create_system_backup(db: Session = Depends(get_db)):
     """Create a system backup."""
     try:
-        import shutil
         import json
+        import sqlite3
         
         # Create backups directory if it doesn't exist
         backup_dir = "../data/backups"
@@ -309,8 +348,14 @@ async def create_system_backup(db: Session = Depends(get_db)):
         if not os.path.exists(db_source):
             raise HTTPException(status_code=404, detail="Database file not found")
         
-        # Copy the database file
-        shutil.copy2(db_source, db_backup)
+        # Online backup: a plain file copy would miss pages still in the WAL file
+        source = sqlite3.connect(db_source)
+        target = sqlite3.connect(db_backup)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
         
         # Get actual file size
         backup_size_mb = os.path.getsize(db_backup) / (1024 * 1024)
@@ -359,7 +404,7 @@ async def create_system_backup(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Backup error: {str(e)}")
 
 @router.get("/maintenance/backups")
-async def list_system_backups():
+def list_system_backups():
     """List available system backups."""
     try:
         import json
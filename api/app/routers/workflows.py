@@ -21,7 +21,7 @@ class WorkflowTrigger(BaseModel):
     metadata: Dict[str, Any]
 
 @router.post("/idea-matured")
-async def trigger_idea_matured_workflow(
+def trigger_idea_matured_workflow(
     idea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -87,7 +87,7 @@ async def trigger_idea_matured_workflow(
         raise HTTPException(status_code=500, detail=f"Workflow error: {str(e)}")
 
 @router.post("/periodic-review")
-async def trigger_periodic_review_workflow(
+def trigger_periodic_review_workflow(
     days_old: int = 30,
     db: Session = Depends(get_db)
 ):
@@ -132,7 +132,7 @@ async def trigger_periodic_review_workflow(
         raise HTTPException(status_code=500, detail=f"Periodic review error: {str(e)}")
 
 @router.post("/automation/rules")
-async def create_automation_rule(
+def create_automation_rule(
     rule: AutomationRule,
     db: Session = Depends(get_db)
 ):
@@ -154,7 +154,7 @@ async def create_automation_rule(
         raise HTTPException(status_code=500, detail=f"Rule creation error: {str(e)}")
 
 @router.get("/automation/rules")
-async def list_automation_rules(db: Session = Depends(get_db)):
+def list_automation_rules(db: Session = Depends(get_db)):
     """List all active automation rules."""
     try:
         # TODO: Retrieve rules from database
@@ -198,7 +198,7 @@ async def list_automation_rules(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Rule listing error: {str(e)}")
 
 @router.post("/workflows/trigger")
-async def trigger_custom_workflow(
+def trigger_custom_workflow(
     trigger: WorkflowTrigger,
     db: Session = Depends(get_db)
 ):
@@ -244,7 +244,7 @@ async def trigger_custom_workflow(
         raise HTTPException(status_code=500, detail=f"Workflow trigger error: {str(e)}")
 
 @router.get("/workflows/status")
-async def get_workflow_status(db: Session = Depends(get_db)):
+def get_workflow_status(db: Session = Depends(get_db)):
     """Get the status of all workflows and automation rules."""
     try:
         # Get workflow statistics
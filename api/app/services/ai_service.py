@@ -3,8 +3,10 @@ import json
 import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from openai import OpenAI
-import requests
 from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.services.http_clients import http_clients
+from app.services.circuit_breaker import ollama_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -31,16 +33,26 @@ class DocumentGenerationRequest(BaseModel):
 
 class AIService:
     def __init__(self):
-        self.openai_client = None
         self.ollama_base_url = "http://localhost:11434"
+        self._openai_client = None
+        self._openai_http_client = None
         
-        # Initialize OpenAI client if API key is available
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if openai_api_key:
-            self.openai_client = OpenAI(api_key=openai_api_key)
-        else:
+        # OpenAI client is created on first use if an API key is available
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not self.openai_api_key:
             logger.warning("OpenAI API key not found. Cloud API features will be disabled.")
     
+    @property
+    def openai_client(self) -> Optional[OpenAI]:
+        """OpenAI client on the shared connection pool (rebuilt if the pool was closed)"""
+        if not self.openai_api_key:
+            return None
+        http_client = http_clients.openai
+        if self._openai_client is None or self._openai_http_client is not http_client:
+            self._openai_client = OpenAI(api_key=self.openai_api_key, http_client=http_client)
+            self._openai_http_client = http_client
+        return self._openai_client
+    
     def _build_system_prompt(self, idea: Dict[str, Any], documents: List[Dict[str, Any]], tone: str) -> str:
         """Build the system prompt for the AI conversation."""
         
@@ -112,8 +124,9 @@ Generate the complete document:"""
             for msg in request.messages:
                 messages.append({"role": msg.role, "content": msg.content})
             
-            # Stream response from OpenAI
-            stream = self.openai_client.chat.completions.create(
+            # Stream response from OpenAI (the SDK client blocks, so it runs on the thread pool)
+            stream = await run_in_threadpool(
+                self.openai_client.chat.completions.create,
                 model=request.model_name,
                 messages=messages,
                 stream=True,
@@ -121,7 +134,7 @@ Generate the complete document:"""
                 max_tokens=1000
             )
             
-            for chunk in stream:
+            async for chunk in iterate_in_threadpool(stream):
                 if chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
                     
@@ -129,8 +142,16 @@ Generate the complete document:"""
             logger.error(f"OpenAI API error: {e}")
             yield f"Error: {str(e)}"
     
+    def _ollama_unavailable(self) -> str:
+        retry_in = ollama_breaker.stats()["retry_in_seconds"]
+        return f"Ollama is unavailable after repeated failures; retrying in {retry_in:.0f}s"
+    
     async def chat_with_ollama(self, request: ChatRequest) -> AsyncGenerator[str, None]:
         """Stream chat responses using Ollama API."""
+        if not ollama_breaker.allow():
+            yield f"Error: {self._ollama_unavailable()}"
+            return
+        
         try:
             # Build system prompt
             system_prompt = self._build_system_prompt(request.idea, request.documents, request.tone)
@@ -152,20 +173,27 @@ Generate the complete document:"""
                 }
             }
             
-            response = requests.post(url, json=payload, stream=True)
-            response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line.decode('utf-8'))
-                        if 'message' in data and 'content' in data['message']:
-                            yield data['message']['content']
-                    except json.JSONDecodeError:
-                        continue
+            # The pooled session blocks: connect and read on the thread pool, not the event loop.
+            # Closing the streamed response returns its connection to the pool
+            response = await run_in_threadpool(
+                http_clients.ollama.post, url, json=payload, stream=True, timeout=http_clients.timeout()
+            )
+            with response:
+                response.raise_for_status()
+                ollama_breaker.record_success()
+                
+                async for line in iterate_in_threadpool(response.iter_lines()):
+                    if line:
+                        try:
+                            data = json.loads(line.decode('utf-8'))
+                            if 'message' in data and 'content' in data['message']:
+                                yield data['message']['content']
+                        except json.JSONDecodeError:
+                            continue
                         
         except Exception as e:
             logger.error(f"Ollama API error: {e}")
+            ollama_breaker.record_error(e)
             yield f"Error: {str(e)}"
     
     async def generate_document_with_openai(self, request: DocumentGenerationRequest) -> str:
@@ -178,7 +206,8 @@ Generate the complete document:"""
             prompt = self._build_document_prompt(request.messages, request.idea, request.template, request.tone)
             
             # Get response from OpenAI
-            response = self.openai_client.chat.completions.create(
+            response = await run_in_threadpool(
+                self.openai_client.chat.completions.create,
                 model=request.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
@@ -193,6 +222,9 @@ Generate the complete document:"""
     
     async def generate_document_with_ollama(self, request: DocumentGenerationRequest) -> str:
         """Generate a document using Ollama API."""
+        if not ollama_breaker.allow():
+            raise Exception(f"Document generation failed: {self._ollama_unavailable()}")
+        
         try:
             # Build document prompt
             prompt = self._build_document_prompt(request.messages, request.idea, request.template, request.tone)
@@ -209,14 +241,18 @@ Generate the complete document:"""
                 }
             }
             
-            response = requests.post(url, json=payload)
+            response = await run_in_threadpool(
+                http_clients.ollama.post, url, json=payload, timeout=http_clients.timeout()
+            )
             response.raise_for_status()
+            ollama_breaker.record_success()
             
             data = response.json()
             return data.get('response', '')
             
         except Exception as e:
             logger.error(f"Ollama document generation error: {e}")
+            ollama_breaker.record_error(e)
             raise Exception(f"Document generation failed: {str(e)}")
     
     async def stream_chat(self, request: ChatRequest) -> AsyncGenerator[str, None]:
@@ -259,14 +295,19 @@ Generate the complete document:"""
             ]
         }
         
-        # Check if Ollama is available
+        # Check if Ollama is available (skipped while its circuit is open)
+        if not ollama_breaker.allow():
+            logger.warning("Ollama circuit open - using default model list")
+            return models
         try:
-            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if 'models' in data:
-                    models["ollama"] = [model['name'] for model in data['models']]
-        except:
+            response = http_clients.ollama.get(f"{self.ollama_base_url}/api/tags", timeout=http_clients.timeout(5))
+            response.raise_for_status()
+            ollama_breaker.record_success()
+            data = response.json()
+            if 'models' in data:
+                models["ollama"] = [model['name'] for model in data['models']]
+        except Exception as e:
+            ollama_breaker.record_error(e)
             logger.warning("Ollama not available - using default model list")
         
         return models
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.models.idea import CacheGeneration
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys
+GENERATIONS_KEY = "cache_generations"
+
+_BUMP_SQL = text(
+    "INSERT INTO cache_generations (name, value) VALUES (:name, :start) "
+    "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+)
+
+def _tables_touched(obj, whole_row: bool) -> Set[str]:
+    """Tables written when this pending object is flushed"""
+    state = inspect(obj)
+    mapper = state.mapper
+    tables = set()
+    if whole_row or any(state.attrs[attr.key].history.has_changes() for attr in mapper.column_attrs):
+        tables.add(mapper.local_table.name)
+    # Many-to-many collections write their association table
+    for relationship in mapper.relationships:
+        if relationship.secondary is None:
+            continue
+        if whole_row or state.attrs[relationship.key].history.has_changes():
+            tables.add(relationship.secondary.name)
+    return tables
+
+def bump_generations(session: Session, tables: Set[str]):
+    """Advance the write generation of each table inside the session's transaction"""
+    # New counters start at the current time so a recreated or restored
+    # database never repeats a generation a process has already cached
+    start = time.time_ns() // 1000
+    params = [{"name": name, "start": start} for name in sorted(tables)]
+    try:
+        session.execute(_BUMP_SQL, params)
+    except OperationalError:
+        # Database predates the counter table: create it and retry
+        CacheGeneration.__table__.create(session.connection(), checkfirst=True)
+        session.execute(_BUMP_SQL, params)
+    session.info.pop(GENERATIONS_KEY, None)
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    tables = set()
+    for obj in session.new:
+        tables |= _tables_touched(obj, whole_row=True)
+    for obj in session.deleted:
+        tables |= _tables_touched(obj, whole_row=True)
+    for obj in session.dirty:
+        tables |= _tables_touched(obj, whole_row=False)
+    tables.discard(CacheGeneration.__tablename__)
+    if tables:
+        bump_generations(session, tables)
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_bulk_write(orm_execute_state):
+    # query(...).update() / .delete() and insert(Model) statements bypass the flush
+    if not orm_execute_state.is_orm_statement or not (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name != CacheGeneration.__tablename__:
+        bump_generations(orm_execute_state.session, {mapper.local_table.name})
+
+def get_generations(db: Session) -> Dict[str, int]:
+    """Current generation of every table, read once per session (i.e. per request)"""
+    generations = db.info.get(GENERATIONS_KEY)
+    if generations is None:
+        try:
+            rows = db.execute(text("SELECT name, value FROM cache_generations")).all()
+        except OperationalError:
+            rows = []
+        generations = {name: value for name, value in rows}
+        db.info[GENERATIONS_KEY] = generations
+    return generations
+
+def table_generation(db: Session, *tables: str) -> Tuple[int, ...]:
+    """Generation tuple for the given tables; changes whenever any of them is written"""
+    generations = get_generations(db)
+    return tuple(generations.get(name, 0) for name in tables)
+
+class GenerationCache:
+    """Process-local value rebuilt lazily when any of its source tables is written
+
+    Writes from any worker bump the shared counters in SQLite, so a cached
+    value is reused only while every worker would compute the same result.
+    """
+
+    def __init__(self, *tables: str):
+        self.tables = tables
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._generation: Optional[Tuple[int, ...]] = None
+
+    def get(self, db: Session, builder: Callable[[Session], Any]) -> Any:
+        """Return the cached value, calling builder(db) first if it is stale"""
+        generation = table_generation(db, *self.tables)
+        with self._lock:
+            if self._generation == generation:
+                return self._value
+        value = builder(db)
+        with self._lock:
+            self._value = value
+            self._generation = generation
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation = None
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value (marking it recently used) or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Any, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,416 @@
+import os
+import re
+import threading
+import numpy as np
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.idea import Idea, Document, DocumentChunk
+from app.services.embedding_service import embedding_service, OllamaEmbeddingService, EMBEDDING_DTYPE
+from app.services.cache_service import table_generation
+from app.services.vector_index import VectorIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+Ranking = List[Tuple[int, float]]
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"[.!?]\s")
+
+# Chunk hits fetched per requested idea (one idea can own many chunks)
+CHUNK_OVERFETCH = 4
+
+def _paragraphs(text: str) -> List[Span]:
+    """Spans of the non-blank paragraphs in text, whitespace trimmed"""
+    spans = []
+    start = 0
+    for match in list(PARAGRAPH_BREAK.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        segment = text[start:end]
+        stripped = segment.strip()
+        if stripped:
+            offset = start + segment.index(stripped[0])
+            spans.append((offset, offset + len(stripped)))
+        if match:
+            start = match.end()
+    return spans
+
+def _split_long(text: str, start: int, end: int, size: int) -> List[Span]:
+    """Cut a span longer than size at sentence ends, else whitespace, else hard"""
+    spans = []
+    while end - start > size:
+        window = text[start:start + size]
+        floor = size // 2
+        cut = max((match.start() + 1 for match in SENTENCE_END.finditer(window) if match.start() + 1 >= floor), default=0)
+        if not cut:
+            space = window.rfind(" ", floor)
+            cut = space if space > 0 else size
+        spans.append((start, start + len(window[:cut].rstrip())))
+        start += cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+def split_into_chunks(text: str, size: int, overlap: int) -> List[Span]:
+    """Overlapping windows of at most size characters over text
+
+    Paragraphs (split further when longer than size) are packed greedily into
+    windows; each window repeats the trailing paragraphs of the previous one,
+    up to overlap characters. A window only depends on the text up to its
+    end plus the next paragraph, so an edit leaves earlier chunks unchanged
+    and later ones usually fall back into step after a window or two.
+    """
+    units = [
+        piece
+        for start, end in _paragraphs(text or "")
+        for piece in _split_long(text, start, end, size)
+    ]
+    chunks = []
+    first = 0
+    while first < len(units):
+        last = first
+        while last + 1 < len(units) and units[last + 1][1] - units[first][0] <= size:
+            last += 1
+        chunks.append((units[first][0], units[last][1]))
+        if last + 1 >= len(units):
+            break
+        # Start the next window on the trailing units that fit in the overlap
+        following = last + 1
+        while following - 1 > first and units[last][1] - units[following - 1][0] <= overlap:
+            following -= 1
+        first = following
+    return chunks
+
+def merge_rankings(*rankings: Ranking) -> Ranking:
+    """Best score per id over several rankings, best first"""
+    best: Dict[int, float] = {}
+    for ranking in rankings:
+        for item_id, score in ranking:
+            if item_id not in best or score > best[item_id]:
+                best[item_id] = score
+    return sorted(best.items(), key=lambda match: match[1], reverse=True)
+
+class DocumentChunkService:
+    """Embeddings of overlapping document chunks, in their own similarity index
+
+    Research and generated documents are split into windows that each get a
+    vector (embedded in batches, through the embedding queue). Searches and
+    related-idea lookups also scan the chunk index and score an idea by its
+    best chunk, so ideas are found by what their documents say. Re-chunking
+    after an edit reuses every chunk whose text is unchanged.
+    """
+
+    def __init__(self, embeddings: OllamaEmbeddingService):
+        self.embeddings = embeddings
+        self.chunk_size = int(os.getenv("DOCUMENT_CHUNK_SIZE", 1000))  # Characters per chunk
+        self.chunk_overlap = int(os.getenv("DOCUMENT_CHUNK_OVERLAP", 200))
+        self._lock = threading.RLock()
+        self.index = VectorIndex(embeddings.embedding_dimension)
+        self._index_model: Optional[str] = None
+        self._index_generation = None
+        # chunk id -> idea id, and idea id -> chunk ids, for the chunks in the index
+        self._owners: Dict[int, int] = {}
+        self._chunks_by_idea: Dict[int, Set[int]] = defaultdict(set)
+
+    def split(self, text: str) -> List[Span]:
+        return split_into_chunks(text, self.chunk_size, self.chunk_overlap)
+
+    @staticmethod
+    def chunk_text(document: Document, start: int, end: int) -> str:
+        """Text embedded for a chunk; the title gives each window its context"""
+        return f"{document.title} | {document.content[start:end]}"
+
+    def update_document(self, db: Session, document: Document, models: Optional[List[str]] = None) -> bool:
+        """Re-chunk a document and embed the chunks that changed
+
+        Written for the active model and any model being shadow-built (or the
+        given models). A model's chunks are only replaced once all of its new
+        chunks have vectors; False if any model failed.
+        """
+        try:
+            self.embeddings.sync_models(db)
+            if models is None:
+                models = [self.embeddings.model_name] + ([self.embeddings.shadow_model[0]] if self.embeddings.shadow_model else [])
+            spans = self.split(document.content or "")
+            texts = [self.chunk_text(document, start, end) for start, end in spans]
+            hashes = [self.embeddings.content_hash(text) for text in texts]
+
+            complete = True
+            changed = {}
+            for model in models:
+                existing = db.query(DocumentChunk).filter(
+                    DocumentChunk.document_id == document.id,
+                    DocumentChunk.model == model
+                ).all()
+                reusable = defaultdict(list)
+                for row in existing:
+                    reusable[row.content_hash].append(row)
+                plan = [reusable[text_hash].pop() if reusable.get(text_hash) else None for text_hash in hashes]
+
+                missing = [position for position, row in enumerate(plan) if row is None]
+                vectors = self._embed([texts[position] for position in missing], model)
+                dimension = self.embeddings._dimension_for(model)
+                if any(not vector or len(vector) != dimension for vector in vectors):
+                    logger.error(f"Failed to embed chunks of document {document.id} with {model}")
+                    complete = False
+                    continue
+
+                now = datetime.utcnow()
+                added = []
+                for position, vector in zip(missing, vectors):
+                    row = DocumentChunk(
+                        document_id=document.id,
+                        model=model,
+                        embedding=self.embeddings.pack_vector(vector),
+                        dtype=EMBEDDING_DTYPE,
+                        dimension=len(vector),
+                        content_hash=hashes[position],
+                        updated_at=now
+                    )
+                    db.add(row)
+                    plan[position] = row
+                    added.append(row)
+                for position, (row, (start, end)) in enumerate(zip(plan, spans)):
+                    # Reused chunks only move when text before them changed
+                    if (row.chunk_index, row.start_offset, row.end_offset) != (position, start, end):
+                        row.chunk_index = position
+                        row.start_offset = start
+                        row.end_offset = end
+                        row.idea_id = document.idea_id
+                stale = [row for rows in reusable.values() for row in rows]
+                for row in stale:
+                    db.delete(row)
+                changed[model] = (added, [row.id for row in stale])
+
+            db.commit()
+
+            if self.embeddings.model_name in changed:
+                added, removed = changed[self.embeddings.model_name]
+                with self._lock:
+                    if self.index.loaded and self._index_model == self.embeddings.model_name:
+                        for chunk_id in removed:
+                            self._drop(chunk_id)
+                        for row in added:
+                            self._add(row.id, row.idea_id, self.embeddings.unpack_vector(row))
+
+            logger.info(f"Chunked document {document.id} into {len(spans)} chunks")
+            return complete
+
+        except Exception as e:
+            logger.error(f"Error updating chunks for document {document.id}: {e}")
+            db.rollback()
+            return False
+
+    def _embed(self, texts: List[str], model: str) -> List[Optional[List[float]]]:
+        """Embed chunk texts batch_size at a time"""
+        vectors = []
+        batch_size = self.embeddings.batch_size
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(self.embeddings.generate_embeddings(texts[start:start + batch_size], model))
+        return vectors
+
+    def update_all(self, db: Session, model: Optional[str] = None) -> dict:
+        """Chunk every document with content (for one model, or the active and shadow models)"""
+        documents = db.query(Document).filter(Document.content.isnot(None), Document.content != "").all()
+        failed = [
+            document.id for document in documents
+            if not self.update_document(db, document, [model] if model else None)
+        ]
+        return {"documents": len(documents), "failed_documents": len(failed)}
+
+    def delete_document_chunks(self, db: Session, document_ids: Iterable[int]) -> List[int]:
+        """Delete the chunks of documents being deleted (caller commits); returns their ids"""
+        document_ids = list(document_ids)
+        if not document_ids:
+            return []
+        chunk_ids = [
+            chunk_id for (chunk_id,) in
+            db.query(DocumentChunk.id).filter(DocumentChunk.document_id.in_(document_ids))
+        ]
+        db.query(DocumentChunk).filter(DocumentChunk.document_id.in_(document_ids)).delete(synchronize_session=False)
+        return chunk_ids
+
+    def remove_chunks(self, chunk_ids: Iterable[int]):
+        """Drop deleted chunks from the in-memory index after the delete committed"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._drop(chunk_id)
+
+    def _add(self, chunk_id: int, idea_id: int, vector):
+        self.index.add(chunk_id, vector)
+        self._owners[chunk_id] = idea_id
+        self._chunks_by_idea[idea_id].add(chunk_id)
+
+    def _drop(self, chunk_id: int):
+        self.index.remove(chunk_id)
+        idea_id = self._owners.pop(chunk_id, None)
+        if idea_id is not None:
+            self._chunks_by_idea[idea_id].discard(chunk_id)
+
+    def _read_chunks(self, query):
+        """(chunk id, idea id, vector) for stored chunks of the active dimension"""
+        for row in query:
+            vector = np.frombuffer(row.embedding, dtype=row.dtype or EMBEDDING_DTYPE)
+            if vector.shape[0] != self.embeddings.embedding_dimension:
+                logger.warning(f"Skipping chunk {row.id}: dimension {vector.shape[0]}")
+                continue
+            yield row.id, row.idea_id, vector
+
+    def _active_chunks(self, db: Session):
+        return db.query(DocumentChunk).filter(DocumentChunk.model == self.embeddings.model_name)
+
+    def load_index(self, db: Session) -> VectorIndex:
+        """Load the chunk index for the active model and keep it in step with other workers"""
+        self.embeddings.sync_models(db)
+        generation = table_generation(db, "document_chunks")
+        with self._lock:
+            if self.index.loaded and self._index_model == self.embeddings.model_name:
+                if generation != self._index_generation:
+                    self._catch_up(db)
+                self._index_generation = generation
+                return self.index
+
+            self.index = VectorIndex(self.embeddings.embedding_dimension)
+            self._owners = {}
+            self._chunks_by_idea = defaultdict(set)
+            rows = list(self._read_chunks(self._active_chunks(db)))
+            self.index.build([chunk_id for chunk_id, _, _ in rows], [vector for _, _, vector in rows])
+            for chunk_id, idea_id, _ in rows:
+                self._owners[chunk_id] = idea_id
+                self._chunks_by_idea[idea_id].add(chunk_id)
+            self.index.watermark = self._latest_update(db)
+            self._index_model = self.embeddings.model_name
+            self._index_generation = generation
+            logger.info(f"Loaded {len(rows)} document chunks into the chunk index")
+            return self.index
+
+    def _latest_update(self, db: Session) -> Optional[str]:
+        latest = db.query(func.max(DocumentChunk.updated_at)).filter(
+            DocumentChunk.model == self.embeddings.model_name
+        ).scalar()
+        return latest.isoformat() if latest else None
+
+    def _catch_up(self, db: Session):
+        """Apply chunk writes and deletes made by other workers"""
+        query = self._active_chunks(db)
+        if self.index.watermark:
+            since = datetime.fromisoformat(self.index.watermark) - timedelta(seconds=1)
+            query = query.filter(DocumentChunk.updated_at >= since)
+        for chunk_id, idea_id, vector in self._read_chunks(query):
+            self._add(chunk_id, idea_id, vector)
+
+        # With every write applied, the index can only be larger than the table if rows were deleted
+        active = DocumentChunk.model == self.embeddings.model_name
+        if len(self.index) != db.query(func.count(DocumentChunk.id)).filter(active).scalar():
+            stored_ids = {chunk_id for (chunk_id,) in db.query(DocumentChunk.id).filter(active)}
+            for chunk_id in set(self._owners) - stored_ids:
+                self._drop(chunk_id)
+        self.index.watermark = self._latest_update(db)
+
+    def reset_index(self):
+        with self._lock:
+            self.index.clear()
+            self._owners = {}
+            self._chunks_by_idea = defaultdict(set)
+            self._index_model = None
+            self._index_generation = None
+
+    def search(
+        self,
+        db: Session,
+        query_vector,
+        limit: int,
+        exclude_idea_ids: Iterable[int] = (),
+        min_similarity: Optional[float] = None
+    ) -> Ranking:
+        """Top ideas by their best-matching chunk, as (idea_id, similarity) pairs"""
+        index = self.load_index(db)
+        if limit <= 0 or not len(index):
+            return []
+        with self._lock:
+            excluded = [chunk_id for idea_id in exclude_idea_ids for chunk_id in self._chunks_by_idea.get(idea_id, ())]
+
+        best: Dict[int, float] = {}
+        fetch = limit * CHUNK_OVERFETCH
+        while True:
+            hits = index.search(query_vector, fetch, exclude_ids=excluded, min_score=min_similarity)
+            best = {}
+            with self._lock:
+                for chunk_id, score in hits:
+                    idea_id = self._owners.get(chunk_id)
+                    if idea_id is not None and idea_id not in best:
+                        best[idea_id] = score
+            if len(best) >= limit or len(hits) < fetch:
+                break
+            fetch *= CHUNK_OVERFETCH
+        return list(best.items())[:limit]
+
+    def search_ideas(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        min_similarity: Optional[float] = None
+    ) -> Optional[Ranking]:
+        """Rank ideas by their own text or their best document chunk; None if the query can't be embedded"""
+        query_vector = self.embeddings.embed_query(query)
+        if query_vector is None:
+            return None
+        depth = offset + limit
+        return merge_rankings(
+            self.embeddings.search_vectors(db, query_vector, depth, min_similarity=min_similarity),
+            self.search(db, query_vector, depth, min_similarity=min_similarity)
+        )[offset:depth]
+
+    def add_related(self, db: Session, idea_id: int, related: List[dict], limit: int, min_similarity: float) -> List[dict]:
+        """Merge ideas whose documents resemble this idea into a related-ideas list"""
+        if not len(self.load_index(db)):
+            return related
+        # Only this idea's row: loading the idea index here would undo the precomputed neighbor lists
+        vector = self.embeddings.read_idea_vector(db, idea_id)
+        if vector is None:
+            return related
+        matches = self.search(db, vector, limit, exclude_idea_ids=[idea_id], min_similarity=min_similarity)
+        if not matches:
+            return related
+
+        by_id = {entry["idea_id"]: entry for entry in related}
+        scores = dict(matches)
+        for match_id, score in matches:
+            if match_id in by_id and score > by_id[match_id]["similarity"]:
+                by_id[match_id] = {**by_id[match_id], "similarity": score}
+        new_ids = [match_id for match_id in scores if match_id not in by_id]
+        for idea in db.query(Idea).filter(Idea.id.in_(new_ids)).all() if new_ids else []:
+            by_id[idea.id] = {
+                "idea_id": idea.id,
+                "similarity": scores[idea.id],
+                "title": idea.title,
+                "description": idea.description,
+                "category": idea.category,
+                "status": idea.status
+            }
+        return sorted(by_id.values(), key=lambda entry: entry["similarity"], reverse=True)[:limit]
+
+    def collect_garbage(self, db: Session, model: str, batch_size: int) -> int:
+        """Delete a retired model's chunks in transactions of batch_size rows"""
+        deleted = 0
+        while True:
+            chunk_ids = [
+                chunk_id for (chunk_id,) in
+                db.query(DocumentChunk.id).filter(DocumentChunk.model == model).limit(batch_size)
+            ]
+            if not chunk_ids:
+                return deleted
+            db.query(DocumentChunk).filter(DocumentChunk.id.in_(chunk_ids)).delete(synchronize_session=False)
+            db.commit()
+            deleted += len(chunk_ids)
+
+# Global instance
+chunk_service = DocumentChunkService(embedding_service)
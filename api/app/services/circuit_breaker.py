@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+import requests
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def is_server_failure(error: Exception) -> bool:
+    """Whether an error means the server is down or wedged (not that it rejected the request)"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is None or error.response.status_code >= 500
+    return isinstance(error, requests.exceptions.RequestException)
+
+class CircuitBreaker:
+    """Fail fast while a backend is down
+
+    After failure_threshold consecutive failures the breaker opens and
+    allow() refuses calls for reset_timeout seconds. Then one probe call is
+    let through (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.rejected = 0
+            self._opened_at: Optional[float] = None
+            self._opened_wall: Optional[datetime] = None
+            self._probe_started: Optional[float] = None
+
+    def _retry_in(self, now: float) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - now) if self._opened_at is not None else 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = self._clock()
+            if self.state == OPEN and self._retry_in(now) == 0:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            # A probe whose caller never reported back counts as lost after reset_timeout
+            if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.reset_timeout):
+                self._probe_started = now
+                logger.info(f"Circuit '{self.name}' half-open, probing")
+                return True
+            self.rejected += 1
+            return False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be refused (does not start a probe)"""
+        with self._lock:
+            return self.state == OPEN and self._retry_in(self._clock()) > 0
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed, backend recovered")
+            self.state = CLOSED
+            self.failures = 0
+            self._opened_at = None
+            self._opened_wall = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = OPEN
+                self._opened_at = self._clock()
+                self._opened_wall = datetime.utcnow()
+                self._probe_started = None
+
+    def record_error(self, error: Exception):
+        """Record a failed call; only server failures count, a rejected request proves the server is up
+
+        Anything that is not a requests error (a bad response body, a bug on
+        our side) says nothing about the server and leaves the breaker alone.
+        """
+        if is_server_failure(error):
+            self.record_failure()
+        elif isinstance(error, requests.exceptions.RequestException):
+            self.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            state = self.state
+            if state == OPEN and self._retry_in(now) == 0:
+                state = HALF_OPEN  # next call probes
+            return {
+                "state": state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "opened_at": self._opened_wall.isoformat() if self._opened_wall else None,
+                "retry_in_seconds": round(self._retry_in(now), 3) if state == OPEN else 0.0,
+                "rejected_calls": self.rejected
+            }
+
+# Global instance: the local Ollama server, shared by embeddings and chat
+ollama_breaker = CircuitBreaker(
+    "ollama",
+    failure_threshold=int(os.getenv("OLLAMA_BREAKER_FAILURES", 3)),
+    reset_timeout=float(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", 30.0))
+)
@@ -0,0 +1,224 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, func, update, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.idea import Idea, Document, EmbeddingJob
+from app.services.embedding_service import embedding_service
+from app.services.chunk_service import chunk_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOBS = EmbeddingJob.__table__
+
+class EmbeddingQueue:
+    """Persisted queue of embedding work, drained by a background task
+
+    Routers enqueue in the same transaction as the write that made an
+    embedding stale and return immediately. One row per entity means repeated
+    updates coalesce; a job is only deleted if no newer request arrived while
+    it was being processed. Jobs are leased so several workers (or processes)
+    can share the table, and failures back off exponentially.
+    """
+
+    def __init__(self):
+        self.session_factory = SessionLocal
+        self.worker_enabled = os.getenv("EMBEDDING_QUEUE_WORKER", "true").lower() not in ("0", "false", "no")
+        self.batch_size = int(os.getenv("EMBEDDING_QUEUE_BATCH_SIZE", 16))
+        self.poll_interval = float(os.getenv("EMBEDDING_QUEUE_POLL_SECONDS", 2.0))
+        self.lease = timedelta(seconds=int(os.getenv("EMBEDDING_QUEUE_LEASE_SECONDS", 300)))
+        self.retry_base = float(os.getenv("EMBEDDING_QUEUE_RETRY_SECONDS", 5.0))
+        self.retry_max = float(os.getenv("EMBEDDING_QUEUE_RETRY_MAX_SECONDS", 600.0))
+        self.processed = 0
+        self.failed = 0
+        self.last_run_at: Optional[datetime] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, db: Session, entity_id: int, entity_type: str = "idea"):
+        """Queue (or re-queue) an entity; committed with the caller's transaction"""
+        now = datetime.utcnow()
+        statement = sqlite_insert(EmbeddingJob).values(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            enqueued_at=now,
+            requested_at=now,
+            available_at=now,
+            attempts=0
+        ).on_conflict_do_update(
+            index_elements=["entity_type", "entity_id"],
+            set_={"requested_at": now, "available_at": now, "attempts": 0, "last_error": None}
+        )
+        db.execute(statement)
+
+    def notify(self):
+        """Wake the worker after a commit instead of waiting for its next poll"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _claim(self, db: Session, limit: int) -> List[Tuple[str, int, datetime, int]]:
+        """Lease up to limit available jobs, oldest first"""
+        now = datetime.utcnow()
+        jobs = db.query(
+            EmbeddingJob.entity_type,
+            EmbeddingJob.entity_id,
+            EmbeddingJob.requested_at,
+            EmbeddingJob.attempts,
+            EmbeddingJob.available_at
+        ).filter(EmbeddingJob.available_at <= now).order_by(EmbeddingJob.enqueued_at).limit(limit).all()
+
+        claimed = []
+        for entity_type, entity_id, requested_at, attempts, available_at in jobs:
+            # Compare-and-set on available_at so two workers never lease the same job
+            result = db.execute(
+                update(JOBS).where(and_(
+                    JOBS.c.entity_type == entity_type,
+                    JOBS.c.entity_id == entity_id,
+                    JOBS.c.available_at == available_at
+                )).values(available_at=now + self.lease)
+            )
+            if result.rowcount:
+                claimed.append((entity_type, entity_id, requested_at, attempts))
+        db.commit()
+        return claimed
+
+    def _run_job(self, db: Session, entity_type: str, entity_id: int) -> bool:
+        """Do the embedding work for one job; False to retry later"""
+        if entity_type == "idea":
+            idea = db.query(Idea).filter(Idea.id == entity_id).first()
+            if idea is None:
+                return True  # Deleted since it was queued
+            return embedding_service.update_idea_embedding(db, idea)
+        if entity_type == "document":
+            document = db.query(Document).filter(Document.id == entity_id).first()
+            if document is None:
+                return True  # Deleted since it was queued (its chunks went with it)
+            return chunk_service.update_document(db, document)
+        logger.warning(f"Dropping embedding job with unknown entity type '{entity_type}'")
+        return True
+
+    def _finish(self, db: Session, entity_type: str, entity_id: int, requested_at: datetime, ok: bool, attempts: int):
+        job = and_(
+            JOBS.c.entity_type == entity_type,
+            JOBS.c.entity_id == entity_id,
+            JOBS.c.requested_at == requested_at  # untouched if re-requested meanwhile
+        )
+        if ok:
+            db.execute(delete(JOBS).where(job))
+        else:
+            delay = min(self.retry_base * 2 ** attempts, self.retry_max)
+            db.execute(update(JOBS).where(job).values(
+                attempts=JOBS.c.attempts + 1,
+                last_error="Embedding generation failed",
+                available_at=datetime.utcnow() + timedelta(seconds=delay)
+            ))
+        db.commit()
+
+    def _release(self, db: Session, jobs: List[Tuple[str, int, datetime, int]]):
+        """Hand leased jobs back untouched (no attempt counted)"""
+        now = datetime.utcnow()
+        for entity_type, entity_id, requested_at, attempts in jobs:
+            db.execute(update(JOBS).where(and_(
+                JOBS.c.entity_type == entity_type,
+                JOBS.c.entity_id == entity_id,
+                JOBS.c.requested_at == requested_at
+            )).values(available_at=now))
+        db.commit()
+
+    def process_pending(self, limit: Optional[int] = None) -> int:
+        """Process available jobs (all of them, or up to limit); returns how many ran
+
+        Stops early, leaving jobs queued, while the model server's circuit
+        breaker is open.
+        """
+        db = self.session_factory()
+        processed = 0
+        try:
+            while (limit is None or processed < limit) and embedding_service.available:
+                batch = self._claim(db, self.batch_size if limit is None else min(self.batch_size, limit - processed))
+                if not batch:
+                    break
+                for position, (entity_type, entity_id, requested_at, attempts) in enumerate(batch):
+                    if not embedding_service.available:
+                        self._release(db, batch[position:])
+                        break
+                    try:
+                        ok = self._run_job(db, entity_type, entity_id)
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"Embedding job {entity_type}:{entity_id} failed: {e}")
+                        ok = False
+                    self._finish(db, entity_type, entity_id, requested_at, ok, attempts)
+                    if ok:
+                        self.processed += 1
+                    else:
+                        self.failed += 1
+                    processed += 1
+            self.last_run_at = datetime.utcnow()
+        finally:
+            db.close()
+        return processed
+
+    def stats(self, db: Session) -> dict:
+        """Queue depth and lag, plus this worker's counters"""
+        depth, oldest, retrying = db.query(
+            func.count(EmbeddingJob.entity_id),
+            func.min(EmbeddingJob.enqueued_at),
+            func.count(EmbeddingJob.last_error)
+        ).one()
+        now = datetime.utcnow()
+        return {
+            "depth": depth,
+            "retrying": retrying,
+            "oldest_enqueued_at": oldest.isoformat() if oldest else None,
+            "lag_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+            "worker_running": self._task is not None and not self._task.done(),
+            "paused": not embedding_service.available,
+            "processed": self.processed,
+            "failed": self.failed,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await asyncio.to_thread(self.process_pending, self.batch_size)
+            except Exception as e:
+                logger.error(f"Embedding queue worker error: {e}")
+                processed = 0
+            if not processed:
+                # Idle: sleep until notified, or poll for jobs queued by other processes
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    def start(self):
+        """Start the background worker on the running event loop"""
+        if not self.worker_enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Embedding queue worker started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        self._wake = None
+
+# Global instance
+embedding_queue = EmbeddingQueue()
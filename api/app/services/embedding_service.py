@@ -1,30 +1,164 @@
-import json
+import hashlib
+import os
+import re
 import numpy as np
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.models.idea import Idea, Embedding
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, selectinload
+from app.database import DATA_DIR
+from app.models.idea import Idea, Embedding, EmbeddingModel
+from app.services.vector_index import VectorIndex
+from app.services.hnsw_index import HNSWIndex
+from app.services.mapped_vector_index import MappedVectorIndex
+from app.services.cache_service import LRUCache, table_generation
+from app.services.http_clients import http_clients
+from app.services.circuit_breaker import ollama_breaker
+from app.services.hashing_embedder import HashingEmbedder
+from app.services.vector_cache import EmbeddingVectorCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Vectors are stored as packed little-endian float32 blobs
+EMBEDDING_DTYPE = "float32"
+
+# embedding_models.status values
+MODEL_ACTIVE = "active"
+MODEL_BUILDING = "building"
+MODEL_RETIRED = "retired"
+
+# Model name of vectors from the offline hashing backend
+HASHING_MODEL = "hashing-tfidf"
+
+# Slack on compact-storage scores when pre-filtering candidates by a threshold
+# (int8 rounding error on a unit-vector dot product has a std of about 0.002)
+QUANTIZED_SCORE_MARGIN = 0.02
+
+def create_vector_index(backend: str, dimension: int, path: str):
+    """Build the similarity index selected by EMBEDDING_INDEX_BACKEND"""
+    storage = os.getenv("EMBEDDING_INDEX_STORAGE", "float32")
+    if backend == "hnsw":
+        return HNSWIndex(
+            dimension,
+            m=int(os.getenv("HNSW_M", 16)),
+            ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", 100)),
+            ef_search=int(os.getenv("HNSW_EF_SEARCH", 64))
+        )
+    if backend == "mmap":
+        return MappedVectorIndex(path, dimension, storage=storage)
+    if backend != "exact":
+        logger.warning(f"Unknown EMBEDDING_INDEX_BACKEND '{backend}', using exact search")
+    return VectorIndex(dimension, storage=storage)
+
+# Default file (under DATA_DIR) for each backend that persists its index
+INDEX_FILES = {
+    "hnsw": "embedding_index.hnsw.npz",
+    "mmap": "embedding_matrix",
+}
+
 class OllamaEmbeddingService:
-    def __init__(self, model_name: str = "all-minilm", base_url: str = "http://localhost:11434"):
-        self.model_name = model_name
+    def __init__(self, model_name: Optional[str] = None, base_url: str = "http://localhost:11434"):
+        # Model used until the embedding_models registry names an active one
+        self.default_model = model_name or os.getenv("EMBEDDING_MODEL", "all-minilm")
+        self.default_dimension = int(os.getenv("EMBEDDING_DIMENSION", 384))  # Dimension for all-MiniLM-L6-v2
+        self.model_name = self.default_model
+        self.embedding_dimension = self.default_dimension
         self.base_url = base_url
-        self.embedding_dimension = 384  # Dimension for all-MiniLM-L6-v2
+        # (name, dimension) of a model whose index is being shadow-built; every write embeds for it too
+        self.shadow_model = None
+        # embedding_models generation the model settings above reflect
+        self._models_generation = None
+        self.index_backend = os.getenv("EMBEDDING_INDEX_BACKEND", "exact")
+        self.index_path = self._index_path_for(self.model_name)
+        self.index = create_vector_index(self.index_backend, self.embedding_dimension, self.index_path)
+        self.index_save_every = int(os.getenv("EMBEDDING_INDEX_SAVE_EVERY", 500))
+        # Candidates fetched per requested result before exact re-ranking
+        self.rerank_factor = int(os.getenv("EMBEDDING_RERANK_FACTOR", 4))
+        # Embeddings table generation the in-memory index reflects
+        self._index_generation = None
+        # Recent search queries, so repeated and paginated searches skip Ollama
+        self.query_cache = LRUCache(int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", 256)))
+        # Every text embedded so far, on disk and shared by workers: repeated texts skip the model
+        self.vector_cache = EmbeddingVectorCache(
+            os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.db")),
+            int(os.getenv("EMBEDDING_CACHE_SIZE", 50000))
+        )
+        # Bulk refresh: texts per /api/embed request, and requests in flight at once
+        self.batch_size = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", 32)))
+        self.max_concurrency = max(1, int(os.getenv("EMBEDDING_MAX_CONCURRENCY", 4)))
         
-    def _call_ollama_api(self, text: str) -> Optional[List[float]]:
+    def _index_path_for(self, model: str) -> str:
+        """Persisted index location for a model (the default model keeps the unsuffixed path)"""
+        path = os.getenv(
+            "EMBEDDING_INDEX_PATH",
+            os.path.join(DATA_DIR, INDEX_FILES.get(self.index_backend, "embedding_index"))
+        )
+        if model == self.default_model:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}.{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}{ext}"
+    
+    def sync_models(self, db: Session):
+        """Follow the embedding_models registry: switch the active model, pick up shadow builds"""
+        generation = table_generation(db, "embedding_models")
+        if generation == self._models_generation:
+            return
+        try:
+            models = db.query(EmbeddingModel).all()
+        except OperationalError:
+            db.rollback()
+            models = []  # Database predates the registry
+        self._models_generation = generation
+        
+        active = next((model for model in models if model.status == MODEL_ACTIVE), None)
+        building = next((model for model in models if model.status == MODEL_BUILDING), None)
+        self.shadow_model = (building.name, building.dimension) if building else None
+        name, dimension = (active.name, active.dimension) if active else (self.default_model, self.default_dimension)
+        if name != self.model_name or dimension != self.embedding_dimension:
+            logger.info(f"Switching embedding model from {self.model_name} to {name}")
+            self.save_index()
+            self.model_name = name
+            self.embedding_dimension = dimension
+            self.index_path = self._index_path_for(name)
+            self.index = create_vector_index(self.index_backend, dimension, self.index_path)
+            self._index_generation = None
+    
+    def _dimension_for(self, model: str) -> Optional[int]:
+        if model == self.model_name:
+            return self.embedding_dimension
+        if self.shadow_model and model == self.shadow_model[0]:
+            return self.shadow_model[1]
+        return None
+    
+    def embeddings_query(self, db: Session):
+        """Stored embeddings of the active model"""
+        return db.query(Embedding).filter(Embedding.model == self.model_name)
+    
+    @property
+    def available(self) -> bool:
+        """False while the model server's circuit breaker is refusing calls"""
+        return not ollama_breaker.is_open
+    
+    def _call_ollama_api(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
         """Call Ollama API to generate embeddings"""
+        if not ollama_breaker.allow():
+            logger.debug("Ollama circuit open, not requesting an embedding")
+            return None
         try:
             url = f"{self.base_url}/api/embeddings"
             payload = {
-                "model": self.model_name,
+                "model": model or self.model_name,
                 "prompt": text
             }
             
-            response = requests.post(url, json=payload, timeout=30)
+            response = http_clients.ollama.post(url, json=payload, timeout=http_clients.timeout(30))
             response.raise_for_status()
+            ollama_breaker.record_success()
             
             data = response.json()
             if "embedding" in data:
@@ -35,35 +169,128 @@ class OllamaEmbeddingService:
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to call Ollama API: {e}")
+            ollama_breaker.record_error(e)
             return None
         except Exception as e:
             logger.error(f"Unexpected error in embedding generation: {e}")
             return None
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding for given text"""
+    def _call_ollama_batch(self, texts: List[str], model: Optional[str] = None) -> Optional[List[List[float]]]:
+        """Embed several texts in one request via Ollama's /api/embed"""
+        if not ollama_breaker.allow():
+            logger.debug("Ollama circuit open, not requesting embeddings")
+            return None
+        try:
+            url = f"{self.base_url}/api/embed"
+            payload = {
+                "model": model or self.model_name,
+                "input": texts
+            }
+            
+            response = http_clients.ollama.post(url, json=payload, timeout=http_clients.timeout(30 + 2 * len(texts)))
+            if response.status_code == 404:
+                ollama_breaker.record_success()
+                # Ollama before 0.2 only has the single-text endpoint
+                logger.warning("Ollama has no /api/embed endpoint, embedding texts one at a time")
+                return [self._call_ollama_api(text, model) for text in texts]
+            response.raise_for_status()
+            ollama_breaker.record_success()
+            
+            data = response.json()
+            embeddings = data.get("embeddings")
+            if isinstance(embeddings, list) and len(embeddings) == len(texts):
+                return embeddings
+            logger.error(f"Unexpected batch response format from Ollama: {str(data)[:200]}")
+            return None
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to call Ollama batch API: {e}")
+            ollama_breaker.record_error(e)
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error in batch embedding generation: {e}")
+            return None
+    
+    def generate_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[Optional[List[float]]]:
+        """Normalized embeddings for several texts (None where a text could not be embedded)"""
+        model = model or self.model_name
+        cleaned = [text.strip() for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        positions = [position for position, text in enumerate(cleaned) if text]
+        if not positions:
+            return results
+        
+        cached = self.vector_cache.get_many(model, [cleaned[position] for position in positions])
+        missing = []
+        for position, vector in zip(positions, cached):
+            if vector is not None:
+                results[position] = vector
+            else:
+                missing.append(position)
+        if not missing:
+            return results
+        
+        started = time.perf_counter()
+        embeddings = self._call_ollama_batch([cleaned[position] for position in missing], model)
+        if not embeddings:
+            return results
+        self.vector_cache.record_model_time(time.perf_counter() - started, len(missing))
+        for position, embedding in zip(missing, embeddings):
+            if embedding:
+                embedding_array = np.array(embedding)
+                results[position] = (embedding_array / np.linalg.norm(embedding_array)).tolist()
+        self.vector_cache.put_many(model, [cleaned[position] for position in missing], [results[position] for position in missing])
+        return results
+    
+    def generate_embedding(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
+        """Generate embedding for given text (with the active model unless one is named)"""
         if not text or not text.strip():
             return None
             
         # Clean and prepare text
         cleaned_text = text.strip()
+        model = model or self.model_name
+        
+        cached = self.vector_cache.get(model, cleaned_text)
+        if cached is not None:
+            return cached
         
         # Generate embedding
-        embedding = self._call_ollama_api(cleaned_text)
+        started = time.perf_counter()
+        embedding = self._call_ollama_api(cleaned_text, model)
         
         if embedding:
+            self.vector_cache.record_model_time(time.perf_counter() - started, 1)
             # Normalize the embedding
             embedding_array = np.array(embedding)
-            normalized_embedding = embedding_array / np.linalg.norm(embedding_array)
-            return normalized_embedding.tolist()
+            normalized_embedding = (embedding_array / np.linalg.norm(embedding_array)).tolist()
+            self.vector_cache.put(model, cleaned_text, normalized_embedding)
+            return normalized_embedding
         
         return None
     
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """Embedding for a search query, served from the LRU cache when possible"""
+        key = " ".join(text.split())
+        if not key:
+            return None
+        cached = self.query_cache.get((self.model_name, key))
+        if cached is not None:
+            return cached
+        
+        embedding = self.generate_embedding(key)
+        if not embedding:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector.setflags(write=False)
+        self.query_cache.put((self.model_name, key), vector)
+        return vector
+    
+    def calculate_similarity(self, embedding1, embedding2) -> float:
         """Calculate cosine similarity between two embeddings"""
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
+            vec1 = np.asarray(embedding1, dtype=np.float32)
+            vec2 = np.asarray(embedding2, dtype=np.float32)
             
             # Calculate cosine similarity
             dot_product = np.dot(vec1, vec2)
@@ -80,6 +307,20 @@ class OllamaEmbeddingService:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
     
+    def pack_vector(self, vector: List[float]) -> bytes:
+        """Pack an embedding vector into the binary column format"""
+        return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+    
+    def unpack_vector(self, db_embedding: Embedding) -> np.ndarray:
+        """Read a stored embedding as a NumPy array without copying"""
+        vector = np.frombuffer(db_embedding.embedding, dtype=db_embedding.dtype or EMBEDDING_DTYPE)
+        if db_embedding.dimension and vector.shape[0] != db_embedding.dimension:
+            raise ValueError(
+                f"Embedding for idea {db_embedding.idea_id} has {vector.shape[0]} components, "
+                f"expected {db_embedding.dimension}"
+            )
+        return vector
+    
     def get_idea_text_for_embedding(self, idea: Idea) -> str:
         """Extract and combine text from idea for embedding generation"""
         text_parts = []
@@ -104,9 +345,34 @@ class OllamaEmbeddingService:
             
         return " | ".join(text_parts)
     
-    def update_idea_embedding(self, db: Session, idea: Idea) -> bool:
-        """Generate and store embedding for an idea"""
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Fingerprint of the text an embedding is generated from"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def is_current(content_hash: Optional[str], text_hash: str) -> bool:
+        """Whether a stored embedding (of the model being written) was generated from this text"""
+        return content_hash == text_hash
+    
+    def update_idea_embedding(
+        self,
+        db: Session,
+        idea: Idea,
+        update_neighbors: bool = True,
+        force: bool = False
+    ) -> bool:
+        """Generate and store embedding for an idea
+
+        Written for the active model and, during a shadow build, for the model
+        being built. Skipped per model (and reported as success) when the stored
+        embedding was generated from the same text, unless force=True.
+        update_neighbors=False skips the idea_neighbors maintenance, for bulk
+        callers that rebuild the table once at the end.
+        """
         try:
+            self.sync_models(db)
+            
             # Get text for embedding
             idea_text = self.get_idea_text_for_embedding(idea)
             
@@ -114,104 +380,460 @@ class OllamaEmbeddingService:
                 logger.warning(f"No text content found for idea {idea.id}")
                 return False
             
-            # Generate embedding
-            embedding_vector = self.generate_embedding(idea_text)
+            text_hash = self.content_hash(idea_text)
+            models = [self.model_name] + ([self.shadow_model[0]] if self.shadow_model else [])
+            stored = {
+                row.model: row
+                for row in db.query(Embedding).filter(Embedding.idea_id == idea.id, Embedding.model.in_(models))
+            }
             
-            if not embedding_vector:
-                logger.error(f"Failed to generate embedding for idea {idea.id}")
-                return False
+            written = {}
+            complete = True
+            for model in models:
+                db_embedding = stored.get(model)
+                if not force and db_embedding and self.is_current(db_embedding.content_hash, text_hash):
+                    logger.debug(f"{model} embedding for idea {idea.id} is up to date")
+                    continue
+                
+                # Generate embedding
+                embedding_vector = self.generate_embedding(idea_text, model)
+                
+                if not embedding_vector or len(embedding_vector) != self._dimension_for(model):
+                    logger.error(f"Failed to generate {model} embedding for idea {idea.id}")
+                    complete = False
+                    continue
+                
+                # Store in database
+                self._store_embedding(db, idea.id, embedding_vector, text_hash, db_embedding, model)
+                written[model] = embedding_vector
             
-            # Store in database
-            db_embedding = db.query(Embedding).filter(Embedding.idea_id == idea.id).first()
+            if not written:
+                return complete
+            db.commit()
             
-            if db_embedding:
-                # Update existing embedding
-                db_embedding.embedding = json.dumps(embedding_vector)
-            else:
-                # Create new embedding
-                db_embedding = Embedding(
-                    idea_id=idea.id,
-                    embedding=json.dumps(embedding_vector)
-                )
-                db.add(db_embedding)
+            active_vector = written.get(self.model_name)
+            if active_vector is not None:
+                # Keep the in-memory index in sync with the stored vector
+                if self.index.loaded:
+                    self.index.add(idea.id, active_vector)
+                    self._maybe_save_index()
+                
+                if update_neighbors:
+                    from app.services.neighbor_service import neighbor_service
+                    neighbor_service.update_idea(db, idea.id)
             
-            db.commit()
             logger.info(f"Successfully updated embedding for idea {idea.id}")
-            return True
+            return complete
             
         except Exception as e:
             logger.error(f"Error updating embedding for idea {idea.id}: {e}")
             db.rollback()
             return False
     
-    def get_similar_ideas(self, db: Session, idea_id: int, limit: int = 5, min_similarity: float = 0.3) -> List[dict]:
-        """Find similar ideas based on embedding similarity"""
+    def _store_embedding(
+        self,
+        db: Session,
+        idea_id: int,
+        embedding_vector: List[float],
+        text_hash: str,
+        db_embedding: Optional[Embedding] = None,
+        model: Optional[str] = None
+    ):
+        """Write a vector and its fingerprint to the idea's row for a model (caller commits)"""
+        packed_vector = self.pack_vector(embedding_vector)
+        
+        if db_embedding:
+            # Update existing embedding
+            db_embedding.embedding = packed_vector
+            db_embedding.dtype = EMBEDDING_DTYPE
+            db_embedding.dimension = len(embedding_vector)
+            db_embedding.content_hash = text_hash
+            db_embedding.updated_at = datetime.utcnow()
+        else:
+            # Create new embedding
+            db.add(Embedding(
+                idea_id=idea_id,
+                embedding=packed_vector,
+                dtype=EMBEDDING_DTYPE,
+                dimension=len(embedding_vector),
+                content_hash=text_hash,
+                model=model or self.model_name,
+                updated_at=datetime.utcnow()
+            ))
+    
+    @property
+    def persists_index(self) -> bool:
+        """Whether the index is kept on disk (HNSW snapshot or memory-mapped matrix)"""
+        return isinstance(self.index, (HNSWIndex, MappedVectorIndex))
+    
+    def _read_vectors(self, query):
+        """Unpack (idea_id, vector) pairs from an Embedding query, skipping bad rows"""
+        for emb in query:
+            try:
+                vector = self.unpack_vector(emb)
+            except ValueError as e:
+                logger.warning(f"Skipping embedding for idea {emb.idea_id}: {e}")
+                continue
+            if vector.shape[0] != self.embedding_dimension:
+                logger.warning(f"Skipping embedding for idea {emb.idea_id}: dimension {vector.shape[0]}")
+                continue
+            yield emb.idea_id, vector
+    
+    def _latest_embedding_update(self, db: Session) -> Optional[str]:
+        latest = db.query(func.max(Embedding.updated_at)).filter(Embedding.model == self.model_name).scalar()
+        return latest.isoformat() if latest else None
+    
+    def load_index(self, db: Session):
+        """Load the similarity index on first use and keep it in step with other workers"""
+        self.sync_models(db)
+        generation = table_generation(db, "embeddings")
+        if self.index.loaded:
+            # Includes the shared mapped matrix: workers that hadn't loaded it
+            # when they wrote an embedding left the row to the catch-up
+            if generation != self._index_generation:
+                self._catch_up_index(db)
+            self._index_generation = generation
+            return self.index
+        
+        self._index_generation = generation
+        if self.persists_index and self.index.load(self.index_path):
+            self._catch_up_index(db)
+            logger.info(f"Restored similarity index with {len(self.index)} vectors from {self.index_path}")
+            return self.index
+        
+        ids = []
+        vectors = []
+        for idea_id, vector in self._read_vectors(self.embeddings_query(db)):
+            ids.append(idea_id)
+            vectors.append(vector)
+        
+        self.index.build(ids, vectors)
+        self.index.watermark = self._latest_embedding_update(db)
+        logger.info(f"Loaded {len(ids)} embeddings into the similarity index")
+        
+        if self.persists_index:
+            self.save_index()
+        return self.index
+    
+    def _catch_up_index(self, db: Session):
+        """Apply embedding writes and deletes made since the index snapshot"""
+        query = self.embeddings_query(db)
+        if self.index.watermark:
+            # Step back a second: server-side timestamps only have second resolution
+            since = datetime.fromisoformat(self.index.watermark) - timedelta(seconds=1)
+            query = query.filter(Embedding.updated_at >= since)
+        for idea_id, vector in self._read_vectors(query):
+            self.index.add(idea_id, vector)
+        
+        # With every write applied, the index can only be larger than the table if rows were deleted
+        active = Embedding.model == self.model_name
+        if len(self.index) != db.query(func.count(Embedding.idea_id)).filter(active).scalar():
+            stored_ids = {idea_id for (idea_id,) in db.query(Embedding.idea_id).filter(active).all()}
+            for stale_id in self.index.ids() - stored_ids:
+                self.index.remove(stale_id)
+        
+        self.index.watermark = self._latest_embedding_update(db)
+        self._maybe_save_index()
+    
+    def save_index(self):
+        """Write the persistent index snapshot to disk"""
+        if not self.persists_index or not self.index.loaded:
+            return
+        try:
+            self.index.save(self.index_path)
+        except OSError as e:
+            logger.error(f"Failed to save similarity index to {self.index_path}: {e}")
+    
+    def _maybe_save_index(self):
+        if self.persists_index and self.index.changes_since_save >= self.index_save_every:
+            self.save_index()
+    
+    def reset_index(self):
+        """Forget the in-memory index (and model settings) so they are reloaded from the database"""
+        self.index.clear()
+        self._index_generation = None
+        self._models_generation = None
+    
+    def remove_index_files(self, model: str):
+        """Delete a retired model's persisted index"""
+        if model == self.model_name:
+            return
+        path = self._index_path_for(model)
+        for file_path in (path, f"{path}.ids", f"{path}.vectors", f"{path}.lock"):
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+    
+    def remove_idea_embedding(self, idea_id: int):
+        """Drop an idea from the in-memory index after its embedding was deleted"""
+        if self.index.remove(idea_id):
+            self._maybe_save_index()
+    
+    def _full_precision_vectors(self, db: Session, idea_ids: List[int]) -> dict:
+        """Read stored float32 vectors for the given ideas in one query"""
+        if not idea_ids:
+            return {}
+        query = self.embeddings_query(db).filter(Embedding.idea_id.in_(idea_ids))
+        return dict(self._read_vectors(query))
+    
+    def search_vectors(
+        self,
+        db: Session,
+        query_vector,
+        limit: int,
+        exclude_ids: List[int] = (),
+        min_similarity: Optional[float] = None,
+        exact: bool = False,
+        ef: Optional[int] = None,
+        candidate_ids=None
+    ) -> List[tuple]:
+        """Top-k (idea_id, similarity) pairs for a query vector
+
+        A quantized index over-fetches candidates from its compact matrix and
+        re-scores them against full-precision vectors, so scores and order match
+        a float32 scan. candidate_ids restricts the search to a pre-filtered set.
+        """
+        index = self.load_index(db)
+        if not getattr(index, "quantized", False):
+            return index.search(
+                query_vector,
+                limit,
+                exclude_ids=exclude_ids,
+                min_score=min_similarity,
+                ef=ef,
+                exact=exact,
+                candidates=candidate_ids
+            )
+        
+        candidates = index.search(
+            query_vector,
+            limit * self.rerank_factor,
+            exclude_ids=exclude_ids,
+            min_score=None if min_similarity is None else min_similarity - QUANTIZED_SCORE_MARGIN,
+            candidates=candidate_ids
+        )
+        full_vectors = self._full_precision_vectors(db, [item_id for item_id, _ in candidates])
+        
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        rescored = []
+        for item_id, _ in candidates:
+            vector = full_vectors.get(item_id)
+            if vector is None:
+                continue
+            similarity = self.calculate_similarity(query, vector)
+            if min_similarity is None or similarity >= min_similarity:
+                rescored.append((item_id, similarity))
+        
+        rescored.sort(key=lambda match: match[1], reverse=True)
+        return rescored[:limit]
+    
+    def search_ideas(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        min_similarity: Optional[float] = None
+    ) -> Optional[List[tuple]]:
+        """Rank ideas by similarity to a text query; None if the query can't be embedded"""
+        query_vector = self.embed_query(query)
+        if query_vector is None:
+            return None
+        return self.search_vectors(db, query_vector, offset + limit, min_similarity=min_similarity)[offset:]
+    
+    def get_idea_vector(self, db: Session, idea_id: int) -> Optional[np.ndarray]:
+        """Stored vector of an idea, or None if it has not been embedded"""
+        self.load_index(db)
+        return self._get_target_vector(db, idea_id)
+    
+    def read_idea_vector(self, db: Session, idea_id: int) -> Optional[np.ndarray]:
+        """Stored vector of an idea, read from its embedding row without loading the index"""
+        return self._full_precision_vectors(db, [idea_id]).get(idea_id)
+    
+    def _get_target_vector(self, db: Session, idea_id: int) -> Optional[np.ndarray]:
+        """Query vector for an idea, full precision even when the index is quantized"""
+        if getattr(self.index, "quantized", False):
+            return self._full_precision_vectors(db, [idea_id]).get(idea_id)
+        return self.index.get(idea_id)
+    
+    def get_similar_ideas(
+        self,
+        db: Session,
+        idea_id: int,
+        limit: int = 5,
+        min_similarity: float = 0.3,
+        exact: bool = False,
+        ef: Optional[int] = None
+    ) -> List[dict]:
+        """Find similar ideas based on embedding similarity
+
+        exact=True bypasses the approximate index (to verify its recall);
+        ef overrides the HNSW candidate list size for this query.
+        """
         try:
             # Get the target idea and its embedding
             target_idea = db.query(Idea).filter(Idea.id == idea_id).first()
             if not target_idea:
                 return []
             
-            target_embedding = db.query(Embedding).filter(Embedding.idea_id == idea_id).first()
-            if not target_embedding:
+            index = self.load_index(db)
+            target_vector = self._get_target_vector(db, idea_id)
+            if target_vector is None:
                 # Generate embedding if it doesn't exist
                 if not self.update_idea_embedding(db, target_idea):
                     return []
-                target_embedding = db.query(Embedding).filter(Embedding.idea_id == idea_id).first()
+                target_vector = self._get_target_vector(db, idea_id)
+                if target_vector is None:
+                    return []
             
-            target_vector = json.loads(target_embedding.embedding)
+            # One matrix-vector product over every stored vector
+            matches = self.search_vectors(
+                db,
+                target_vector,
+                limit,
+                exclude_ids=[idea_id],
+                min_similarity=min_similarity,
+                exact=exact,
+                ef=ef
+            )
+            if not matches:
+                return []
             
-            # Get all other ideas with embeddings
-            other_embeddings = db.query(Embedding).filter(Embedding.idea_id != idea_id).all()
+            # Fetch metadata for all hits in a single query
+            ideas_by_id = {
+                idea.id: idea
+                for idea in db.query(Idea).filter(Idea.id.in_([match_id for match_id, _ in matches])).all()
+            }
             
             similarities = []
-            for emb in other_embeddings:
-                try:
-                    other_vector = json.loads(emb.embedding)
-                    similarity = self.calculate_similarity(target_vector, other_vector)
-                    
-                    if similarity >= min_similarity:
-                        # Get the idea details
-                        other_idea = db.query(Idea).filter(Idea.id == emb.idea_id).first()
-                        if other_idea:
-                            similarities.append({
-                                "idea_id": other_idea.id,
-                                "similarity": similarity,
-                                "title": other_idea.title,
-                                "description": other_idea.description,
-                                "category": other_idea.category,
-                                "status": other_idea.status
-                            })
-                except Exception as e:
-                    logger.error(f"Error calculating similarity for idea {emb.idea_id}: {e}")
+            for match_id, similarity in matches:
+                other_idea = ideas_by_id.get(match_id)
+                if not other_idea:
+                    # Embedding outlived its idea; keep the index clean
+                    index.remove(match_id)
                     continue
+                similarities.append({
+                    "idea_id": other_idea.id,
+                    "similarity": similarity,
+                    "title": other_idea.title,
+                    "description": other_idea.description,
+                    "category": other_idea.category,
+                    "status": other_idea.status
+                })
             
-            # Sort by similarity and return top results
-            similarities.sort(key=lambda x: x["similarity"], reverse=True)
-            return similarities[:limit]
+            return similarities
             
         except Exception as e:
             logger.error(f"Error getting similar ideas: {e}")
             return []
     
-    def update_all_embeddings(self, db: Session) -> dict:
-        """Update embeddings for all ideas"""
+    def _store_batch(self, db: Session, batch: List[tuple], vectors: List[Optional[List[float]]], model: str) -> int:
+        """Write one batch of results in a single transaction; returns how many were stored"""
+        existing = {
+            emb.idea_id: emb
+            for emb in db.query(Embedding).filter(
+                Embedding.model == model,
+                Embedding.idea_id.in_([idea_id for idea_id, _, _ in batch])
+            )
+        }
+        dimension = self._dimension_for(model)
+        stored = []
+        for (idea_id, _, text_hash), vector in zip(batch, vectors):
+            if vector and (dimension is None or len(vector) == dimension):
+                self._store_embedding(db, idea_id, vector, text_hash, existing.get(idea_id), model)
+                stored.append((idea_id, vector))
+        db.commit()
+        
+        if model == self.model_name and self.index.loaded:
+            for idea_id, vector in stored:
+                self.index.add(idea_id, vector)
+            self._maybe_save_index()
+        return len(stored)
+    
+    def _pending_texts(self, db: Session, ideas_query, model: str, force: bool) -> tuple:
+        """(ideas, [(idea_id, text, hash) to embed], skipped, without text) for a refresh
+
+        The loaded ideas go out of scope on return, so the per-batch commits
+        that follow don't have to expire every one of them.
+        """
+        ideas = ideas_query.options(selectinload(Idea.tags)).all()
+        stored = {
+            idea_id: content_hash
+            for idea_id, content_hash in db.query(Embedding.idea_id, Embedding.content_hash).filter(
+                Embedding.model == model,
+                Embedding.idea_id.in_([idea.id for idea in ideas])
+            )
+        } if ideas else {}
+        pending = []
+        skipped = 0
+        without_text = 0
+        for idea in ideas:
+            idea_text = self.get_idea_text_for_embedding(idea)
+            if not idea_text:
+                logger.warning(f"No text content found for idea {idea.id}")
+                without_text += 1
+                continue
+            text_hash = self.content_hash(idea_text)
+            if not force and idea.id in stored and self.is_current(stored[idea.id], text_hash):
+                skipped += 1
+                continue
+            pending.append((idea.id, idea_text, text_hash))
+        return len(ideas), pending, skipped, without_text
+    
+    def refresh_embeddings(self, db: Session, ideas_query, force: bool = False, model: Optional[str] = None) -> dict:
+        """Embed the ideas a query selects whose text changed (all of them if force)
+
+        Texts go to the model in batches of batch_size, up to max_concurrency
+        requests at a time; each batch is committed as it completes. Leaves
+        the neighbor table to the caller.
+        """
+        self.sync_models(db)
+        model = model or self.model_name
+        total, pending, skipped, failed = self._pending_texts(db, ideas_query, model, force)
+        successful = 0
+        
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        if batches:
+            # Only the HTTP calls run in the pool; the session stays on this thread
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+                futures = {
+                    pool.submit(self.generate_embeddings, [text for _, text, _ in batch], model): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        written = self._store_batch(db, batch, future.result(), model)
+                    except Exception as e:
+                        logger.error(f"Error storing embedding batch: {e}")
+                        db.rollback()
+                        written = 0
+                    successful += written
+                    failed += len(batch) - written
+        
+        return {"model": model, "total": total, "successful": successful, "skipped": skipped, "failed": failed}
+    
+    def update_all_embeddings(self, db: Session, force: bool = False, model: Optional[str] = None) -> dict:
+        """Update embeddings for all ideas whose text changed (all of them if force)
+
+        model defaults to the active one; a shadow-built model leaves the
+        index and neighbor table alone.
+        """
         try:
-            ideas = db.query(Idea).all()
-            success_count = 0
-            error_count = 0
+            result = self.refresh_embeddings(db, db.query(Idea), force, model)
             
-            for idea in ideas:
-                if self.update_idea_embedding(db, idea):
-                    success_count += 1
-                else:
-                    error_count += 1
+            # Unchanged vectors leave every related-idea list as it was
+            if result["successful"] and result["model"] == self.model_name:
+                from app.services.neighbor_service import neighbor_service
+                neighbor_service.rebuild(db)
             
             return {
                 "success": True,
-                "total_ideas": len(ideas),
-                "successful_updates": success_count,
-                "failed_updates": error_count
+                "model": result["model"],
+                "total_ideas": result["total"],
+                "successful_updates": result["successful"],
+                "skipped_updates": result["skipped"],
+                "failed_updates": result["failed"]
             }
             
         except Exception as e:
@@ -221,5 +843,50 @@ class OllamaEmbeddingService:
                 "error": str(e)
             }
 
+class HashingEmbeddingService(OllamaEmbeddingService):
+    """The embedding service with vectors from the local HashingEmbedder instead of Ollama
+
+    For tests, benchmarks and air-gapped deployments: no model server, and
+    thousands of texts per second on one core. Similarity reflects shared
+    words rather than meaning. The vectors are only valid for HASHING_MODEL,
+    so a database indexed with an Ollama model must switch models first.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, base_url: str = "http://localhost:11434"):
+        super().__init__(model_name or HASHING_MODEL, base_url)
+        self.embedder = HashingEmbedder(
+            self.default_dimension,
+            buckets=int(os.getenv("EMBEDDING_HASHING_BUCKETS", 2 ** 14))
+        )
+        # A cache miss plus write costs about as much as hashing the text again
+        self.vector_cache.max_entries = 0
+
+    def _serves(self, model: Optional[str]) -> bool:
+        model = model or self.model_name
+        if model != self.default_model:
+            logger.error(f"The hashing backend only produces {self.default_model} vectors, not {model}")
+            return False
+        return True
+
+    def _call_ollama_api(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
+        if not self._serves(model):
+            return None
+        vector = self.embedder.embed(text)
+        return vector.tolist() if vector is not None else None
+
+    def _call_ollama_batch(self, texts: List[str], model: Optional[str] = None) -> Optional[List[List[float]]]:
+        if not self._serves(model):
+            return None
+        return [vector.tolist() if vector is not None else None for vector in self.embedder.embed_batch(texts)]
+
+def create_embedding_service() -> OllamaEmbeddingService:
+    """Build the embedding service selected by EMBEDDING_BACKEND"""
+    backend = os.getenv("EMBEDDING_BACKEND", "ollama")
+    if backend == "hashing":
+        return HashingEmbeddingService()
+    if backend != "ollama":
+        logger.warning(f"Unknown EMBEDDING_BACKEND '{backend}', using Ollama")
+    return OllamaEmbeddingService()
+
 # Global instance
-embedding_service = OllamaEmbeddingService() 
\ No newline at end of file
+embedding_service = create_embedding_service()
@@ -0,0 +1,105 @@
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy.orm import Session
+from app.models.idea import Idea, Tag, idea_tags
+from app.services.cache_service import GenerationCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IdeaAttributes:
+    """Column arrays of filterable idea attributes, one row per idea (sorted by id)
+
+    Filters become NumPy boolean masks over these rows, so narrowing a
+    similarity search to matching ideas never touches the database.
+    """
+
+    def __init__(self, db: Session):
+        rows = db.query(Idea.id, Idea.category, Idea.status, Idea.created_at).order_by(Idea.id).all()
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+
+        # Categorical columns are stored as codes into a small vocabulary
+        self.category_codes: Dict[str, int] = {}
+        self.categories = np.array(
+            [self.category_codes.setdefault(row[1], len(self.category_codes)) if row[1] else -1 for row in rows],
+            dtype=np.int32
+        )
+        self.status_codes: Dict[str, int] = {}
+        self.statuses = np.array(
+            [self.status_codes.setdefault(row[2], len(self.status_codes)) if row[2] else -1 for row in rows],
+            dtype=np.int32
+        )
+        self.created_at = np.array(
+            [(row[3] or datetime.min).replace(tzinfo=None) for row in rows],
+            dtype="datetime64[us]"
+        )
+
+        # Tag membership as sorted row numbers per tag name
+        members: Dict[str, list] = {}
+        for idea_id, name in db.query(idea_tags.c.idea_id, Tag.name).join(Tag, Tag.id == idea_tags.c.tag_id):
+            members.setdefault(name, []).append(idea_id)
+        self.tag_rows = {name: self._rows_for(tag_ids) for name, tag_ids in members.items()}
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def _rows_for(self, idea_ids: list) -> np.ndarray:
+        """Rows of the given ids, skipping ids without an idea row"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        idea_ids = np.unique(np.array(idea_ids, dtype=np.int64))
+        rows = np.minimum(np.searchsorted(self.ids, idea_ids), len(self) - 1)
+        return rows[self.ids[rows] == idea_ids]
+
+    def _codes_mask(self, column: np.ndarray, codes: Dict[str, int], value: str) -> np.ndarray:
+        code = codes.get(value)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return column == code
+
+    def mask(
+        self,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> np.ndarray:
+        """Rows matching every given filter (tags match if the idea has any of them)"""
+        mask = np.ones(len(self), dtype=bool)
+        if category:
+            mask &= self._codes_mask(self.categories, self.category_codes, category)
+        if status:
+            mask &= self._codes_mask(self.statuses, self.status_codes, status)
+        if tags:
+            tagged = np.zeros(len(self), dtype=bool)
+            for name in tags:
+                rows = self.tag_rows.get(name)
+                if rows is not None:
+                    tagged[rows] = True
+            mask &= tagged
+        if date_from:
+            mask &= self.created_at >= np.datetime64(date_from, "us")
+        if date_to:
+            mask &= self.created_at <= np.datetime64(date_to, "us")
+        return mask
+
+    def matching_ids(self, **filters) -> np.ndarray:
+        """Ids of the ideas matching the filters"""
+        return self.ids[self.mask(**filters)]
+
+class IdeaFilterIndex:
+    """Per-worker IdeaAttributes, rebuilt when ideas or their tags change in any worker"""
+
+    def __init__(self):
+        self._cache = GenerationCache("ideas", "idea_tags", "tags")
+
+    def get(self, db: Session) -> IdeaAttributes:
+        return self._cache.get(db, IdeaAttributes)
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+# Global instance
+idea_filter_index = IdeaFilterIndex()
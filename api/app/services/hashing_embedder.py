@@ -0,0 +1,106 @@
+import math
+import re
+import threading
+import zlib
+import numpy as np
+from collections import Counter
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common English words, weighted down like terms with a low inverse document frequency
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does for from
+had has have he her his how i if in into is it its just like may more most my no not of on one or
+other our out over she so some such than that the their them then there these they this to too up
+us was we were what when where which while who will with would you your
+""".split())
+STOP_WORD_WEIGHT = 0.1
+
+# Relative weight of word pairs and of word prefixes (a crude stem) against whole words
+BIGRAM_WEIGHT = 0.5
+PREFIX_WEIGHT = 0.5
+PREFIX_LENGTH = 5
+
+# Token -> bucket memo entries kept before the memo is reset
+BUCKET_CACHE_SIZE = 100000
+
+class HashingEmbedder:
+    """Dense text vectors from hashed, weighted terms; NumPy only, no model server
+
+    Words, word pairs and word prefixes are hashed (crc32, stable across
+    processes) into a fixed number of buckets and weighted by sublinear term
+    frequency times a static inverse-document-frequency prior. The sparse
+    bucket vector is multiplied by a fixed seeded Gaussian projection, so
+    texts sharing terms get a high cosine similarity. Vectors never depend
+    on the corpus: embedding a text always gives the same result.
+    """
+
+    def __init__(self, dimension: int = 384, buckets: int = 2 ** 14, seed: int = 0):
+        self.dimension = dimension
+        self.buckets = buckets
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._projection: Optional[np.ndarray] = None
+        self._bucket_cache = {}
+
+    @property
+    def projection(self) -> np.ndarray:
+        """(buckets, dimension) projection matrix, generated on first use"""
+        with self._lock:
+            if self._projection is None:
+                rng = np.random.default_rng(self.seed)
+                self._projection = rng.standard_normal((self.buckets, self.dimension), dtype=np.float32)
+            return self._projection
+
+    def _bucket(self, token: str) -> int:
+        bucket = self._bucket_cache.get(token)
+        if bucket is None:
+            if len(self._bucket_cache) >= BUCKET_CACHE_SIZE:
+                self._bucket_cache = {}
+            bucket = zlib.crc32(token.encode("utf-8")) % self.buckets
+            self._bucket_cache[token] = bucket
+        return bucket
+
+    @staticmethod
+    def _prior(term: str) -> float:
+        """Static weight of a term, by kind: word pair, word prefix, stop word or word"""
+        if " " in term:
+            return BIGRAM_WEIGHT
+        if term[0] == "~":
+            return PREFIX_WEIGHT
+        return STOP_WORD_WEIGHT if term in STOP_WORDS else 1.0
+
+    def _features(self, text: str) -> Counter:
+        """Counts of the words, word prefixes and adjacent content-word pairs of a text"""
+        words = TOKEN_PATTERN.findall(text.lower())
+        content_words = [word for word in words if word not in STOP_WORDS]
+        counts = Counter(words)
+        counts.update(["~" + word[:PREFIX_LENGTH] for word in words if len(word) > PREFIX_LENGTH + 1])
+        counts.update([first + " " + second for first, second in zip(content_words, content_words[1:])])
+        return counts
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length float32 vector for a text, or None if it has no terms"""
+        counts = self._features(text)
+        if not counts:
+            return None
+        buckets = np.fromiter(map(self._bucket, counts), dtype=np.int64, count=len(counts))
+        # Sublinear term frequency: a word repeated ten times is not ten times the evidence
+        weights = np.fromiter(
+            ((1.0 + math.log(count)) * self._prior(term) for term, count in counts.items()),
+            dtype=np.float32,
+            count=len(counts)
+        )
+        # Colliding buckets simply add up
+        vector = weights @ self.projection[buckets]
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def embed_batch(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.embed(text) for text in texts]
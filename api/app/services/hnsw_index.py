@@ -0,0 +1,412 @@
+import heapq
+import json
+import math
+import os
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HNSWIndex:
+    """Approximate nearest-neighbour index (Hierarchical Navigable Small World graph)
+
+    Pure NumPy/Python implementation with the same interface as VectorIndex.
+    Deletes are tombstones that keep the graph navigable; the graph is rebuilt
+    from live vectors once tombstones outnumber live nodes.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 42
+    ):
+        self.dimension = dimension
+        self.m = m
+        self.max_links_level0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self.loaded = False
+        self.watermark: Optional[str] = None
+        self._level_multiplier = 1 / math.log(max(m, 2))
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._rng = np.random.default_rng(self.seed)
+        self._vectors = np.zeros((1024, self.dimension), dtype=np.float32)
+        self._labels = np.zeros(1024, dtype=np.int64)
+        self._levels: List[int] = []
+        self._links: List[List[List[int]]] = []
+        self._deleted: Set[int] = set()
+        self._nodes: Dict[int, int] = {}
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+        self.changes_since_save = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._nodes
+
+    def ids(self) -> Set[int]:
+        """Return the set of live ids"""
+        with self._lock:
+            return set(self._nodes)
+
+    def _normalize(self, vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if array.shape[0] != self.dimension:
+            raise ValueError(f"Expected a {self.dimension}-dim vector, got {array.shape[0]}")
+        norm = np.linalg.norm(array)
+        if norm == 0:
+            return np.zeros(self.dimension, dtype=np.float32)
+        return array / norm
+
+    def _distances(self, query: np.ndarray, nodes: List[int]) -> np.ndarray:
+        """Cosine distance between a unit query and stored unit vectors"""
+        return 1.0 - self._vectors[nodes] @ query
+
+    def _random_level(self) -> int:
+        return int(-math.log(1.0 - self._rng.random()) * self._level_multiplier)
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """Greedy best-first search on one layer, returning up to ef (distance, node) pairs"""
+        visited = set(entry_points)
+        entry_distances = self._distances(query, entry_points)
+        candidates = [(float(d), node) for d, node in zip(entry_distances, entry_points)]
+        heapq.heapify(candidates)
+        results = [(-d, node) for d, node in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, node = heapq.heappop(candidates)
+            if distance > -results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in self._links[node][level] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for neighbor, neighbor_distance in zip(neighbors, self._distances(query, neighbors)):
+                neighbor_distance = float(neighbor_distance)
+                if len(results) < ef or neighbor_distance < -results[0][0]:
+                    heapq.heappush(candidates, (neighbor_distance, neighbor))
+                    heapq.heappush(results, (-neighbor_distance, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-d, node) for d, node in results)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], max_links: int) -> List[int]:
+        """Neighbour selection heuristic that favours diverse directions"""
+        if len(candidates) <= max_links:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        vectors = self._vectors[nodes]
+        similarity = vectors @ vectors.T
+        # Highest similarity between each candidate and anything already selected
+        closest_selected = np.full(len(nodes), -np.inf, dtype=np.float32)
+
+        selected: List[int] = []
+        pruned: List[int] = []
+        for position, (distance, node) in enumerate(candidates):
+            if len(selected) >= max_links:
+                break
+            if 1.0 - closest_selected[position] < distance:
+                pruned.append(node)
+                continue
+            selected.append(node)
+            np.maximum(closest_selected, similarity[position], out=closest_selected)
+
+        # Keep pruned connections so sparse regions stay reachable
+        for node in pruned:
+            if len(selected) >= max_links:
+                break
+            selected.append(node)
+        return selected
+
+    def _insert(self, item_id: int, vector: np.ndarray):
+        node = len(self._levels)
+        if node >= self._vectors.shape[0]:
+            capacity = self._vectors.shape[0] * 2
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            vectors[:node] = self._vectors[:node]
+            labels = np.zeros(capacity, dtype=np.int64)
+            labels[:node] = self._labels[:node]
+            self._vectors = vectors
+            self._labels = labels
+        self._vectors[node] = vector
+        self._labels[node] = item_id
+
+        level = self._random_level()
+        self._levels.append(level)
+        self._links.append([[] for _ in range(level + 1)])
+        self._nodes[item_id] = node
+
+        if self._entry_point is None:
+            self._entry_point = node
+            self._max_level = level
+            return
+
+        entry_points = [self._entry_point]
+        for current_level in range(self._max_level, level, -1):
+            entry_points = [self._search_layer(vector, entry_points, 1, current_level)[0][1]]
+
+        for current_level in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(vector, entry_points, self.ef_construction, current_level)
+            max_links = self.max_links_level0 if current_level == 0 else self.m
+            neighbors = self._select_neighbors(candidates, self.m)
+            self._links[node][current_level] = neighbors
+
+            for neighbor in neighbors:
+                neighbor_links = self._links[neighbor][current_level]
+                neighbor_links.append(node)
+                if len(neighbor_links) > max_links:
+                    # Overflowing neighbour lists simply drop their farthest link
+                    distances = self._distances(self._vectors[neighbor], neighbor_links)
+                    keep = np.argpartition(distances, max_links - 1)[:max_links]
+                    self._links[neighbor][current_level] = [neighbor_links[i] for i in keep]
+
+            entry_points = [n for _, n in candidates]
+
+        if level > self._max_level:
+            self._entry_point = node
+            self._max_level = level
+
+    def clear(self):
+        """Drop the whole graph and mark the index as not loaded"""
+        with self._lock:
+            self._reset()
+            self.watermark = None
+            self.loaded = False
+
+    def build(self, ids: Iterable[int], vectors: Iterable):
+        """Replace the index contents with the given ids and vectors"""
+        ids = list(ids)
+        vectors = list(vectors)
+        with self._lock:
+            self._reset()
+            for item_id, vector in zip(ids, vectors):
+                self._insert(int(item_id), self._normalize(vector))
+            self.loaded = True
+            self.changes_since_save = len(ids)
+
+    def add(self, item_id: int, vector):
+        """Insert or replace the vector stored for an id"""
+        normalized = self._normalize(vector)
+        with self._lock:
+            old_node = self._nodes.pop(int(item_id), None)
+            if old_node is not None:
+                self._deleted.add(old_node)
+            self._insert(int(item_id), normalized)
+            self.changes_since_save += 1
+            self._maybe_compact()
+
+    def remove(self, item_id: int) -> bool:
+        """Tombstone an id; its node keeps routing searches until compaction"""
+        with self._lock:
+            node = self._nodes.pop(int(item_id), None)
+            if node is None:
+                return False
+            self._deleted.add(node)
+            self.changes_since_save += 1
+            self._maybe_compact()
+            return True
+
+    def _maybe_compact(self):
+        if len(self._deleted) > max(len(self._nodes), 1024):
+            self.compact()
+
+    def compact(self):
+        """Rebuild the graph from live vectors, discarding tombstones"""
+        with self._lock:
+            live = sorted(self._nodes.items(), key=lambda item: item[1])
+            ids = [item_id for item_id, _ in live]
+            vectors = [self._vectors[node].copy() for _, node in live]
+            loaded = self.loaded
+            self.build(ids, vectors)
+            self.loaded = loaded
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        """Return a copy of the normalized vector stored for an id"""
+        with self._lock:
+            node = self._nodes.get(int(item_id))
+            if node is None:
+                return None
+            return self._vectors[node].copy()
+
+    def search(
+        self,
+        query,
+        k: int,
+        exclude_ids: Iterable[int] = (),
+        min_score: Optional[float] = None,
+        ef: Optional[int] = None,
+        exact: bool = False,
+        candidates: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first
+
+        ef widens the candidate list (higher recall, more latency);
+        exact=True scans every live vector instead of walking the graph.
+        candidates restricts the search to those ids, scanned exactly (a
+        filtered graph walk loses recall when the filter is selective).
+        """
+        if k <= 0:
+            return []
+        query_vector = self._normalize(query)
+        excluded = {int(item_id) for item_id in exclude_ids}
+
+        with self._lock:
+            if not self._nodes:
+                return []
+            if exact or candidates is not None:
+                return self._exact_search(query_vector, k, excluded, min_score, candidates)
+
+            # Tombstones still take slots in the candidate list, so widen ef
+            # until k live results are found or the whole graph was walked
+            ef = max(ef or self.ef_search, k + len(excluded))
+            entry_points = [self._entry_point]
+            for level in range(self._max_level, 0, -1):
+                entry_points = [self._search_layer(query_vector, entry_points, 1, level)[0][1]]
+            while True:
+                candidates = self._search_layer(query_vector, entry_points, ef, 0)
+                results, complete = self._live_results(candidates, k, excluded, min_score)
+                if complete or len(candidates) < ef or ef >= len(self._levels):
+                    return results
+                ef = min(ef * 2, len(self._levels))
+
+    def _live_results(self, candidates: List[Tuple[float, int]], k: int, excluded: Set[int],
+                      min_score: Optional[float]) -> Tuple[List[Tuple[int, float]], bool]:
+        """Up to k live (id, score) pairs from sorted candidates, and whether no wider search could add more"""
+        results = []
+        for distance, node in candidates:
+            if node in self._deleted:
+                continue
+            item_id = int(self._labels[node])
+            if item_id in excluded:
+                continue
+            score = 1.0 - distance
+            if min_score is not None and score < min_score:
+                return results, True
+            results.append((item_id, score))
+            if len(results) >= k:
+                return results, True
+        return results, False
+
+    def _exact_search(self, query: np.ndarray, k: int, excluded: Set[int], min_score: Optional[float],
+                      candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """Brute-force scan over live nodes (or just the candidate ids)"""
+        if candidates is None:
+            live = [(item_id, node) for item_id, node in self._nodes.items() if item_id not in excluded]
+        else:
+            live = [
+                (item_id, self._nodes[item_id])
+                for item_id in (int(item_id) for item_id in candidates)
+                if item_id in self._nodes and item_id not in excluded
+            ]
+        if not live:
+            return []
+        nodes = np.array([node for _, node in live], dtype=np.int64)
+        scores = self._vectors[nodes] @ query
+        if min_score is not None:
+            keep = np.flatnonzero(scores >= min_score)
+        else:
+            keep = np.arange(scores.shape[0])
+        if keep.size > k:
+            keep = keep[np.argpartition(-scores[keep], k - 1)[:k]]
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+        return [(live[i][0], float(scores[i])) for i in keep]
+
+    def save(self, path: str):
+        """Write the graph to disk atomically (temp file + rename)"""
+        with self._lock:
+            count = len(self._levels)
+            link_counts = []
+            link_data = []
+            for node_links in self._links:
+                for level_links in node_links:
+                    link_counts.append(len(level_links))
+                    link_data.extend(level_links)
+            meta = {
+                "dimension": self.dimension,
+                "m": self.m,
+                "ef_construction": self.ef_construction,
+                "entry_point": self._entry_point,
+                "max_level": self._max_level,
+                "watermark": self.watermark
+            }
+            arrays = {
+                "vectors": self._vectors[:count],
+                "labels": self._labels[:count],
+                "levels": np.asarray(self._levels, dtype=np.int32),
+                "link_counts": np.asarray(link_counts, dtype=np.int32),
+                "link_data": np.asarray(link_data, dtype=np.int64),
+                "deleted": np.asarray(sorted(self._deleted), dtype=np.int64),
+                "meta": np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            self.changes_since_save = 0
+        logger.info(f"Saved HNSW index with {len(self._nodes)} vectors to {path}")
+
+    def load(self, path: str) -> bool:
+        """Restore a graph written by save(); returns False if absent or mismatched"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                meta = json.loads(bytes(data["meta"]).decode())
+                if meta["dimension"] != self.dimension or meta["m"] != self.m:
+                    logger.warning(f"Ignoring HNSW snapshot {path}: built with different parameters")
+                    return False
+                vectors = data["vectors"]
+                labels = data["labels"]
+                levels = data["levels"].tolist()
+                link_counts = data["link_counts"].tolist()
+                link_data = data["link_data"].tolist()
+                deleted = set(data["deleted"].tolist())
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load HNSW snapshot {path}: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            count = len(levels)
+            capacity = max(1024, count)
+            self._vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            self._vectors[:count] = vectors
+            self._labels = np.zeros(capacity, dtype=np.int64)
+            self._labels[:count] = labels
+            self._levels = levels
+
+            offset = 0
+            cursor = 0
+            for level in levels:
+                node_links = []
+                for _ in range(level + 1):
+                    size = link_counts[cursor]
+                    node_links.append(link_data[offset:offset + size])
+                    offset += size
+                    cursor += 1
+                self._links.append(node_links)
+
+            self._deleted = deleted
+            self._nodes = {int(labels[node]): node for node in range(count) if node not in deleted}
+            self._entry_point = meta["entry_point"]
+            self._max_level = meta["max_level"]
+            self.watermark = meta.get("watermark")
+            self.loaded = True
+        return True
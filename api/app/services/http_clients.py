@@ -0,0 +1,73 @@
+import os
+import threading
+from typing import Optional, Tuple
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HTTPClients:
+    """Long-lived pooled HTTP clients for the model backends
+
+    One keep-alive requests.Session serves every Ollama call (embeddings,
+    chat, document generation, model listing) and one httpx.Client backs the
+    OpenAI SDK, so repeated calls reuse open connections instead of paying a
+    TCP (and TLS) handshake each time. Both are created on first use and
+    closed on app shutdown; using them afterwards opens fresh pools.
+    """
+
+    def __init__(self):
+        # Connections kept open per host; should cover EMBEDDING_MAX_CONCURRENCY plus concurrent chats
+        self.pool_size = int(os.getenv("HTTP_POOL_SIZE", 10))
+        self.connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5.0))
+        # Read timeout for chat and document generation (embeddings set their own)
+        self.generation_timeout = float(os.getenv("HTTP_GENERATION_TIMEOUT", 300.0))
+        self._lock = threading.Lock()
+        self._ollama: Optional[requests.Session] = None
+        self._openai: Optional[httpx.Client] = None
+
+    def timeout(self, read: Optional[float] = None) -> Tuple[float, float]:
+        """(connect, read) timeout pair for requests"""
+        return (self.connect_timeout, self.generation_timeout if read is None else read)
+
+    @property
+    def ollama(self) -> requests.Session:
+        """Shared session for Ollama calls"""
+        with self._lock:
+            if self._ollama is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._ollama = session
+            return self._ollama
+
+    @property
+    def openai(self) -> httpx.Client:
+        """Shared httpx client to pass to the OpenAI SDK"""
+        with self._lock:
+            if self._openai is None or self._openai.is_closed:
+                self._openai = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size
+                    ),
+                    timeout=httpx.Timeout(self.generation_timeout, connect=self.connect_timeout)
+                )
+            return self._openai
+
+    def close(self):
+        """Close every pooled connection (app shutdown)"""
+        with self._lock:
+            if self._ollama is not None:
+                self._ollama.close()
+                self._ollama = None
+            if self._openai is not None:
+                self._openai.close()
+                self._openai = None
+        logger.info("Closed pooled HTTP clients")
+
+# Global instance
+http_clients = HTTPClients()
@@ -0,0 +1,288 @@
+import os
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Set
+import logging
+
+from app.services.vector_index import VectorIndex, STORAGE_DTYPES
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker deployments only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Int64 slots at the start of the id file
+HEADER_COUNTER = 0      # bumped on every write so other processes can refresh
+HEADER_DIMENSION = 1
+HEADER_ROWS = 2         # rows in use, including tombstones
+HEADER_STORAGE = 3      # position of the storage dtype in STORAGE_DTYPES
+HEADER_WATERMARK = 4    # latest embedding update applied, microseconds since epoch (0 = none)
+HEADER_SIZE = 8
+
+EMPTY_ROW = -1
+
+class MappedVectorIndex(VectorIndex):
+    """VectorIndex whose matrix lives in memory-mapped files shared by all workers
+
+    <path>.vectors holds the rows and <path>.ids holds a small header followed
+    by the id of each row. Opening an existing index maps both files; only the
+    id column is scanned to rebuild the id -> row map. Writers append or patch
+    rows in place under an exclusive file lock (readers take it shared),
+    removed rows become tombstones that later inserts reuse, and every write
+    bumps a header counter so other processes know to refresh their id map.
+    A rebuild writes new files and renames them into place, so mapped files
+    are never truncated under a reader.
+    """
+
+    def __init__(self, path: str, dimension: int = 384, initial_capacity: int = 1024, storage: str = "float32"):
+        self.path = path
+        self._ids_map = None
+        self._file_ids = None  # (device, inode) of the mapped files
+        self._seen_counter = -1
+        self._free_rows: List[int] = []
+        self.changes_since_save = 0
+        super().__init__(dimension, initial_capacity, storage)
+
+    @property
+    def _ids_path(self) -> str:
+        return f"{self.path}.ids"
+
+    @property
+    def _vectors_path(self) -> str:
+        return f"{self.path}.vectors"
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        """Lock shared by every process using this index: exclusive to write, shared to read"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_files(self, ids: np.ndarray, rows: np.ndarray, capacity: int):
+        """Write complete files for these rows next to the live ones and rename them into place"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        old_header = None
+        if os.path.exists(self._ids_path) and os.path.getsize(self._ids_path) >= HEADER_SIZE * 8:
+            old_header = np.memmap(self._ids_path, dtype=np.int64, mode="r+", shape=(HEADER_SIZE,))
+
+        header = np.full(HEADER_SIZE + capacity, EMPTY_ROW, dtype=np.int64)
+        header[:HEADER_SIZE] = 0
+        header[HEADER_COUNTER] = int(old_header[HEADER_COUNTER]) + 1 if old_header is not None else 0
+        header[HEADER_DIMENSION] = self.dimension
+        header[HEADER_ROWS] = ids.shape[0]
+        header[HEADER_STORAGE] = list(STORAGE_DTYPES).index(self.storage)
+        header[HEADER_SIZE:HEADER_SIZE + ids.shape[0]] = ids
+        header.tofile(f"{self._ids_path}.tmp")
+        with open(f"{self._vectors_path}.tmp", "wb") as f:
+            rows.tofile(f)
+            f.truncate(capacity * self.dimension * np.dtype(self._dtype).itemsize)
+
+        os.replace(f"{self._vectors_path}.tmp", self._vectors_path)
+        os.replace(f"{self._ids_path}.tmp", self._ids_path)
+        if old_header is not None:
+            # Workers still mapping the old files see their counter move, then remap by file identity
+            old_header[HEADER_COUNTER] += 1
+            old_header.flush()
+
+    def _identity(self):
+        return tuple((stat.st_dev, stat.st_ino) for stat in map(os.stat, (self._ids_path, self._vectors_path)))
+
+    def _map_files(self):
+        """Map both files at their current size"""
+        self._file_ids = self._identity()
+        capacity = os.path.getsize(self._ids_path) // 8 - HEADER_SIZE
+        self._ids_map = np.memmap(self._ids_path, dtype=np.int64, mode="r+")
+        self._ids = self._ids_map[HEADER_SIZE:]
+        self._matrix = np.memmap(self._vectors_path, dtype=self._dtype, mode="r+", shape=(capacity, self.dimension))
+
+    def _refresh(self, force: bool = False):
+        """Pick up rows written by other processes since the last look"""
+        if self._ids_map is None:
+            return
+        counter = int(self._ids_map[HEADER_COUNTER])
+        if counter == self._seen_counter and not force:
+            return
+        try:
+            rebuilt = self._identity() != self._file_ids
+        except OSError:
+            rebuilt = False  # Files deleted: keep serving the mapped copy
+        if rebuilt or os.path.getsize(self._ids_path) // 8 - HEADER_SIZE != self._ids.shape[0]:
+            self._map_files()
+            counter = int(self._ids_map[HEADER_COUNTER])
+        self._size = int(self._ids_map[HEADER_ROWS])
+        ids = self._ids[:self._size]
+        live_rows = np.flatnonzero(ids != EMPTY_ROW)
+        self._positions = dict(zip(ids[live_rows].tolist(), live_rows.tolist()))
+        self._free_rows = np.flatnonzero(ids == EMPTY_ROW).tolist()
+        self._sorted_ids = None
+        self._seen_counter = counter
+
+    def _bump(self):
+        self._ids_map[HEADER_ROWS] = self._size
+        self._ids_map[HEADER_COUNTER] += 1
+        self._seen_counter = int(self._ids_map[HEADER_COUNTER])
+        self.changes_since_save += 1
+
+    def __len__(self) -> int:
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            return len(self._positions)
+
+    def __contains__(self, item_id: int) -> bool:
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            return item_id in self._positions
+
+    def ids(self) -> Set[int]:
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            return set(self._positions)
+
+    @property
+    def watermark(self) -> Optional[str]:
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            if self._ids_map is None or not self._ids_map[HEADER_WATERMARK]:
+                return None
+            micros = int(self._ids_map[HEADER_WATERMARK])
+        return datetime.fromtimestamp(micros / 1_000_000, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+    @watermark.setter
+    def watermark(self, value: Optional[str]):
+        if self._ids_map is None:
+            return
+        micros = 0
+        if value:
+            parsed = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+            micros = int(parsed.timestamp() * 1_000_000)
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._ids_map is not None:
+                self._ids_map[HEADER_WATERMARK] = micros
+
+    def _grow(self, minimum_capacity: int):
+        """Extend both files in place and remap them"""
+        capacity = self._matrix.shape[0]
+        if minimum_capacity <= capacity:
+            return
+        new_capacity = max(minimum_capacity, capacity * 2)
+        self._matrix.flush()
+        self._ids_map.flush()
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(new_capacity * self.dimension * np.dtype(self._dtype).itemsize)
+        with open(self._ids_path, "r+b") as f:
+            f.seek((HEADER_SIZE + capacity) * 8)
+            np.full(new_capacity - capacity, EMPTY_ROW, dtype=np.int64).tofile(f)
+        self._map_files()
+
+    def clear(self):
+        """Unmap the files (they stay on disk) and mark the index as not loaded"""
+        with self._lock:
+            self._ids_map = None
+            self._file_ids = None
+            self._seen_counter = -1
+            self._free_rows = []
+            self._positions = {}
+            self._size = 0
+            self._sorted_ids = None
+            self._matrix = np.zeros((0, self.dimension), dtype=self._dtype)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self.changes_since_save = 0
+            self.loaded = False
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Map an existing index without reading its vectors; False if absent or incompatible"""
+        if path:
+            self.path = path
+        if not (os.path.exists(self._ids_path) and os.path.exists(self._vectors_path)):
+            return False
+        header = np.fromfile(self._ids_path, dtype=np.int64, count=HEADER_SIZE)
+        if header.shape[0] < HEADER_SIZE or header[HEADER_DIMENSION] != self.dimension \
+                or header[HEADER_STORAGE] != list(STORAGE_DTYPES).index(self.storage):
+            logger.warning(f"Ignoring mapped index {self.path}: built with different parameters")
+            return False
+        with self._lock, self._file_lock(shared=True):
+            self._map_files()
+            self._refresh(force=True)
+            self.loaded = True
+        return True
+
+    def build(self, ids: Iterable[int], vectors: Iterable):
+        """Replace the files with new ones holding the given ids and vectors"""
+        ids, matrix = self._prepare(ids, vectors)
+        rows = np.ascontiguousarray(self._encode(matrix))
+        with self._lock, self._file_lock():
+            self._write_files(ids, rows, max(self._initial_capacity, ids.shape[0]))
+            self._map_files()
+            self._refresh(force=True)
+            self.changes_since_save += 1
+            self.loaded = True
+
+    def save(self, path: Optional[str] = None):
+        """Flush dirty pages; rows are already written in place"""
+        with self._lock:
+            if self._ids_map is not None:
+                self._matrix.flush()
+                self._ids_map.flush()
+            self.changes_since_save = 0
+
+    def add(self, item_id: int, vector):
+        """Patch the row for an existing id, or fill a free row / append"""
+        normalized = self._encode(self._normalize(vector))
+        with self._lock, self._file_lock():
+            self._refresh()
+            item_id = int(item_id)
+            position = self._positions.get(item_id)
+            if position is None:
+                if self._free_rows:
+                    position = self._free_rows.pop()
+                else:
+                    self._grow(self._size + 1)
+                    position = self._size
+                    self._size += 1
+                self._positions[item_id] = position
+            self._matrix[position] = normalized
+            self._ids[position] = item_id
+            self._sorted_ids = None
+            self._bump()
+
+    def remove(self, item_id: int) -> bool:
+        """Tombstone the row so other processes' row numbers stay valid"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            position = self._positions.pop(int(item_id), None)
+            if position is None:
+                return False
+            self._ids[position] = EMPTY_ROW
+            self._matrix[position] = 0
+            self._free_rows.append(position)
+            self._sorted_ids = None
+            self._bump()
+            return True
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            return super().get(item_id)
+
+    def search(self, query, k: int, exclude_ids: Iterable[int] = (), min_score: Optional[float] = None,
+               ef: Optional[int] = None, exact: bool = True, candidates: Optional[Iterable[int]] = None):
+        with self._lock, self._file_lock(shared=True):
+            self._refresh()
+            return super().search(query, k, exclude_ids, min_score, candidates=candidates)
+
+    def _mask_scores(self, scores: np.ndarray, exclude_ids: Iterable[int]):
+        """Tombstoned rows score -inf, same as excluded ids"""
+        if self._free_rows:
+            scores[self._free_rows] = -np.inf
+        super()._mask_scores(scores, exclude_ids)
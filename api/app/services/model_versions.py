@@ -0,0 +1,210 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.idea import Idea, Embedding, EmbeddingModel, IdeaNeighbor
+from app.services.chunk_service import chunk_service
+from app.services.embedding_service import embedding_service, MODEL_ACTIVE, MODEL_BUILDING, MODEL_RETIRED
+from app.services.neighbor_service import neighbor_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows deleted per transaction when garbage-collecting a retired model
+GC_BATCH_SIZE = 1000
+
+# Bulk passes over missing ideas before a build stops (POST the model again to resume)
+MAX_BUILD_PASSES = 3
+
+class ModelBuildConflict(Exception):
+    """Another model is already being built"""
+
+class ModelVersionService:
+    """Switch embedding models without serving mixed-model results
+
+    A new model is registered as building: every idea is embedded with it in
+    the background (and every write embeds for it too) while queries keep
+    using the active model. Once every idea has a vector (and every document
+    its chunks), one transaction makes it active, after which the old model's
+    rows are deleted.
+    """
+
+    def __init__(self):
+        self.session_factory = SessionLocal
+        self._lock = threading.Lock()
+        self._running: Optional[str] = None  # Model this process is building
+
+    def _registry(self, db: Session) -> Dict[str, EmbeddingModel]:
+        return {row.name: row for row in db.query(EmbeddingModel).all()}
+
+    def _ensure_active(self, db: Session, registry: Dict[str, EmbeddingModel]):
+        """Record the model that has been serving so far, for databases that never switched"""
+        if not any(row.status == MODEL_ACTIVE for row in registry.values()):
+            now = datetime.utcnow()
+            db.add(EmbeddingModel(
+                name=embedding_service.model_name,
+                dimension=embedding_service.embedding_dimension,
+                status=MODEL_ACTIVE,
+                created_at=now,
+                activated_at=now
+            ))
+
+    def coverage(self, db: Session, model: str) -> dict:
+        """How many ideas have a vector from this model"""
+        total = db.query(func.count(Idea.id)).scalar()
+        embedded = db.query(func.count(Embedding.idea_id)).join(Idea, Idea.id == Embedding.idea_id).filter(
+            Embedding.model == model
+        ).scalar()
+        return {
+            "embedded": embedded,
+            "total": total,
+            "missing": total - embedded,
+            "percent": round(100.0 * embedded / total, 1) if total else 100.0
+        }
+
+    def status(self, db: Session) -> dict:
+        embedding_service.sync_models(db)
+        models = []
+        for row in sorted(self._registry(db).values(), key=lambda row: row.created_at):
+            entry = {
+                "name": row.name,
+                "dimension": row.dimension,
+                "status": row.status,
+                "created_at": row.created_at.isoformat(),
+                "activated_at": row.activated_at.isoformat() if row.activated_at else None,
+                "retired_at": row.retired_at.isoformat() if row.retired_at else None
+            }
+            if row.status == MODEL_BUILDING:
+                entry["coverage"] = self.coverage(db, row.name)
+                entry["running"] = self._running == row.name
+            elif row.status == MODEL_RETIRED:
+                entry["remaining_rows"] = db.query(func.count(Embedding.idea_id)).filter(Embedding.model == row.name).scalar()
+            models.append(entry)
+        return {"active_model": embedding_service.model_name, "models": models}
+
+    def start(self, db: Session, model: str, dimension: Optional[int] = None) -> Optional[dict]:
+        """Register a model for a shadow build; None if the model server can't embed with it
+
+        Starting the model that is already building resumes it. The caller runs
+        build(model) in the background.
+        """
+        embedding_service.sync_models(db)
+        if model == embedding_service.model_name:
+            raise ValueError(f"{model} is already the active embedding model")
+        registry = self._registry(db)
+        building = next((row for row in registry.values() if row.status == MODEL_BUILDING), None)
+        if building and building.name != model:
+            raise ModelBuildConflict(f"{building.name} is already being built")
+
+        # Probe the model: it must be pulled, and its output size fixes the dimension
+        probe = embedding_service.generate_embedding("dimension probe", model)
+        if not probe:
+            return None
+        if dimension and dimension != len(probe):
+            raise ValueError(f"{model} produces {len(probe)}-dimensional vectors, not {dimension}")
+
+        self._ensure_active(db, registry)
+        row = registry.get(model)
+        if row is None:
+            row = EmbeddingModel(name=model, created_at=datetime.utcnow())
+            db.add(row)
+        row.dimension = len(probe)
+        row.status = MODEL_BUILDING
+        row.retired_at = None
+        db.commit()
+        embedding_service.sync_models(db)
+        logger.info(f"Started shadow build of embedding model {model}")
+        return self.status(db)
+
+    def _is_building(self, db: Session, model: str) -> bool:
+        row = db.query(EmbeddingModel).filter(EmbeddingModel.name == model).first()
+        return row is not None and row.status == MODEL_BUILDING
+
+    def build(self, model: str):
+        """Embed every idea with the building model, then cut over and clean up"""
+        with self._lock:
+            if self._running:
+                return  # Already running in this process (a resume request)
+            self._running = model
+        db = self.session_factory()
+        try:
+            for _ in range(MAX_BUILD_PASSES):
+                if not self._is_building(db, model):
+                    return  # Cancelled
+                result = embedding_service.update_all_embeddings(db, model=model)
+                chunks = chunk_service.update_all(db, model=model)
+                if not chunks["failed_documents"] and self.cutover(db, model):
+                    self.collect_garbage(db)
+                    return
+                # No progress this pass: the model server is failing
+                if not result.get("successful_updates") and chunks["failed_documents"] == chunks["documents"]:
+                    break
+            logger.warning(f"Shadow build of {model} stopped at {self.coverage(db, model)['percent']}% coverage")
+        except Exception as e:
+            logger.error(f"Shadow build of {model} failed: {e}")
+        finally:
+            with self._lock:
+                self._running = None
+            db.close()
+
+    def cutover(self, db: Session, model: str) -> bool:
+        """Atomically make a fully covered building model the active one"""
+        if not self._is_building(db, model) or self.coverage(db, model)["missing"]:
+            return False
+        now = datetime.utcnow()
+        db.query(EmbeddingModel).filter(EmbeddingModel.status == MODEL_ACTIVE).update(
+            {"status": MODEL_RETIRED, "retired_at": now}, synchronize_session=False
+        )
+        db.query(EmbeddingModel).filter(EmbeddingModel.name == model).update(
+            {"status": MODEL_ACTIVE, "activated_at": now}, synchronize_session=False
+        )
+        # Related-idea lists were ranked by the old model
+        db.query(IdeaNeighbor).delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"Embedding model {model} is now active")
+
+        embedding_service.sync_models(db)
+        neighbor_service.rebuild(db)
+        return True
+
+    def cancel(self, db: Session, model: str) -> bool:
+        """Abandon a shadow build; its partial rows are garbage-collected"""
+        row = db.query(EmbeddingModel).filter(EmbeddingModel.name == model).first()
+        if row is None or row.status != MODEL_BUILDING:
+            return False
+        row.status = MODEL_RETIRED
+        row.retired_at = datetime.utcnow()
+        db.commit()
+        embedding_service.sync_models(db)
+        self.collect_garbage(db)
+        return True
+
+    def collect_garbage(self, db: Session) -> int:
+        """Delete retired models' embeddings in short transactions; returns rows deleted"""
+        deleted = 0
+        for (model,) in db.query(EmbeddingModel.name).filter(EmbeddingModel.status == MODEL_RETIRED).all():
+            while True:
+                idea_ids = [
+                    idea_id for (idea_id,) in
+                    db.query(Embedding.idea_id).filter(Embedding.model == model).limit(GC_BATCH_SIZE)
+                ]
+                if not idea_ids:
+                    break
+                db.query(Embedding).filter(
+                    Embedding.model == model,
+                    Embedding.idea_id.in_(idea_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+                deleted += len(idea_ids)
+            deleted += chunk_service.collect_garbage(db, model, GC_BATCH_SIZE)
+            db.query(EmbeddingModel).filter(EmbeddingModel.name == model).delete(synchronize_session=False)
+            db.commit()
+            embedding_service.remove_index_files(model)
+            embedding_service.vector_cache.clear(model)
+            logger.info(f"Removed retired embedding model {model}")
+        return deleted
+
+# Global instance
+model_versions = ModelVersionService()
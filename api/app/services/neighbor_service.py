@@ -0,0 +1,252 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert, or_
+from sqlalchemy.orm import Session
+from app.models.idea import Idea, IdeaNeighbor
+from app.services.embedding_service import embedding_service, OllamaEmbeddingService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per step by the brute-force consistency check
+CHECK_BLOCK_ROWS = 1024
+
+# Stored and recomputed scores may differ by float32 rounding
+SCORE_TOLERANCE = 1e-4
+
+# Owners per IN (...) when reading list statistics
+STATS_CHUNK = 500
+
+NeighborList = List[Tuple[int, float]]
+
+class NeighborService:
+    """Top-k similar ideas for every idea, precomputed in the idea_neighbors table
+
+    Related-idea lookups become one indexed read. When an idea's embedding
+    changes, only its own list and the lists it enters or leaves are rewritten.
+    Lists are filled lazily on first read for ideas embedded before the table
+    existed (or rebuilt all at once with rebuild()).
+    """
+
+    def __init__(self, embeddings: OllamaEmbeddingService, k: int = 20):
+        self.embeddings = embeddings
+        self.k = k
+
+    def _compute_list(self, db: Session, idea_id: int, exclude_ids: Tuple[int, ...] = ()) -> Optional[NeighborList]:
+        """Exact top-k for one idea from the similarity index; None without a vector"""
+        self.embeddings.load_index(db)
+        vector = self.embeddings._get_target_vector(db, idea_id)
+        if vector is None:
+            return None
+        return self.embeddings.search_vectors(db, vector, self.k, exclude_ids=[idea_id, *exclude_ids], exact=True)
+
+    def _read_lists(self, db: Session, idea_ids: List[int]) -> Dict[int, NeighborList]:
+        lists: Dict[int, NeighborList] = {idea_id: [] for idea_id in idea_ids}
+        if not idea_ids:
+            return lists
+        rows = db.query(IdeaNeighbor).filter(IdeaNeighbor.idea_id.in_(idea_ids)).order_by(
+            IdeaNeighbor.idea_id, IdeaNeighbor.rank
+        )
+        for row in rows:
+            lists[row.idea_id].append((row.neighbor_id, row.score))
+        return lists
+
+    def _write_lists(self, db: Session, lists: Dict[int, NeighborList]):
+        """Replace the stored lists of the given ideas (caller commits)"""
+        if not lists:
+            return
+        db.query(IdeaNeighbor).filter(IdeaNeighbor.idea_id.in_(list(lists))).delete(synchronize_session=False)
+        rows = [
+            {"idea_id": idea_id, "neighbor_id": neighbor_id, "score": float(score), "rank": rank}
+            for idea_id, neighbors in lists.items()
+            for rank, (neighbor_id, score) in enumerate(neighbors)
+        ]
+        if rows:
+            db.execute(insert(IdeaNeighbor), rows)
+
+    def refresh_idea(self, db: Session, idea_id: int) -> bool:
+        """Recompute one idea's own list; False if it has no embedding"""
+        neighbors = self._compute_list(db, idea_id)
+        if neighbors is None:
+            return False
+        self._write_lists(db, {idea_id: neighbors})
+        db.commit()
+        return True
+
+    def update_idea(self, db: Session, idea_id: int):
+        """Apply a new or changed embedding to its own list and to every list it affects"""
+        try:
+            index = self.embeddings.load_index(db)
+            vector = self.embeddings._get_target_vector(db, idea_id)
+            if vector is None:
+                return
+
+            others = len(index) - 1
+            holders = {
+                owner for (owner,) in db.query(IdeaNeighbor.idea_id).filter(IdeaNeighbor.neighbor_id == idea_id)
+            }
+
+            # Once more than k other ideas are embedded every stored list is full, and the idea
+            # can only enter lists whose cut-off (last-rank score) is below its similarity to
+            # their owner: score just the ideas above the lowest cut-off
+            floor = None
+            if others > self.k:
+                floor = db.query(func.min(IdeaNeighbor.score)).filter(IdeaNeighbor.rank == self.k - 1).scalar()
+            scores = {}
+            if floor is not None or db.query(IdeaNeighbor.idea_id).filter(IdeaNeighbor.idea_id != idea_id).first():
+                scores = dict(self.embeddings.search_vectors(
+                    db, vector, max(others, 1), exclude_ids=[idea_id], min_similarity=floor, exact=True
+                ))
+
+            # (count, lowest score) of the stored lists the idea may enter or leave
+            owners = sorted((set(scores) | holders) - {idea_id})
+            stats = {}
+            for start in range(0, len(owners), STATS_CHUNK):
+                stats.update(
+                    (owner, (count, lowest))
+                    for owner, count, lowest in db.query(
+                        IdeaNeighbor.idea_id, func.count(IdeaNeighbor.neighbor_id), func.min(IdeaNeighbor.score)
+                    ).filter(IdeaNeighbor.idea_id.in_(owners[start:start + STATS_CHUNK])).group_by(IdeaNeighbor.idea_id)
+                )
+
+            entering = []
+            recompute = []
+            for owner, (count, lowest) in stats.items():
+                score = scores.get(owner)
+                qualifies = score is not None and (count < self.k or score >= lowest)
+                if qualifies:
+                    entering.append(owner)
+                elif owner in holders:
+                    # Dropped below the old cut-off: whoever was k+1th may now belong
+                    recompute.append(owner)
+
+            lists = {idea_id: self.embeddings.search_vectors(db, vector, self.k, exclude_ids=[idea_id], exact=True)}
+            for owner, neighbors in self._read_lists(db, entering).items():
+                neighbors = [(other, score) for other, score in neighbors if other != idea_id]
+                neighbors.append((idea_id, scores[owner]))
+                neighbors.sort(key=lambda match: match[1], reverse=True)
+                lists[owner] = neighbors[:self.k]
+            for owner in recompute:
+                neighbors = self._compute_list(db, owner)
+                if neighbors is not None:
+                    lists[owner] = neighbors
+
+            self._write_lists(db, lists)
+            db.commit()
+            logger.info(f"Updated neighbor lists of idea {idea_id} and {len(lists) - 1} other ideas")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating neighbor lists for idea {idea_id}: {e}")
+
+    def remove_idea(self, db: Session, idea_id: int):
+        """Drop an idea's list and refill every list that contained it"""
+        try:
+            holders = [
+                owner for (owner,) in db.query(IdeaNeighbor.idea_id).filter(IdeaNeighbor.neighbor_id == idea_id)
+                if owner != idea_id
+            ]
+            db.query(IdeaNeighbor).filter(
+                or_(IdeaNeighbor.idea_id == idea_id, IdeaNeighbor.neighbor_id == idea_id)
+            ).delete(synchronize_session=False)
+
+            lists = {}
+            for owner in holders:
+                neighbors = self._compute_list(db, owner, exclude_ids=(idea_id,))
+                if neighbors is not None:
+                    lists[owner] = neighbors
+            self._write_lists(db, lists)
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error removing idea {idea_id} from neighbor lists: {e}")
+
+    def get_related(self, db: Session, idea_id: int, limit: int, min_similarity: float) -> Optional[List[dict]]:
+        """Related ideas from the stored list, or None when the idea has no embedding yet"""
+        query = db.query(IdeaNeighbor.score, Idea).join(Idea, Idea.id == IdeaNeighbor.neighbor_id).filter(
+            IdeaNeighbor.idea_id == idea_id
+        ).order_by(IdeaNeighbor.rank)
+        rows = query.all()
+        if not rows:
+            # Never computed, or no other idea has an embedding
+            if not self.refresh_idea(db, idea_id):
+                return None
+            rows = query.all()
+
+        return [
+            {
+                "idea_id": idea.id,
+                "similarity": score,
+                "title": idea.title,
+                "description": idea.description,
+                "category": idea.category,
+                "status": idea.status
+            }
+            for score, idea in rows if score >= min_similarity
+        ][:limit]
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every list from the similarity index"""
+        index = self.embeddings.load_index(db)
+        db.query(IdeaNeighbor).delete(synchronize_session=False)
+        lists = {}
+        for idea_id in sorted(index.ids()):
+            neighbors = self._compute_list(db, idea_id)
+            if neighbors is not None:
+                lists[idea_id] = neighbors
+        self._write_lists(db, lists)
+        db.commit()
+        logger.info(f"Rebuilt neighbor lists for {len(lists)} ideas")
+        return len(lists)
+
+    def check_consistency(self, db: Session) -> dict:
+        """Compare every stored list with a brute-force recompute from the embeddings table"""
+        self.embeddings.sync_models(db)
+        pairs = list(self.embeddings._read_vectors(self.embeddings.embeddings_query(db)))
+        ids = [idea_id for idea_id, _ in pairs]
+        matrix = np.vstack([vector for _, vector in pairs]) if pairs else np.zeros((0, self.embeddings.embedding_dimension))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = (matrix / norms).astype(np.float32)
+        positions = {idea_id: position for position, idea_id in enumerate(ids)}
+
+        stored = self._read_lists(db, [owner for (owner,) in db.query(IdeaNeighbor.idea_id).distinct()])
+        orphaned = sorted(owner for owner in stored if owner not in positions)
+        unfilled = []
+        mismatched = []
+
+        for start in range(0, len(ids), CHECK_BLOCK_ROWS):
+            block = matrix[start:start + CHECK_BLOCK_ROWS] @ matrix.T
+            for offset, scores in enumerate(block):
+                position = start + offset
+                idea_id = ids[position]
+                actual = stored.get(idea_id)
+                if actual is None:
+                    unfilled.append(idea_id)
+                    continue
+
+                scores[position] = -np.inf
+                expected = np.sort(scores)[::-1][:min(self.k, len(ids) - 1)]
+                actual_scores = np.array([score for _, score in actual], dtype=np.float32)
+                # Compare score profiles (robust to ties) and each stored pair's true similarity
+                consistent = actual_scores.shape == expected.shape and np.allclose(
+                    actual_scores, expected, atol=SCORE_TOLERANCE
+                ) and all(
+                    neighbor_id in positions and abs(scores[positions[neighbor_id]] - score) <= SCORE_TOLERANCE
+                    for neighbor_id, score in actual
+                )
+                if not consistent:
+                    mismatched.append(idea_id)
+
+        return {
+            "consistent": not mismatched and not orphaned,
+            "checked": len(ids) - len(unfilled),
+            "unfilled": unfilled,
+            "mismatched": mismatched,
+            "orphaned": orphaned
+        }
+
+# Global instance
+neighbor_service = NeighborService(embedding_service, k=int(os.getenv("NEIGHBOR_TABLE_K", 20)))
@@ -0,0 +1,232 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.idea import Idea, EmbeddingRefreshJob
+from app.services.embedding_service import embedding_service
+from app.services.neighbor_service import neighbor_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNING = "running"
+JOB_PAUSED = "paused"
+JOB_CANCELLED = "cancelled"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+class RefreshJobConflict(Exception):
+    """Another bulk re-embed is already running or paused"""
+
+class RefreshJobService:
+    """Bulk re-embedding as a resumable background job
+
+    Ideas are processed in id order, chunk_size at a time. After each chunk
+    the job row records the last idea id done (the checkpoint), the counters
+    and a heartbeat, so a paused, crashed or restarted job resumes where it
+    stopped. Pause and cancel are written to the row and honoured at the
+    next checkpoint, so they work from any worker process.
+    """
+
+    def __init__(self):
+        self.session_factory = SessionLocal
+        self.chunk_size = int(os.getenv("EMBEDDING_REFRESH_CHUNK_SIZE", "256"))
+        # A running job without a checkpoint for this long is taken to have died
+        self.stale_after = timedelta(seconds=float(os.getenv("EMBEDDING_REFRESH_STALE_SECONDS", "120")))
+
+    def _is_stale(self, job: EmbeddingRefreshJob) -> bool:
+        return job.status == JOB_RUNNING and datetime.utcnow() - job.heartbeat_at > self.stale_after
+
+    def describe(self, job: EmbeddingRefreshJob) -> dict:
+        """Progress, throughput and ETA of a job"""
+        rate = job.processed / job.active_seconds if job.active_seconds else None
+        remaining = max(job.total - job.processed, 0)
+        return {
+            "id": job.id,
+            "status": job.status,
+            "model": job.model,
+            "force": job.force,
+            "checkpoint": job.last_idea_id,
+            "total": job.total,
+            "processed": job.processed,
+            "embedded": job.embedded,
+            "skipped": job.skipped,
+            "failed": job.failed,
+            "percent": round(100.0 * job.processed / job.total, 1) if job.total else 100.0,
+            "ideas_per_second": round(rate, 1) if rate else None,
+            "eta_seconds": round(remaining / rate, 1) if rate and job.status == JOB_RUNNING else None,
+            "stale": self._is_stale(job),
+            "last_error": job.last_error,
+            "created_at": job.created_at.isoformat(),
+            "heartbeat_at": job.heartbeat_at.isoformat(),
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    def get(self, db: Session, job_id: Optional[int] = None) -> Optional[EmbeddingRefreshJob]:
+        """A job by id, or the most recent one"""
+        query = db.query(EmbeddingRefreshJob)
+        if job_id is not None:
+            return query.filter(EmbeddingRefreshJob.id == job_id).first()
+        return query.order_by(EmbeddingRefreshJob.id.desc()).first()
+
+    def start(self, db: Session, force: bool = False) -> EmbeddingRefreshJob:
+        """Create a job over every idea that exists now; the caller runs run(job.id) in the background"""
+        embedding_service.sync_models(db)
+        max_idea_id, total = db.query(func.max(Idea.id), func.count(Idea.id)).one()
+        now = datetime.utcnow()
+        job = EmbeddingRefreshJob(
+            status=JOB_RUNNING,
+            active=True,
+            model=embedding_service.model_name,
+            force=force,
+            last_idea_id=0,
+            max_idea_id=max_idea_id or 0,
+            total=total,
+            runner=uuid.uuid4().hex,
+            created_at=now,
+            heartbeat_at=now
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # The unique active flag rejects a second job, whichever worker got there first
+            db.rollback()
+            active = db.query(EmbeddingRefreshJob).filter(EmbeddingRefreshJob.active.is_(True)).first()
+            raise RefreshJobConflict(f"Embedding update {active.id if active else ''} is already {active.status if active else 'running'}")
+        logger.info(f"Started embedding update {job.id} over {total} ideas")
+        return job
+
+    def _claim(self, db: Session, job_id: int, allowed) -> Optional[str]:
+        """Atomically mark a job running under a new runner token; None if its state doesn't allow it"""
+        now = datetime.utcnow()
+        runner = uuid.uuid4().hex
+        claimed = db.query(EmbeddingRefreshJob).filter(EmbeddingRefreshJob.id == job_id, allowed).update(
+            {"status": JOB_RUNNING, "runner": runner, "heartbeat_at": now, "last_error": None},
+            synchronize_session=False
+        )
+        db.commit()
+        return runner if claimed else None
+
+    def resume(self, db: Session, job_id: int) -> EmbeddingRefreshJob:
+        """Continue a paused job, or take over a running one whose run died; raises LookupError or RefreshJobConflict"""
+        job = self.get(db, job_id)
+        if job is None or not job.active:
+            raise LookupError("No paused or running embedding update with this id")
+        cutoff = datetime.utcnow() - self.stale_after
+        runner = self._claim(db, job_id, (EmbeddingRefreshJob.status == JOB_PAUSED) | (
+            (EmbeddingRefreshJob.status == JOB_RUNNING) & (EmbeddingRefreshJob.heartbeat_at < cutoff)
+        ))
+        if runner is None:
+            raise RefreshJobConflict(f"Embedding update {job_id} is already running")
+        db.refresh(job)
+        return job
+
+    def pause(self, db: Session, job_id: int) -> Optional[EmbeddingRefreshJob]:
+        """Ask a running job to stop at its next checkpoint; None if it isn't running"""
+        paused = db.query(EmbeddingRefreshJob).filter(
+            EmbeddingRefreshJob.id == job_id,
+            EmbeddingRefreshJob.status == JOB_RUNNING
+        ).update({"status": JOB_PAUSED}, synchronize_session=False)
+        db.commit()
+        return self.get(db, job_id) if paused else None
+
+    def cancel(self, db: Session, job_id: int) -> Optional[EmbeddingRefreshJob]:
+        """Stop a running or paused job for good; embeddings already written are kept"""
+        self._finish(db, job_id, JOB_CANCELLED)
+        job = self.get(db, job_id)
+        return job if job is not None and job.status == JOB_CANCELLED else None
+
+    def _finish(self, db: Session, job_id: int, status: str, error: Optional[str] = None, runner: Optional[str] = None) -> bool:
+        query = db.query(EmbeddingRefreshJob).filter(
+            EmbeddingRefreshJob.id == job_id,
+            EmbeddingRefreshJob.active.is_(True)
+        )
+        if runner is not None:
+            query = query.filter(EmbeddingRefreshJob.runner == runner, EmbeddingRefreshJob.status == JOB_RUNNING)
+        finished = query.update(
+            {"status": status, "active": None, "last_error": error, "finished_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+        return bool(finished)
+
+    def _pause_with_error(self, db: Session, job_id: int, runner: str, error: str):
+        db.query(EmbeddingRefreshJob).filter(
+            EmbeddingRefreshJob.id == job_id,
+            EmbeddingRefreshJob.runner == runner,
+            EmbeddingRefreshJob.status == JOB_RUNNING
+        ).update({"status": JOB_PAUSED, "last_error": error}, synchronize_session=False)
+        db.commit()
+
+    def _chunk_end(self, db: Session, job: EmbeddingRefreshJob) -> Optional[int]:
+        """Id of the last idea in the next chunk after the checkpoint, None when there are none left"""
+        ids = db.query(Idea.id).filter(
+            Idea.id > job.last_idea_id,
+            Idea.id <= job.max_idea_id
+        ).order_by(Idea.id).limit(self.chunk_size).subquery()
+        return db.query(func.max(ids.c.id)).scalar()
+
+    def run(self, job_id: int):
+        """Process a job from its checkpoint until it completes, is paused or cancelled, or another run takes it over"""
+        db = self.session_factory()
+        runner = None
+        try:
+            job = self.get(db, job_id)
+            runner = job.runner if job is not None else None
+            while job is not None and job.status == JOB_RUNNING and job.runner == runner:
+                embedding_service.sync_models(db)
+                if job.model != embedding_service.model_name:
+                    self._finish(db, job_id, JOB_CANCELLED, f"Embedding model changed to {embedding_service.model_name}", runner)
+                    break
+
+                chunk_end = self._chunk_end(db, job)
+                if chunk_end is None:
+                    if job.embedded:
+                        neighbor_service.rebuild(db)
+                    if self._finish(db, job_id, JOB_COMPLETED, runner=runner):
+                        logger.info(f"Embedding update {job_id} completed: {job.embedded} embedded, {job.failed} failed")
+                    break
+
+                started = time.monotonic()
+                result = embedding_service.refresh_embeddings(
+                    db,
+                    db.query(Idea).filter(Idea.id > job.last_idea_id, Idea.id <= chunk_end),
+                    force=job.force,
+                    model=job.model
+                )
+                if result["failed"] and not embedding_service.available:
+                    # Leave the checkpoint before this chunk so resuming retries all of it
+                    self._pause_with_error(db, job_id, runner, "Model server unavailable; resume once it is back")
+                    break
+
+                # Counters only move for the run that owns the job; status is left to pause/cancel
+                db.query(EmbeddingRefreshJob).filter(
+                    EmbeddingRefreshJob.id == job_id,
+                    EmbeddingRefreshJob.runner == runner
+                ).update({
+                    "last_idea_id": chunk_end,
+                    "processed": EmbeddingRefreshJob.processed + result["total"],
+                    "embedded": EmbeddingRefreshJob.embedded + result["successful"],
+                    "skipped": EmbeddingRefreshJob.skipped + result["skipped"],
+                    "failed": EmbeddingRefreshJob.failed + result["failed"],
+                    "active_seconds": EmbeddingRefreshJob.active_seconds + (time.monotonic() - started),
+                    "heartbeat_at": datetime.utcnow()
+                }, synchronize_session=False)
+                db.commit()
+                db.expire_all()
+                job = self.get(db, job_id)
+        except Exception as e:
+            logger.error(f"Embedding update {job_id} failed: {e}")
+            db.rollback()
+            self._finish(db, job_id, JOB_FAILED, str(e), runner)
+        finally:
+            db.close()
+
+# Global instance
+refresh_jobs = RefreshJobService()
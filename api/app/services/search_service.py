@@ -0,0 +1,57 @@
+from typing import Dict, List, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.idea import Idea
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rank offset for reciprocal-rank fusion (Cormack et al. use 60)
+RRF_K = 60
+
+FUSION_METHODS = ("rrf", "weighted")
+
+Ranking = List[Tuple[int, float]]
+
+def lexical_search(db: Session, q: str, limit: int, offset: int = 0) -> Ranking:
+    """Substring match on title/description/content, scored by the share of query terms found"""
+    terms = [term.lower() for term in q.split()] or [q.lower()]
+    rows = db.query(Idea.id, Idea.title, Idea.description, Idea.content).filter(
+        or_(*[
+            or_(
+                Idea.title.ilike(f"%{term}%"),
+                Idea.description.ilike(f"%{term}%"),
+                Idea.content.ilike(f"%{term}%")
+            ) for term in terms
+        ])
+    ).all()
+
+    scored = []
+    for idea_id, *fields in rows:
+        text = " ".join(filter(None, fields)).lower()
+        scored.append((idea_id, sum(term in text for term in terms) / len(terms)))
+    scored.sort(key=lambda match: match[1], reverse=True)
+    return scored[offset:offset + limit]
+
+def fuse_rankings(rankings: Dict[str, Ranking], weights: Dict[str, float], method: str = "rrf") -> List[dict]:
+    """Merge ranked (id, score) lists into one ranking, best first
+
+    rrf sums weight / (RRF_K + rank) over the lists an id appears in;
+    weighted sums weight * score, counting a missing score as 0.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{method}'")
+
+    fused: Dict[int, dict] = {}
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, (item_id, score) in enumerate(ranking):
+            entry = fused.setdefault(item_id, {"id": item_id, "score": 0.0})
+            entry[f"{name}_score"] = score
+            entry[f"{name}_rank"] = rank + 1
+            if method == "rrf":
+                entry["score"] += weight / (RRF_K + rank + 1)
+            else:
+                entry["score"] += weight * score
+
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
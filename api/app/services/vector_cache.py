@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A hit only rewrites last_used when the stored value is older than this, so
+# hot texts don't turn every lookup into a write (LRU order is approximate)
+TOUCH_INTERVAL_SECONDS = 60.0
+
+# Share of max_entries evicted at once, so a full cache doesn't evict on every insert
+EVICTION_SLACK = 0.05
+
+# SQLite host parameters per IN (...) lookup
+LOOKUP_CHUNK = 500
+
+def normalize_text(text: str) -> str:
+    """Text as the cache sees it: whitespace runs collapsed, ends stripped"""
+    return " ".join(text.split())
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class EmbeddingVectorCache:
+    """Persistent text -> vector cache shared by every worker, keyed by (model, text hash)
+
+    Vectors are stored as float32 blobs in a SQLite file of their own, so
+    re-imports, duplicate texts, repeated search queries and restores skip
+    the model. Entries carry a last-used time; once the cache holds more
+    than max_entries the least recently used ones are deleted. The file is
+    opened on first use; hit and miss counters are per process.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0  # Approximate: other workers insert too
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Model time spent on misses, to estimate the time hits saved
+        self._model_seconds = 0.0
+        self._model_texts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_vectors_last_used ON vectors (last_used)")
+            conn.commit()
+            self._entries = conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector for each text (None on a miss)"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        if not self.enabled or not texts:
+            return results
+        keys = [text_key(text) for text in texts]
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                found = {}
+                unique = list(dict.fromkeys(keys))
+                for start in range(0, len(unique), LOOKUP_CHUNK):
+                    chunk = unique[start:start + LOOKUP_CHUNK]
+                    rows = conn.execute(
+                        f"SELECT text_hash, vector, last_used FROM vectors WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                        [model, *chunk]
+                    ).fetchall()
+                    found.update((text_hash, (vector, last_used)) for text_hash, vector, last_used in rows)
+                stale = [(now, model, text_hash) for text_hash, (_, last_used) in found.items() if now - last_used > TOUCH_INTERVAL_SECONDS]
+                if stale:
+                    conn.executemany("UPDATE vectors SET last_used = ? WHERE model = ? AND text_hash = ?", stale)
+                    conn.commit()
+                for position, key in enumerate(keys):
+                    if key in found:
+                        results[position] = np.frombuffer(found[key][0], dtype=np.float32).tolist()
+                hits = sum(result is not None for result in results)
+                self.hits += hits
+                self.misses += len(keys) - hits
+        except sqlite3.Error as e:
+            # The cache only saves model time; a broken file must not break embedding
+            logger.warning(f"Embedding cache lookup failed: {e}")
+        return results
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Optional[List[float]]]):
+        """Store the vectors that were generated (None entries are skipped)"""
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = [
+            (model, text_key(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors) if vector
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)", rows
+                )
+                conn.commit()
+                self._entries += conn.total_changes - before
+                if self._entries > self.max_entries:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def put(self, model: str, text: str, vector: Optional[List[float]]):
+        self.put_many(model, [text], [vector])
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Delete least recently used entries down to max_entries less the slack"""
+        self._entries = conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        excess = self._entries - int(self.max_entries * (1 - EVICTION_SLACK))
+        if self._entries <= self.max_entries or excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM vectors WHERE (model, text_hash) IN "
+            "(SELECT model, text_hash FROM vectors ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        conn.commit()
+        self._entries -= excess
+        self.evictions += excess
+
+    def record_model_time(self, seconds: float, texts: int):
+        """Account a model call that embedded this many texts, for the time-saved estimate"""
+        with self._lock:
+            self._model_seconds += seconds
+            self._model_texts += texts
+
+    def clear(self, model: Optional[str] = None) -> int:
+        """Delete every cached vector (of one model if given); returns entries deleted"""
+        if not self.enabled and self._conn is None:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            if model is None:
+                deleted = conn.execute("DELETE FROM vectors").rowcount
+            else:
+                deleted = conn.execute("DELETE FROM vectors WHERE model = ?", (model,)).rowcount
+            conn.commit()
+            self._entries = max(self._entries - deleted, 0)
+            return deleted
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self._model_seconds = 0.0
+            self._model_texts = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            seconds_per_text = self._model_seconds / self._model_texts if self._model_texts else None
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "model_ms_per_text": round(seconds_per_text * 1000, 2) if seconds_per_text is not None else None,
+                # Model time the hits would have cost at the measured miss latency
+                "model_seconds_saved": round(self.hits * seconds_per_text, 2) if seconds_per_text is not None else None
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,277 @@
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Supported in-memory representations for the vector matrix
+STORAGE_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Unit vectors have components in [-1, 1]; int8 maps that range onto [-127, 127]
+INT8_SCALE = 127.0
+
+# Rows decoded per step when scanning a compact matrix
+SCAN_BLOCK_ROWS = 1024
+
+# Above this share of rows, scanning everything and masking beats gathering the candidate rows
+DENSE_CANDIDATE_FRACTION = 0.25
+
+class VectorIndex:
+    """Contiguous in-memory matrix of normalized vectors for exact top-k search
+
+    With storage="float16" or "int8" the matrix is kept in compact form and
+    scores are approximate; callers re-rank the top candidates against
+    full-precision vectors (see OllamaEmbeddingService.get_similar_ideas).
+    """
+
+    def __init__(self, dimension: int = 384, initial_capacity: int = 1024, storage: str = "float32"):
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported vector storage '{storage}'")
+        self.dimension = dimension
+        self.storage = storage
+        self._dtype = STORAGE_DTYPES[storage]
+        self.loaded = False
+        self.watermark: Optional[str] = None
+        self._lock = threading.RLock()
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix = np.zeros((self._initial_capacity, dimension), dtype=self._dtype)
+        self._ids = np.zeros(self._initial_capacity, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+        # (sorted ids, their rows), rebuilt lazily after writes for vectorized id -> row lookups
+        self._sorted_ids: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def quantized(self) -> bool:
+        """Whether scores come from a lossy representation"""
+        return self.storage != "float32"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the occupied rows of the vector matrix"""
+        return self._size * self.dimension * self._matrix.itemsize
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._positions
+
+    def ids(self) -> Set[int]:
+        """Return the set of stored ids"""
+        with self._lock:
+            return set(self._positions)
+
+    def _normalize(self, vector) -> np.ndarray:
+        """Convert a vector to a unit-length float32 array"""
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if array.shape[0] != self.dimension:
+            raise ValueError(f"Expected a {self.dimension}-dim vector, got {array.shape[0]}")
+        norm = np.linalg.norm(array)
+        if norm == 0:
+            return np.zeros(self.dimension, dtype=np.float32)
+        return array / norm
+
+    def _encode(self, normalized: np.ndarray) -> np.ndarray:
+        """Convert unit-length float32 rows to the storage dtype"""
+        if self.storage == "int8":
+            return np.clip(np.rint(normalized * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8)
+        return normalized.astype(self._dtype)
+
+    def _decode(self, stored: np.ndarray) -> np.ndarray:
+        """Convert stored rows back to float32"""
+        if self.storage == "int8":
+            return stored.astype(np.float32) / INT8_SCALE
+        return stored.astype(np.float32)
+
+    def _scores(self, query_vector: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot product of every stored row (or just the given rows) with a unit query"""
+        count = self._size if rows is None else rows.shape[0]
+        if not self.quantized:
+            matrix = self._matrix[:self._size] if rows is None else self._matrix[rows]
+            return matrix @ query_vector
+        # Decode block by block so the float32 copy stays small
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, count)
+            block = self._matrix[start:end] if rows is None else self._matrix[rows[start:end]]
+            scores[start:end] = block.astype(np.float32) @ query_vector
+        if self.storage == "int8":
+            scores /= INT8_SCALE
+        return scores
+
+    def _rows_for(self, item_ids: np.ndarray) -> np.ndarray:
+        """Rows holding the given ids (ids not in the index are skipped)"""
+        if self._sorted_ids is None:
+            order = np.argsort(self._ids[:self._size], kind="stable")
+            self._sorted_ids = (self._ids[:self._size][order], order)
+        sorted_ids, order = self._sorted_ids
+        if sorted_ids.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64)
+        found = np.minimum(np.searchsorted(sorted_ids, item_ids), sorted_ids.shape[0] - 1)
+        return order[found[sorted_ids[found] == item_ids]]
+
+    def _grow(self, minimum_capacity: int):
+        """Grow the backing arrays geometrically so appends stay amortized O(1)"""
+        capacity = self._matrix.shape[0]
+        if minimum_capacity <= capacity:
+            return
+        new_capacity = max(minimum_capacity, capacity * 2)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=self._dtype)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix = matrix
+        self._ids = ids
+
+    def clear(self):
+        """Drop every vector and mark the index as not loaded"""
+        with self._lock:
+            self._matrix = np.zeros((self._initial_capacity, self.dimension), dtype=self._dtype)
+            self._ids = np.zeros(self._initial_capacity, dtype=np.int64)
+            self._positions = {}
+            self._size = 0
+            self._sorted_ids = None
+            self.watermark = None
+            self.loaded = False
+
+    def _prepare(self, ids: Iterable[int], vectors: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """Stack vectors into an id array and a row-normalized float32 matrix"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        vectors = list(vectors)
+        if vectors:
+            matrix = np.vstack([np.asarray(vector, dtype=np.float32).reshape(1, -1) for vector in vectors])
+        else:
+            matrix = np.zeros((0, self.dimension), dtype=np.float32)
+        if matrix.shape != (ids.shape[0], self.dimension):
+            raise ValueError(f"Expected {ids.shape[0]} vectors of dimension {self.dimension}, got {matrix.shape}")
+
+        # Normalize every row in one pass
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return ids, matrix / norms
+
+    def build(self, ids: Iterable[int], vectors: Iterable):
+        """Replace the index contents with the given ids and vectors"""
+        ids, matrix = self._prepare(ids, vectors)
+        with self._lock:
+            self.clear()
+            self._grow(ids.shape[0])
+            self._matrix[:ids.shape[0]] = self._encode(matrix)
+            self._ids[:ids.shape[0]] = ids
+            self._positions = {int(item_id): position for position, item_id in enumerate(ids)}
+            self._size = ids.shape[0]
+            self._sorted_ids = None
+            self.loaded = True
+
+    def _set(self, item_id: int, normalized: np.ndarray):
+        position = self._positions.get(item_id)
+        if position is None:
+            self._grow(self._size + 1)
+            position = self._size
+            self._size += 1
+            self._ids[position] = item_id
+            self._positions[item_id] = position
+            self._sorted_ids = None
+        self._matrix[position] = self._encode(normalized)
+
+    def add(self, item_id: int, vector):
+        """Insert or replace the vector stored for an id"""
+        normalized = self._normalize(vector)
+        with self._lock:
+            self._set(int(item_id), normalized)
+
+    def remove(self, item_id: int) -> bool:
+        """Remove an id, moving the last row into its slot to keep the matrix dense"""
+        with self._lock:
+            position = self._positions.pop(int(item_id), None)
+            if position is None:
+                return False
+            last = self._size - 1
+            if position != last:
+                moved_id = int(self._ids[last])
+                self._matrix[position] = self._matrix[last]
+                self._ids[position] = moved_id
+                self._positions[moved_id] = position
+            self._matrix[last] = 0
+            self._size = last
+            self._sorted_ids = None
+            return True
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        """Return a copy of the normalized vector stored for an id (decoded to float32)"""
+        with self._lock:
+            position = self._positions.get(int(item_id))
+            if position is None:
+                return None
+            return self._decode(self._matrix[position])
+
+    def search(
+        self,
+        query,
+        k: int,
+        exclude_ids: Iterable[int] = (),
+        min_score: Optional[float] = None,
+        ef: Optional[int] = None,
+        exact: bool = True,
+        candidates: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first
+
+        The scan is always exact; ef and exact are accepted so callers can
+        treat this index and HNSWIndex interchangeably. With candidates only
+        those ids are scored, so a selective filter makes the scan cheaper.
+        """
+        if k <= 0:
+            return []
+        query_vector = self._normalize(query)
+
+        with self._lock:
+            if not self._positions:
+                return []
+            rows = None
+            if candidates is not None:
+                rows = self._rows_for(np.asarray(list(candidates), dtype=np.int64))
+            if rows is None or rows.shape[0] > DENSE_CANDIDATE_FRACTION * self._size:
+                scores = self._scores(query_vector)
+                if rows is not None:
+                    outside = np.ones(self._size, dtype=bool)
+                    outside[rows] = False
+                    scores[outside] = -np.inf
+                self._mask_scores(scores, exclude_ids)
+                ids = self._ids[:self._size].copy()
+            else:
+                scores = self._scores(query_vector, rows)
+                ids = self._ids[rows]
+                excluded = list(exclude_ids)
+                if excluded:
+                    scores[np.isin(ids, excluded)] = -np.inf
+
+        return self._top_k(scores, ids, k, min_score)
+
+    def _mask_scores(self, scores: np.ndarray, exclude_ids: Iterable[int]):
+        """Give excluded rows a score of -inf so they never rank"""
+        for item_id in exclude_ids:
+            position = self._positions.get(int(item_id))
+            if position is not None:
+                scores[position] = -np.inf
+
+    def _top_k(self, scores: np.ndarray, ids: np.ndarray, k: int, min_score: Optional[float]) -> List[Tuple[int, float]]:
+        """Select the k best rows with argpartition, then sort just those"""
+        candidates = np.flatnonzero(scores >= min_score) if min_score is not None else np.flatnonzero(scores > -np.inf)
+        if candidates.size == 0:
+            return []
+
+        candidate_scores = scores[candidates]
+        if candidates.size > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+
+        return [(int(ids[candidates[i]]), float(candidate_scores[i])) for i in top]
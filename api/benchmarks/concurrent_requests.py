@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency of the API under concurrent requests.
+
+Serves the app with uvicorn against a throwaway SQLite database and fires a
+mixed workload from --clients concurrent connections: semantic searches
+(a database query plus an embedding round trip to a stand-in model server
+with a fixed latency), single-idea reads, idea listings, and the trivial
+/health endpoint. Handlers that do blocking work on the event loop thread
+serialize everything behind them; /health latency shows how long requests
+wait for the loop.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ["EMBEDDING_BACKEND"] = "ollama"
+os.environ["EMBEDDING_QUEUE_WORKER"] = "false"
+os.environ["EMBEDDING_CACHE_SIZE"] = "0"  # every search query goes to the model
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+import uvicorn
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_db
+from app.services.embedding_service import embedding_service
+from embedding_throughput import seed_ideas, start_fake_ollama
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run_load(base_url: str, requests: int, clients: int, ideas: int) -> tuple:
+    rng = np.random.default_rng(0)
+    # Share of each request kind in the workload
+    mix = {"search": 0.3, "read": 0.4, "list": 0.1, "health": 0.2}
+    kinds = rng.choice(list(mix), size=requests, p=list(mix.values()))
+    plan = [(str(kind), i) for i, kind in enumerate(kinds)]
+    latencies = {kind: [] for kind in mix}
+    errors = {kind: 0 for kind in mix}
+    queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    def url(kind: str, i: int) -> str:
+        if kind == "search":
+            return f"/api/search/semantic?q=garden+plan+{i}&limit=10"
+        if kind == "read":
+            return f"/api/ideas/{i % ideas + 1}"
+        if kind == "list":
+            return "/api/ideas"
+        return "/health"
+
+    async def client_loop(client: httpx.AsyncClient):
+        while not queue.empty():
+            kind, i = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.get(url(kind, i))
+                if response.status_code != 200:
+                    errors[kind] += 1
+            except httpx.HTTPError:
+                errors[kind] += 1
+            latencies[kind].append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300, trust_env=False) as client:
+        await client.get("/health")
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ideas", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated model cost per embedding request")
+    args = parser.parse_args()
+
+    model_server = start_fake_ollama(args.latency_ms / 1000, 0.0, 8, embedding_service.embedding_dimension)
+    embedding_service.base_url = f"http://127.0.0.1:{model_server.server_port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seed_ideas(db, args.ideas)
+            embedding_service.update_all_embeddings(db)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        from main import app
+        app.dependency_overrides[get_db] = override_get_db
+        port = free_port()
+        server = serve(app, port)
+        try:
+            elapsed, latencies, errors = asyncio.run(run_load(f"http://127.0.0.1:{port}", args.requests, args.clients, args.ideas))
+        finally:
+            server.should_exit = True
+
+    print(f"🧪 {args.requests} requests from {args.clients} clients, {args.ideas} ideas, model {args.latency_ms} ms/request")
+    print(f"🚀 Throughput: {args.requests / elapsed:,.0f} requests/s")
+    print(f"\n{'endpoint':<10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for kind, samples in latencies.items():
+        p50, p95 = np.percentile(np.array(samples) * 1000, [50, 95])
+        print(f"{kind:<10}{p50:>10.1f}{p95:>10.1f}{errors[kind]:>8}")
+
+if __name__ == "__main__":
+    main()
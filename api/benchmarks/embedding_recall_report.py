@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Recall report for compact (float16/int8) similarity index storage.
+
+Compares each storage mode against a float32 exact scan: recall@k before and
+after exact re-ranking, matrix memory, and scan latency. Uses the embeddings
+in ../data/ideas.db when present, otherwise synthetic clustered vectors.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.vector_index import VectorIndex, STORAGE_DTYPES
+
+def load_vectors(db_path: Path, synthetic: int, dimension: int) -> np.ndarray:
+    """Load stored embeddings, or generate clustered vectors that look like them."""
+    if synthetic == 0 and db_path.exists():
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT embedding, dtype FROM embeddings WHERE typeof(embedding) = 'blob'"
+        ).fetchall()
+        conn.close()
+        if rows:
+            print(f"📂 Using {len(rows)} embeddings from {db_path}")
+            return np.vstack([np.frombuffer(blob, dtype=dtype) for blob, dtype in rows]).astype(np.float32)
+
+    count = synthetic or 20000
+    print(f"🧪 Using {count} synthetic clustered vectors")
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(count // 200, 1), dimension))
+    vectors = centers[rng.integers(0, centers.shape[0], count)] + 0.8 * rng.standard_normal((count, dimension))
+    return vectors.astype(np.float32)
+
+def rerank(full: np.ndarray, query: np.ndarray, candidates: list, k: int) -> list:
+    """Exact re-scoring of approximate candidates against float32 vectors."""
+    ids = np.array([item_id for item_id, _ in candidates], dtype=np.int64)
+    scores = full[ids] @ query
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [int(ids[i]) for i in order]
+
+def run_report(vectors: np.ndarray, queries: int, k: int, rerank_factor: int):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = list(range(normalized.shape[0]))
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(normalized.shape[0], size=min(queries, normalized.shape[0]), replace=False)
+
+    reference = VectorIndex(normalized.shape[1], storage="float32")
+    reference.build(ids, normalized)
+    truth = {
+        row: [item_id for item_id, _ in reference.search(normalized[row], k, exclude_ids=[row])]
+        for row in query_rows
+    }
+
+    print(f"\n{'storage':<8} {'matrix MB':>10} {'scan ms':>8} {'recall@' + str(k):>10} {'reranked':>9}")
+    for storage in STORAGE_DTYPES:
+        index = VectorIndex(normalized.shape[1], storage=storage)
+        index.build(ids, normalized)
+
+        raw_hits = 0
+        reranked_hits = 0
+        started = time.perf_counter()
+        for row in query_rows:
+            candidates = index.search(normalized[row], k * rerank_factor, exclude_ids=[row])
+            raw_hits += len(set(item_id for item_id, _ in candidates[:k]) & set(truth[row]))
+            reranked_hits += len(set(rerank(normalized, normalized[row], candidates, k)) & set(truth[row]))
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(query_rows)
+
+        total = k * len(query_rows)
+        print(
+            f"{storage:<8} {index.nbytes / 1024 ** 2:>10.1f} {elapsed_ms:>8.2f} "
+            f"{raw_hits / total:>10.4f} {reranked_hits / total:>9.4f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="../data/ideas.db", help="SQLite database with stored embeddings")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the database")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    run_report(load_vectors(Path(args.db), args.synthetic, args.dimension), args.queries, args.k, args.rerank_factor)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Throughput report for bulk embedding refresh, serial vs batched.
+
+serial is the one-idea-at-a-time path (one /api/embeddings request and one
+commit per idea); batched is update_all_embeddings (batches through
+/api/embed, bounded concurrency, one commit per batch). Both regenerate
+every embedding in a throwaway SQLite database and then rebuild the
+neighbor table.
+
+By default the model is a local stand-in server with a fixed per-request
+latency plus a per-text cost, serving a bounded number of requests at once
+like Ollama's OLLAMA_NUM_PARALLEL. Pass --url to measure a real Ollama.
+"""
+
+import argparse
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import Base
+from app.models.idea import Idea, Tag
+from app.services.embedding_service import embedding_service
+from app.services.neighbor_service import neighbor_service
+
+def start_fake_ollama(latency: float, per_text: float, parallel: int, dimension: int) -> ThreadingHTTPServer:
+    """Serve /api/embeddings and /api/embed with simulated model latency."""
+    slots = threading.Semaphore(parallel)
+
+    def vector(text: str) -> list:
+        return np.random.default_rng(abs(hash(text)) % 2 ** 32).standard_normal(dimension).round(6).tolist()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Ollama
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/api/embed":
+                texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+            else:
+                texts = [payload["prompt"]]
+            with slots:
+                time.sleep(latency + per_text * len(texts))
+            if self.path == "/api/embed":
+                body = {"embeddings": [vector(text) for text in texts]}
+            else:
+                body = {"embedding": vector(texts[0])}
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def seed_ideas(session, count: int):
+    """Ideas of realistic length with a few shared tags."""
+    rng = np.random.default_rng(0)
+    words = ["garden", "idea", "vector", "search", "note", "plan", "draft", "model", "water", "light"]
+    tags = [Tag(name=f"tag-{i}") for i in range(10)]
+    session.add_all(tags)
+    for i in range(count):
+        idea = Idea(
+            title=f"Idea {i} " + " ".join(rng.choice(words, 4)),
+            description=" ".join(rng.choice(words, 30)),
+            content=" ".join(rng.choice(words, 120)),
+            category="technology"
+        )
+        idea.tags = [tags[j] for j in rng.choice(10, 2, replace=False)]
+        session.add(idea)
+    session.commit()
+
+def run_serial(db) -> int:
+    ideas = db.query(Idea).all()
+    done = sum(embedding_service.update_idea_embedding(db, idea, update_neighbors=False, force=True) for idea in ideas)
+    neighbor_service.rebuild(db)
+    return done
+
+def run_batched(db) -> int:
+    return embedding_service.update_all_embeddings(db, force=True)["successful_updates"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ideas", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="8,32,64", help="comma-separated EMBEDDING_BATCH_SIZE values")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated EMBEDDING_MAX_CONCURRENCY values")
+    parser.add_argument("--latency-ms", type=float, default=15.0, help="simulated cost per request")
+    parser.add_argument("--per-text-ms", type=float, default=1.5, help="simulated cost per text")
+    parser.add_argument("--parallel", type=int, default=4, help="requests the simulated server runs at once")
+    parser.add_argument("--url", help="real Ollama base URL instead of the simulated server")
+    args = parser.parse_args()
+
+    if args.url:
+        embedding_service.base_url = args.url
+        print(f"🦙 Using Ollama at {args.url} ({embedding_service.model_name})")
+    else:
+        server = start_fake_ollama(args.latency_ms / 1000, args.per_text_ms / 1000, args.parallel, embedding_service.embedding_dimension)
+        embedding_service.base_url = f"http://127.0.0.1:{server.server_port}"
+        print(f"🧪 Simulated model: {args.latency_ms} ms/request + {args.per_text_ms} ms/text, {args.parallel} requests in parallel")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            seed_ideas(db, args.ideas)
+
+        modes = [("serial", None, None)] + [
+            ("batched", int(size), int(workers))
+            for workers in args.concurrency.split(",")
+            for size in args.batch_sizes.split(",")
+        ]
+        print(f"\n{'mode':<10}{'batch':>7}{'workers':>9}{'seconds':>10}{'ideas/s':>10}")
+        for mode, size, workers in modes:
+            embedding_service.reset_index()
+            if size:
+                embedding_service.batch_size = size
+                embedding_service.max_concurrency = workers
+            with Session() as db:
+                start = time.perf_counter()
+                done = run_serial(db) if mode == "serial" else run_batched(db)
+                elapsed = time.perf_counter() - start
+            print(f"{mode:<10}{size or 1:>7}{workers or 1:>9}{elapsed:>10.2f}{done / elapsed:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Load test of the embedding, similarity and search pipeline without a model server.
+
+Runs with EMBEDDING_BACKEND=hashing (the NumPy hashing embedder) against a
+throwaway SQLite database: raw embedder throughput on one core, a full
+bulk refresh (embed, store, index, neighbor table), then semantic search
+and related-idea latency through the HTTP API.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ["EMBEDDING_BACKEND"] = "hashing"
+os.environ["EMBEDDING_QUEUE_WORKER"] = "false"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_db
+from app.models.idea import Idea
+from app.services.embedding_service import embedding_service
+from embedding_throughput import seed_ideas
+
+def percentiles(samples: list) -> str:
+    p50, p95 = np.percentile(np.array(samples) * 1000, [50, 95])
+    return f"p50 {p50:.2f} ms, p95 {p95:.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ideas", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seed_ideas(db, args.ideas)
+            texts = [embedding_service.get_idea_text_for_embedding(idea) for idea in db.query(Idea).all()]
+
+        embedding_service.embedder.embed("warm up")
+        start = time.perf_counter()
+        embedding_service.embedder.embed_batch(texts)
+        elapsed = time.perf_counter() - start
+        print(f"🧮 Embedder: {len(texts) / elapsed:,.0f} ideas/s on one core ({np.mean([len(text) for text in texts]):.0f} chars each)")
+
+        with Session() as db:
+            start = time.perf_counter()
+            result = embedding_service.update_all_embeddings(db, force=True)
+            elapsed = time.perf_counter() - start
+        print(f"🔄 Bulk refresh: {result['successful_updates']} ideas in {elapsed:.2f}s ({result['successful_updates'] / elapsed:,.0f} ideas/s, including storage and neighbor table)")
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        from main import app
+        app.dependency_overrides[get_db] = override_get_db
+        rng = np.random.default_rng(1)
+        words = ["garden", "idea", "vector", "search", "note", "plan", "draft", "model", "water", "light"]
+        with TestClient(app) as client:
+            searches = []
+            for _ in range(args.queries):
+                query = " ".join(rng.choice(words, 3))
+                start = time.perf_counter()
+                client.get("/api/search/semantic", params={"q": query, "limit": 10})
+                searches.append(time.perf_counter() - start)
+            print(f"🔍 Semantic search: {percentiles(searches)}")
+
+            related = []
+            for idea_id in rng.integers(1, args.ideas + 1, args.queries):
+                start = time.perf_counter()
+                client.get(f"/api/ideas/{idea_id}/related")
+                related.append(time.perf_counter() - start)
+            print(f"🔗 Related ideas: {percentiles(related)}")
+
+if __name__ == "__main__":
+    main()
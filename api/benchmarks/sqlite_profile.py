@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Read and write throughput of SQLite with and without the connection profile.
+
+"default" is SQLite as the app used to open it (rollback journal, full
+sync, 2 MB page cache); "profile" applies SQLITE_PRAGMAS from
+app/database.py (WAL, synchronous=NORMAL, larger cache, mmap, in-memory
+temp store). Each runs against a fresh database file in --dir:
+
+- writes: one idea inserted and committed per request, like POST /api/ideas
+- reads: single-idea lookups with their tags, like GET /api/ideas/{id}
+- list: every idea with its tags, ordered by creation, like GET /api/ideas
+- mixed: --readers threads doing lookups while one thread keeps committing
+
+Results depend heavily on the disk: run it with --dir on the volume that
+holds the real database.
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.database import Base, configure_sqlite
+from app.models.idea import Idea
+from embedding_throughput import seed_ideas
+
+def make_session(path: str, profile: bool):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=16)
+    if profile:
+        configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+def run_writes(Session, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        with Session() as db:
+            db.add(Idea(title=f"Write {i}", description="Benchmark write", category="technology"))
+            db.commit()
+    return count / (time.perf_counter() - start)
+
+def run_reads(Session, count: int, ideas: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        with Session() as db:
+            idea = db.query(Idea).options(selectinload(Idea.tags)).filter(Idea.id == i % ideas + 1).first()
+            [tag.name for tag in idea.tags]
+    return count / (time.perf_counter() - start)
+
+def run_list(Session, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        with Session() as db:
+            db.query(Idea).options(selectinload(Idea.tags)).order_by(Idea.created_at.desc()).all()
+    return count / (time.perf_counter() - start)
+
+def run_mixed(Session, seconds: float, readers: int, ideas: int) -> tuple:
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    errors = [0]
+
+    def reader(slot: int):
+        i = slot
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    db.query(Idea).filter(Idea.id == i % ideas + 1).first()
+                reads[slot] += 1
+            except Exception:
+                errors[0] += 1
+            i += readers
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    db.add(Idea(title=f"Mixed {i}", category="technology"))
+                    db.commit()
+                writes[0] += 1
+            except Exception:
+                errors[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, writes[0] / seconds, errors[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ideas", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--lists", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of the mixed run")
+    parser.add_argument("--dir", help="directory for the database files (default: a temporary one)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"🧪 {args.ideas} ideas, databases in {tmp}")
+        print(f"\n{'mode':<9}{'writes/s':>10}{'reads/s':>10}{'lists/s':>9}{'mixed reads/s':>15}{'mixed writes/s':>16}{'errors':>8}")
+        for mode in ("default", "profile"):
+            engine, Session = make_session(f"{tmp}/{mode}.db", mode == "profile")
+            with Session() as db:
+                seed_ideas(db, args.ideas)
+            writes = run_writes(Session, args.writes)
+            reads = run_reads(Session, args.reads, args.ideas)
+            lists = run_list(Session, args.lists)
+            mixed_reads, mixed_writes, errors = run_mixed(Session, args.seconds, args.readers, args.ideas)
+            print(f"{mode:<9}{writes:>10,.0f}{reads:>10,.0f}{lists:>9,.1f}{mixed_reads:>15,.0f}{mixed_writes:>16,.0f}{errors:>8}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
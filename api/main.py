@@ -42,6 +42,25 @@ async def root():
         "health": "/health"
     }
 
+# Background embedding worker
+@app.on_event("startup")
+async def startup_event():
+    from app.services.embedding_queue import embedding_queue
+    embedding_queue.start()
+
+# Persist the similarity index so restarts skip rebuilding it, drop pooled connections, refresh planner statistics
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.services.embedding_queue import embedding_queue
+    from app.services.embedding_service import embedding_service
+    from app.services.http_clients import http_clients
+    from app.database import optimize_database
+    await embedding_queue.stop()
+    embedding_service.save_index()
+    embedding_service.vector_cache.close()
+    http_clients.close()
+    optimize_database()
+
 # Import and include routers
 from app.routers import ideas, documents, action_plans, chat, categories, analytics, search, export, ai, workflows, system
 
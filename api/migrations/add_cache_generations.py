@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the write generation counters used for cache invalidation.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add cache generation tracking."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        print("🔄 Adding cache generation counters...")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_generations (
+                name VARCHAR NOT NULL PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        print("✅ Created cache_generations table")
+        
+        # Lets the similarity index fetch only embeddings written since its last sync
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_updated_at ON embeddings (updated_at)")
+        print("✅ Created ix_embeddings_updated_at index")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Migration script to add chunk-level document embeddings.
+
+Creates the document_chunks table and queues every document with content,
+so the background worker chunks and embeds existing research.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add the document_chunks table."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        print("🔄 Adding document_chunks table...")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_chunks (
+                id INTEGER NOT NULL PRIMARY KEY,
+                document_id INTEGER NOT NULL REFERENCES documents (id),
+                idea_id INTEGER NOT NULL REFERENCES ideas (id),
+                model VARCHAR NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                start_offset INTEGER NOT NULL,
+                end_offset INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                dtype VARCHAR NOT NULL DEFAULT 'float32',
+                dimension INTEGER NOT NULL,
+                content_hash VARCHAR NOT NULL,
+                updated_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_chunks_document_id ON document_chunks (document_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_chunks_idea_id ON document_chunks (idea_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_chunks_updated_at ON document_chunks (updated_at)")
+        print("✅ Created document_chunks table")
+        
+        # Queue every document that has content but no chunks yet
+        cursor.execute("""
+            INSERT OR IGNORE INTO embedding_jobs (entity_type, entity_id, enqueued_at, requested_at, available_at, attempts)
+            SELECT 'document', documents.id, datetime('now'), datetime('now'), datetime('now'), 0
+            FROM documents
+            WHERE documents.content IS NOT NULL AND documents.content != ''
+              AND NOT EXISTS (SELECT 1 FROM document_chunks WHERE document_chunks.document_id = documents.id)
+        """)
+        print(f"✅ Queued {cursor.rowcount} documents for chunking")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
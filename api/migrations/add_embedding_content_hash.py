@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Migration script to record which text and model produced each embedding.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add content_hash and model to embeddings."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # Check which columns already exist
+        cursor.execute("PRAGMA table_info(embeddings)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        print("🔄 Adding embedding fingerprint columns...")
+        
+        if "content_hash" not in columns:
+            cursor.execute("ALTER TABLE embeddings ADD COLUMN content_hash VARCHAR")
+            print("✅ Added content_hash column")
+        else:
+            print("ℹ️  content_hash column already exists")
+        
+        if "model" not in columns:
+            cursor.execute("ALTER TABLE embeddings ADD COLUMN model VARCHAR")
+            print("✅ Added model column")
+        else:
+            print("ℹ️  model column already exists")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        print("   Existing embeddings are regenerated once on the next refresh, then skipped while unchanged")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the background embedding queue table.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add the embedding_jobs table."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        print("🔄 Adding embedding_jobs table...")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_jobs (
+                entity_type VARCHAR NOT NULL,
+                entity_id INTEGER NOT NULL,
+                enqueued_at DATETIME NOT NULL,
+                requested_at DATETIME NOT NULL,
+                available_at DATETIME NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                PRIMARY KEY (entity_type, entity_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_embedding_jobs_available_at ON embedding_jobs (available_at)")
+        print("✅ Created embedding_jobs table")
+        
+        # Queue every idea that has no embedding yet
+        cursor.execute("""
+            INSERT OR IGNORE INTO embedding_jobs (entity_type, entity_id, enqueued_at, requested_at, available_at, attempts)
+            SELECT 'idea', ideas.id, datetime('now'), datetime('now'), datetime('now'), 0
+            FROM ideas LEFT JOIN embeddings ON embeddings.idea_id = ideas.id
+            WHERE embeddings.idea_id IS NULL
+        """)
+        print(f"✅ Queued {cursor.rowcount} ideas without embeddings")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
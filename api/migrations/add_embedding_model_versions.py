@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Migration script to key embeddings by model so several models can coexist.
+
+Rebuilds the embeddings table with a (idea_id, model) primary key and adds
+the embedding_models registry, seeded with the model the existing vectors
+were generated by.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to version embeddings by model."""
+
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+
+    # Model that produced every embedding so far
+    current_model = os.getenv("EMBEDDING_MODEL", "all-minilm")
+
+    try:
+        # Connect in autocommit mode and manage the transaction explicitly,
+        # so the table rebuild is all-or-nothing
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(embeddings)")
+        columns = {column[1]: column for column in cursor.fetchall()}
+
+        cursor.execute("BEGIN")
+
+        if "model" in columns and columns["model"][5] > 0:
+            print("ℹ️  embeddings is already keyed by model")
+        else:
+            print("🔄 Rebuilding embeddings with a (idea_id, model) primary key...")
+            cursor.execute("""
+                CREATE TABLE embeddings_new (
+                    idea_id INTEGER NOT NULL REFERENCES ideas (id),
+                    model VARCHAR NOT NULL,
+                    embedding BLOB NOT NULL,
+                    dtype VARCHAR NOT NULL DEFAULT 'float32',
+                    dimension INTEGER NOT NULL DEFAULT 384,
+                    content_hash VARCHAR,
+                    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+                    PRIMARY KEY (idea_id, model)
+                )
+            """)
+            model_expression = "COALESCE(model, ?)" if "model" in columns else "?"
+            hash_expression = "content_hash" if "content_hash" in columns else "NULL"
+            cursor.execute(f"""
+                INSERT INTO embeddings_new (idea_id, model, embedding, dtype, dimension, content_hash, updated_at)
+                SELECT idea_id, {model_expression}, embedding, COALESCE(dtype, 'float32'),
+                       COALESCE(dimension, 384), {hash_expression}, updated_at
+                FROM embeddings
+            """, (current_model,))
+            cursor.execute("DROP TABLE embeddings")
+            cursor.execute("ALTER TABLE embeddings_new RENAME TO embeddings")
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_updated_at ON embeddings (updated_at)")
+            print("✅ Rebuilt embeddings table")
+
+        print("🔄 Adding embedding_models registry...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_models (
+                name VARCHAR NOT NULL PRIMARY KEY,
+                dimension INTEGER NOT NULL,
+                status VARCHAR NOT NULL,
+                created_at DATETIME NOT NULL,
+                activated_at DATETIME,
+                retired_at DATETIME
+            )
+        """)
+        cursor.execute(
+            "SELECT dimension FROM embeddings WHERE model = ? GROUP BY dimension ORDER BY COUNT(*) DESC LIMIT 1",
+            (current_model,)
+        )
+        row = cursor.fetchone()
+        now = datetime.utcnow().isoformat(" ")
+        cursor.execute(
+            "INSERT OR IGNORE INTO embedding_models (name, dimension, status, created_at, activated_at) "
+            "SELECT ?, ?, 'active', ?, ? WHERE NOT EXISTS (SELECT 1 FROM embedding_models WHERE status = 'active')",
+            (current_model, row[0] if row else 384, now, now)
+        )
+        print(f"✅ Registered {current_model} as the active embedding model")
+
+        cursor.execute("COMMIT")
+        conn.close()
+
+        print("✅ Migration completed successfully!")
+        print("   Switch models with POST /api/embeddings/models")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
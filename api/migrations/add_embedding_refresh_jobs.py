@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the checkpoint table of bulk re-embedding jobs.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add the embedding_refresh_jobs table."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        print("🔄 Adding embedding_refresh_jobs table...")
+        
+        # active is UNIQUE (NULLs excepted), so at most one job can be running or paused
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_refresh_jobs (
+                id INTEGER NOT NULL PRIMARY KEY,
+                status VARCHAR NOT NULL,
+                active BOOLEAN UNIQUE,
+                model VARCHAR NOT NULL,
+                force BOOLEAN NOT NULL DEFAULT 0,
+                last_idea_id INTEGER NOT NULL DEFAULT 0,
+                max_idea_id INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                processed INTEGER NOT NULL DEFAULT 0,
+                embedded INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                active_seconds FLOAT NOT NULL DEFAULT 0,
+                runner VARCHAR,
+                last_error TEXT,
+                created_at DATETIME NOT NULL,
+                heartbeat_at DATETIME NOT NULL,
+                finished_at DATETIME
+            )
+        """)
+        print("✅ Created embedding_refresh_jobs table")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
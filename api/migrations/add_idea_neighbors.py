@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the precomputed related-ideas table.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def run_migration():
+    """Run the migration to add the idea_neighbors table."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        print("🔄 Adding idea_neighbors table...")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS idea_neighbors (
+                idea_id INTEGER NOT NULL REFERENCES ideas (id),
+                neighbor_id INTEGER NOT NULL REFERENCES ideas (id),
+                score FLOAT NOT NULL,
+                rank INTEGER NOT NULL,
+                PRIMARY KEY (idea_id, neighbor_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_idea_neighbors_neighbor_id ON idea_neighbors (neighbor_id)")
+        # Cut-off (last-rank) scores of full lists, for incremental updates
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_idea_neighbors_rank_score ON idea_neighbors (rank, score)")
+        print("✅ Created idea_neighbors table")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        print("   Lists fill in as ideas are read; POST /api/embeddings/neighbors/rebuild fills them all now")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Migration script to add secondary indexes on the columns ideas, search,
+analytics, workflows and export filter, sort and join on.
+"""
+
+import sqlite3
+from pathlib import Path
+
+INDEXES = [
+    ("ix_ideas_category_status", "ideas", "category, status"),
+    ("ix_ideas_status_updated_at", "ideas", "status, updated_at"),
+    ("ix_ideas_created_at", "ideas", "created_at"),
+    ("ix_ideas_updated_at", "ideas", "updated_at"),
+    ("ix_idea_tags_tag_id", "idea_tags", "tag_id, idea_id"),
+    ("ix_documents_idea_id", "documents", "idea_id"),
+    ("ix_action_plans_idea_id", "action_plans", "idea_id"),
+    ("ix_document_versions_document_id", "document_versions", "document_id"),
+]
+
+def run_migration():
+    """Run the migration to add the secondary indexes."""
+    
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+    
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+    
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for name, table, columns in INDEXES:
+            if table not in tables:
+                print(f"ℹ️  Table {table} doesn't exist yet, skipping {name}")
+                continue
+            print(f"🔄 Creating {name} on {table} ({columns})...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        
+        # Give the query planner row counts for choosing between the new indexes
+        print("🔄 Analyzing tables...")
+        cursor.execute("ANALYZE")
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Migration script to convert JSON text embeddings into packed float32 blobs.
+"""
+
+import sqlite3
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BATCH_SIZE = 500
+
+def run_migration(batch_size: int = BATCH_SIZE):
+    """Run the migration to store embeddings as binary vectors."""
+
+    # Get the database path
+    db_path = Path("../data/ideas.db")
+
+    if not db_path.exists():
+        print("❌ Database file not found. Please run the setup script first.")
+        return False
+
+    try:
+        # Connect to the database
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        print("🔄 Converting embeddings to packed float32 blobs...")
+
+        # Check if columns already exist
+        cursor.execute("PRAGMA table_info(embeddings)")
+        columns = [column[1] for column in cursor.fetchall()]
+
+        # Add new columns if they don't exist
+        if 'dtype' not in columns:
+            cursor.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+            print("✅ Added dtype column")
+
+        if 'dimension' not in columns:
+            cursor.execute("ALTER TABLE embeddings ADD COLUMN dimension INTEGER NOT NULL DEFAULT 384")
+            print("✅ Added dimension column")
+
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM embeddings WHERE typeof(embedding) = 'text'")
+        remaining = cursor.fetchone()[0]
+        print(f"🔄 {remaining} embeddings to convert (batches of {batch_size})")
+
+        converted = 0
+        failed_ids = []
+        last_idea_id = -1
+
+        # Walk the table in primary key order so each batch is a short transaction
+        while True:
+            cursor.execute(
+                "SELECT idea_id, embedding FROM embeddings "
+                "WHERE typeof(embedding) = 'text' AND idea_id > ? "
+                "ORDER BY idea_id LIMIT ?",
+                (last_idea_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for idea_id, embedding_json in rows:
+                try:
+                    vector = np.asarray(json.loads(embedding_json), dtype=np.float32)
+                    updates.append((sqlite3.Binary(vector.tobytes()), "float32", int(vector.shape[0]), idea_id))
+                except (ValueError, TypeError) as e:
+                    failed_ids.append(idea_id)
+                    print(f"⚠️  Skipping embedding for idea {idea_id}: {e}")
+
+            cursor.executemany(
+                "UPDATE embeddings SET embedding = ?, dtype = ?, dimension = ? WHERE idea_id = ?",
+                updates
+            )
+            conn.commit()
+
+            converted += len(updates)
+            last_idea_id = rows[-1][0]
+            print(f"✅ Converted {converted}/{remaining} embeddings")
+
+        conn.close()
+
+        if failed_ids:
+            print(f"⚠️  {len(failed_ids)} embeddings could not be converted: {failed_ids}")
+            print("   Regenerate them with POST /api/embeddings/update-all")
+
+        print("✅ Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    run_migration(int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE)
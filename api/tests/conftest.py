@@ -6,7 +6,22 @@ from sqlalchemy.pool import StaticPool
 import os
 import tempfile
 
+# The app's own engine is never used for test data; keep shutdown hooks off the real database file
+os.environ["DATABASE_URL"] = "sqlite://"
+# Tests drain the embedding queue explicitly instead of racing a background task
+os.environ["EMBEDDING_QUEUE_WORKER"] = "false"
+# Real embeddings without a model server
+os.environ["EMBEDDING_BACKEND"] = "hashing"
+# Model calls are faked per test; a persistent vector cache would carry results across tests
+os.environ["EMBEDDING_CACHE_SIZE"] = "0"
+
 from app.database import get_db, Base
+from app.services.embedding_service import embedding_service
+from app.services.embedding_queue import embedding_queue
+from app.services.circuit_breaker import ollama_breaker
+from app.services.model_versions import model_versions
+from app.services.chunk_service import chunk_service
+from app.services.refresh_jobs import refresh_jobs
 from main import app
 
 # Create in-memory SQLite database for testing
@@ -27,12 +42,21 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+embedding_queue.session_factory = TestingSessionLocal
+model_versions.session_factory = TestingSessionLocal
+refresh_jobs.session_factory = TestingSessionLocal
 
 @pytest.fixture
 def client():
     """Create a test client with an in-memory database."""
     # Create tables
     Base.metadata.create_all(bind=engine)
+    embedding_service.reset_index()
+    chunk_service.reset_index()
+    with TestingSessionLocal() as db:
+        embedding_service.sync_models(db)  # back to the default model
+    embedding_service.query_cache.clear()
+    ollama_breaker.reset()
     
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,91 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Tag, Embedding
+from app.services.cache_service import GenerationCache, table_generation
+from app.services.embedding_service import embedding_service
+
+def _generation(db_session: Session, *tables: str):
+    # A fresh read, not the value memoized on the session
+    db_session.info.clear()
+    return table_generation(db_session, *tables)
+
+def test_writes_bump_table_generations(client: TestClient, db_session: Session, sample_idea_data):
+    """Test that API writes advance the generation of every table they touch."""
+    before = _generation(db_session, "ideas", "tags", "idea_tags")
+    response = client.post("/api/ideas", json=sample_idea_data)
+    assert response.status_code == 201
+    after = _generation(db_session, "ideas", "tags", "idea_tags")
+    assert all(new != old for new, old in zip(after, before))
+
+    # Editing a column leaves the tag tables alone
+    idea_id = response.json()["data"]["id"]
+    idea = db_session.get(Idea, idea_id)
+    idea.title = "Renamed"
+    db_session.commit()
+    renamed = _generation(db_session, "ideas", "tags", "idea_tags")
+    assert renamed[0] > after[0]
+    assert renamed[1:] == after[1:]
+
+def test_bulk_delete_bumps_generation(client: TestClient, db_session: Session):
+    """Test that query-level deletes, which skip the flush, still bump the counter."""
+    db_session.add(Tag(name="temporary"))
+    db_session.commit()
+    before = _generation(db_session, "tags")
+    db_session.query(Tag).filter(Tag.name == "temporary").delete()
+    db_session.commit()
+    assert _generation(db_session, "tags") != before
+
+def test_generation_cache_rebuilds_only_after_writes(client: TestClient, db_session: Session):
+    """Test that a cached value is reused until its table is written."""
+    cache = GenerationCache("tags")
+    calls = []
+
+    def build(db):
+        calls.append(1)
+        return sorted(tag.name for tag in db.query(Tag).all())
+
+    assert cache.get(db_session, build) == []
+    db_session.info.clear()
+    assert cache.get(db_session, build) == []
+    assert len(calls) == 1
+
+    db_session.add(Tag(name="fresh"))
+    db_session.commit()
+    assert cache.get(db_session, build) == ["fresh"]
+    assert len(calls) == 2
+
+def test_cached_endpoints_see_other_workers_writes(client: TestClient, db_session: Session):
+    """Test that writes made outside this process's request path reach cached endpoints."""
+    assert client.get("/api/categories").json()["data"] == []
+    assert client.get("/api/tags").json()["data"] == []
+
+    # Another worker writes straight to the shared database
+    db_session.add(Idea(title="Elsewhere", category="research", tags=[Tag(name="shared")]))
+    db_session.commit()
+
+    assert client.get("/api/categories").json()["data"] == ["research"]
+    assert [tag["name"] for tag in client.get("/api/tags").json()["data"]] == ["shared"]
+
+def test_vector_index_catches_up_with_other_workers(client: TestClient, db_session: Session):
+    """Test that the loaded similarity index picks up embeddings written by another worker."""
+    ideas = [Idea(title=f"Idea {i}") for i in range(3)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    vector = np.ones(384, dtype=np.float32)
+    db_session.add(Embedding(idea_id=ideas[0].id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.add(Embedding(idea_id=ideas[1].id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.commit()
+
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id]
+
+    db_session.query(Embedding).filter(Embedding.idea_id == ideas[1].id).delete()
+    db_session.add(Embedding(idea_id=ideas[2].id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.commit()
+
+    # Live search, so the (unmaintained) neighbor table is not consulted
+    response = client.get(f"/api/ideas/{ideas[0].id}/related?exact=true")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[2].id]
+    assert embedding_service.index.ids() == {ideas[0].id, ideas[2].id}
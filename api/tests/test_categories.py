@@ -73,12 +73,19 @@ def test_get_tags_with_data(client: TestClient, sample_idea_data: dict):
         assert "id" in tag
         assert "name" in tag
 
-def test_update_embeddings_placeholder(client: TestClient):
-    """Test the embeddings update endpoint (placeholder)."""
-    response = client.post("/api/embeddings/update-all")
+def test_update_embeddings_runs_background_job(client: TestClient, sample_idea_data):
+    """Test that the embeddings update endpoint starts a job and reports its progress."""
+    client.post("/api/ideas", json=sample_idea_data)
+    response = client.post("/api/embeddings/update-all?force=true")
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
     assert data["message"] == "Embedding update initiated"
-    assert "note" in data
-    assert "placeholder" in data["note"] 
\ No newline at end of file
+    
+    # TestClient runs the background job before returning
+    status = client.get("/api/embeddings/update-all").json()["data"]
+    assert status["id"] == data["data"]["id"]
+    assert status["status"] == "completed"
+    assert status["processed"] == status["total"] == 1
+    assert status["embedded"] == 1
+    assert status["failed"] == 0
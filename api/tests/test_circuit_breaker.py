@@ -0,0 +1,83 @@
+import requests
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import EmbeddingJob
+from app.services.circuit_breaker import CircuitBreaker, ollama_breaker
+from app.services.embedding_queue import embedding_queue
+from app.services.embedding_service import OllamaEmbeddingService
+from app.services.http_clients import http_clients
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_probes_and_recovers():
+    """Test the closed -> open -> half-open -> closed cycle."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats()["retry_in_seconds"] == 10
+
+    # One probe after the timeout; a failed probe re-opens immediately
+    clock.now += 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.stats()["rejected_calls"] == 2
+
+def test_client_errors_do_not_trip_breaker():
+    """Test that only connection failures and 5xx responses count."""
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    response = requests.Response()
+    response.status_code = 404
+    breaker.record_error(requests.exceptions.HTTPError(response=response))
+    assert breaker.state == "closed"
+    breaker.record_error(requests.exceptions.ConnectionError("refused"))
+    assert breaker.state == "open"
+
+    # Errors that are not about the server neither close the breaker nor reset the count
+    breaker.record_error(ValueError("Expecting value: line 1 column 1"))
+    breaker.record_error(KeyError("embeddings"))
+    assert breaker.state == "open"
+    assert breaker.failures == 1
+
+def test_ollama_outage_fails_fast_and_pauses_queue(client: TestClient, db_session: Session, sample_idea_data, monkeypatch):
+    """Test that embeddings stop hitting a dead server and queued work waits for recovery."""
+    attempts = []
+    def refuse(*args, **kwargs):
+        attempts.append(args)
+        raise requests.exceptions.ConnectionError("connection refused")
+    monkeypatch.setattr(http_clients.ollama, "post", refuse)
+
+    service = OllamaEmbeddingService()
+    for text in ["one", "two", "three", "four", "five"]:
+        assert service.generate_embedding(text) is None
+    assert len(attempts) == ollama_breaker.failure_threshold
+
+    # CRUD still works; the embedding job stays queued without burning attempts
+    response = client.post("/api/ideas", json=sample_idea_data)
+    assert response.status_code == 201
+    assert embedding_queue.process_pending() == 0
+    job = db_session.query(EmbeddingJob).one()
+    assert job.attempts == 0
+
+    health = client.get("/api/system/health").json()["data"]
+    assert health["status"] == "degraded"
+    assert health["ollama"]["state"] == "open"
+    assert health["embedding_queue"]["paused"] is True
+    ollama_breaker.reset()
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.database import configure_sqlite, optimize_database
+
+def test_sqlite_profile_applies_to_every_connection(tmp_path):
+    """Test that new connections get WAL mode and the rest of the profile, and optimize runs."""
+    engine = create_engine(f"sqlite:///{tmp_path}/profile.db", connect_args={"check_same_thread": False})
+    configure_sqlite(engine)
+
+    with engine.connect() as first, engine.connect() as second:
+        for conn in (first, second):
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+    optimize_database(engine)
+
+    # An empty value leaves SQLite's default in place
+    plain = create_engine(f"sqlite:///{tmp_path}/plain.db")
+    configure_sqlite(plain, {"journal_mode": "", "synchronous": "OFF"})
+    with plain.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+
+@pytest.mark.parametrize("pragmas", [
+    {"synchronous": "OFF; DROP TABLE ideas"},
+    {"busy_timeout": "5000.5"},
+    {"writable_schema": "ON"},
+])
+def test_sqlite_profile_rejects_unsafe_pragmas(tmp_path, pragmas):
+    """Test that only known pragmas with integer or keyword values reach the connection."""
+    engine = create_engine(f"sqlite:///{tmp_path}/checked.db")
+    with pytest.raises(ValueError):
+        configure_sqlite(engine, pragmas)
+
+    configure_sqlite(engine, {"cache_size": " -2000 "})
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -2000
@@ -0,0 +1,117 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import DocumentChunk
+from app.services.chunk_service import chunk_service, split_into_chunks
+from app.services.embedding_queue import embedding_queue
+from app.services.embedding_service import embedding_service
+
+TOPICS = ["photosynthesis", "robotics", "pottery"]
+
+def _topic_vector(text: str) -> list:
+    """One axis per topic word in the text, so similarity means a shared topic"""
+    vector = np.zeros(384)
+    for position, topic in enumerate(TOPICS):
+        if topic in text.lower():
+            vector[position] = 1.0
+    if not vector.any():
+        vector[383] = 1.0
+    return vector.tolist()
+
+def _fake_model(monkeypatch, calls: list):
+    def single(text, model=None):
+        calls.append(text)
+        return _topic_vector(text)
+
+    def batch(texts, model=None):
+        calls.extend(texts)
+        return [_topic_vector(text) for text in texts]
+
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", single)
+    monkeypatch.setattr(embedding_service, "_call_ollama_batch", batch)
+
+def _create_idea(client: TestClient, title: str) -> int:
+    return client.post("/api/ideas", json={"title": title, "description": title, "category": "research", "tags": []}).json()["data"]["id"]
+
+def test_split_into_chunks_overlaps_and_is_stable():
+    """Test that windows respect the size, overlap, and survive an edit further down."""
+    paragraphs = [f"Paragraph {i} " + "word " * 30 for i in range(12)]
+    text = "\n\n".join(paragraphs)
+    chunks = split_into_chunks(text, 400, 200)
+
+    assert len(chunks) > 1
+    assert all(end - start <= 400 for start, end in chunks)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text.rstrip())
+    for (_, previous_end), (next_start, _) in zip(chunks, chunks[1:]):
+        assert next_start < previous_end  # consecutive windows share text
+
+    edited = "\n\n".join(paragraphs[:-1] + ["A rewritten closing paragraph"])
+    # Only the windows holding (or able to grow into) the last paragraph move
+    assert split_into_chunks(edited, 400, 200)[:-1] == chunks[:-2]
+
+    # A paragraph longer than a window is cut at sentence ends
+    long_text = "This is a sentence. " * 50
+    assert all(end - start <= 100 for start, end in split_into_chunks(long_text, 100, 20))
+
+def test_document_chunks_are_embedded_incrementally(client: TestClient, db_session: Session, monkeypatch):
+    """Test that documents are chunked via the queue and edits only re-embed changed chunks."""
+    calls = []
+    _fake_model(monkeypatch, calls)
+    monkeypatch.setattr(chunk_service, "chunk_size", 300)
+    monkeypatch.setattr(chunk_service, "chunk_overlap", 100)
+    idea_id = _create_idea(client, "Garden notes")
+    embedding_queue.process_pending()
+
+    paragraphs = [f"Section {i}. " + "Notes on soil and water. " * 5 for i in range(8)]
+    response = client.post(f"/api/ideas/{idea_id}/documents", json={
+        "title": "Research", "content": "\n\n".join(paragraphs), "document_type": "uploaded"
+    })
+    document_id = response.json()["data"]["id"]
+    assert db_session.query(DocumentChunk).count() == 0  # queued, not embedded inline
+
+    calls.clear()
+    assert embedding_queue.process_pending() == 1
+    chunks = db_session.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).all()
+    assert len(chunks) > 2
+    assert len(calls) == len(chunks)
+    assert all(chunk.idea_id == idea_id and chunk.model == embedding_service.model_name for chunk in chunks)
+
+    # Rewrite the last paragraph: earlier chunks keep their rows and vectors
+    original_ids = {chunk.chunk_index: chunk.id for chunk in chunks}
+    edited = "\n\n".join(paragraphs[:-1] + ["Section 7. A completely different ending."])
+    calls.clear()
+    client.put(f"/api/ideas/{idea_id}/documents/{document_id}", json={"content": edited})
+    embedding_queue.process_pending()
+    db_session.expire_all()
+    updated = db_session.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).all()
+    assert 0 < len(calls) < len(chunks)
+    assert {chunk.chunk_index: chunk.id for chunk in updated}[0] == original_ids[0]
+
+    client.delete(f"/api/ideas/{idea_id}/documents/{document_id}")
+    assert db_session.query(DocumentChunk).count() == 0
+
+def test_search_and_related_match_document_chunks(client: TestClient, db_session: Session, monkeypatch):
+    """Test that an idea is found through what its documents say."""
+    calls = []
+    _fake_model(monkeypatch, calls)
+    plants = _create_idea(client, "Photosynthesis in window boxes")
+    gadgets = _create_idea(client, "Robotics kit")
+    _create_idea(client, "Pottery wheel")
+    client.post(f"/api/ideas/{gadgets}/documents", json={
+        "title": "Sensors", "content": "A robot that measures photosynthesis rates in leaves.", "document_type": "uploaded"
+    })
+    embedding_queue.process_pending()
+
+    results = client.get("/api/search/semantic?q=photosynthesis&min_similarity=0.5").json()["data"]["results"]
+    assert {result["id"] for result in results} == {plants, gadgets}
+
+    related = client.get(f"/api/ideas/{plants}/related").json()["data"]
+    assert [entry["idea_id"] for entry in related] == [gadgets]
+    assert related[0]["similarity"] > 0.5
+
+    # Deleting the idea takes its documents' chunks out of the index
+    client.delete(f"/api/ideas/{gadgets}")
+    assert db_session.query(DocumentChunk).count() == 0
+    results = client.get("/api/search/semantic?q=photosynthesis&min_similarity=0.5").json()["data"]["results"]
+    assert [result["id"] for result in results] == [plants]
@@ -0,0 +1,68 @@
+import numpy as np
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Embedding, EmbeddingJob
+from app.services.embedding_queue import embedding_queue
+from app.services.embedding_service import embedding_service
+
+def _fake_ollama(calls: list, result=True):
+    def call(text, model=None):
+        calls.append(text)
+        return np.ones(384).tolist() if result else None
+    return call
+
+def test_writes_enqueue_instead_of_embedding(client: TestClient, db_session: Session, sample_idea_data, monkeypatch):
+    """Test that create/update return without calling the model and repeated edits coalesce."""
+    calls = []
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", _fake_ollama(calls))
+
+    idea_id = client.post("/api/ideas", json=sample_idea_data).json()["data"]["id"]
+    client.put(f"/api/ideas/{idea_id}", json={"title": "Edited once"})
+    client.put(f"/api/ideas/{idea_id}", json={"title": "Edited twice"})
+    assert calls == []
+
+    status = client.get("/api/system/embedding-queue").json()["data"]
+    assert status["depth"] == 1
+    assert status["lag_seconds"] >= 0
+
+    assert embedding_queue.process_pending() == 1
+    assert len(calls) == 1 and "Edited twice" in calls[0]
+    assert db_session.query(Embedding).filter(Embedding.idea_id == idea_id).count() == 1
+    assert db_session.query(EmbeddingJob).count() == 0
+
+def test_failed_jobs_back_off(client: TestClient, db_session: Session, sample_idea_data, monkeypatch):
+    """Test that a failed job stays queued with a retry delay."""
+    calls = []
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", _fake_ollama(calls, result=False))
+    client.post("/api/ideas", json=sample_idea_data)
+
+    assert embedding_queue.process_pending() == 1
+    job = db_session.query(EmbeddingJob).one()
+    assert job.attempts == 1
+    assert job.available_at > datetime.utcnow()
+
+    # Not retried before the delay expires
+    assert embedding_queue.process_pending() == 0
+    assert len(calls) == 1
+    assert client.get("/api/system/embedding-queue").json()["data"]["retrying"] == 1
+
+def test_request_during_processing_keeps_job(client: TestClient, db_session: Session, sample_idea_data, monkeypatch):
+    """Test that an edit arriving mid-embedding is not lost when the job finishes."""
+    idea_id = client.post("/api/ideas", json=sample_idea_data).json()["data"]["id"]
+    calls = []
+
+    def edit_while_embedding(text, model=None):
+        calls.append(text)
+        if len(calls) == 1:
+            db_session.query(Idea).filter(Idea.id == idea_id).update({"title": "Edited mid-embedding"})
+            embedding_queue.enqueue(db_session, idea_id)
+            db_session.commit()
+        return np.ones(384).tolist()
+
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", edit_while_embedding)
+    # The re-queued job is picked up in the same drain
+    assert embedding_queue.process_pending() == 2
+    assert len(calls) == 2
+    assert db_session.query(EmbeddingJob).count() == 0
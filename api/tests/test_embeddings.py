@@ -0,0 +1,288 @@
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Embedding
+from app.services.embedding_service import embedding_service, OllamaEmbeddingService, HashingEmbeddingService, HASHING_MODEL, create_embedding_service
+from app.services.hashing_embedder import HashingEmbedder
+from app.services.hnsw_index import HNSWIndex
+from app.services.http_clients import http_clients
+from app.services.mapped_vector_index import MappedVectorIndex
+from app.services.vector_index import VectorIndex
+
+def _unit_vector(seed: int, dimension: int = 384) -> np.ndarray:
+    """Deterministic normalized vector for tests."""
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_pack_unpack_roundtrip(client: TestClient, db_session: Session):
+    """Test that vectors survive the binary column round trip."""
+    idea = Idea(title="Packed Idea")
+    db_session.add(idea)
+    db_session.commit()
+
+    vector = _unit_vector(1)
+    db_session.add(Embedding(
+        idea_id=idea.id,
+        model=embedding_service.model_name,
+        embedding=embedding_service.pack_vector(vector),
+        dtype="float32",
+        dimension=384
+    ))
+    db_session.commit()
+
+    stored = db_session.query(Embedding).filter(Embedding.idea_id == idea.id).first()
+    assert isinstance(stored.embedding, bytes)
+    assert len(stored.embedding) == 384 * 4
+    np.testing.assert_array_equal(embedding_service.unpack_vector(stored), vector)
+
+def test_unpack_rejects_dimension_mismatch(client: TestClient, db_session: Session):
+    """Test that a blob whose length disagrees with its dimension is rejected."""
+    embedding = Embedding(
+        idea_id=1,
+        embedding=embedding_service.pack_vector(_unit_vector(2, dimension=10)),
+        dtype="float32",
+        dimension=384
+    )
+    with pytest.raises(ValueError):
+        embedding_service.unpack_vector(embedding)
+
+def _store_embedding(db_session: Session, idea_id: int, vector: np.ndarray):
+    db_session.add(Embedding(
+        idea_id=idea_id,
+        model=embedding_service.model_name,
+        embedding=embedding_service.pack_vector(vector),
+        dtype="float32",
+        dimension=vector.shape[0]
+    ))
+
+def test_get_similar_ideas_uses_index(client: TestClient, db_session: Session):
+    """Test ranking of related ideas from stored vectors."""
+    base = _unit_vector(10)
+    ideas = [Idea(title=f"Idea {i}", category="technology") for i in range(4)]
+    db_session.add_all(ideas)
+    db_session.commit()
+
+    # Progressively less similar vectors
+    noise = _unit_vector(11)
+    for weight, idea in zip([0.0, 0.2, 0.6, 3.0], ideas):
+        _store_embedding(db_session, idea.id, base + weight * noise)
+    db_session.commit()
+
+    response = client.get(f"/api/ideas/{ideas[0].id}/related?limit=2&min_similarity=0.0")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [item["idea_id"] for item in data] == [ideas[1].id, ideas[2].id]
+    assert data[0]["similarity"] >= data[1]["similarity"]
+
+def test_deleted_idea_leaves_index(client: TestClient, db_session: Session):
+    """Test that deleting an idea removes it from related results."""
+    ideas = [Idea(title=f"Idea {i}") for i in range(2)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    _store_embedding(db_session, ideas[0].id, _unit_vector(20))
+    _store_embedding(db_session, ideas[1].id, _unit_vector(20))
+    db_session.commit()
+
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id]
+
+    assert client.delete(f"/api/ideas/{ideas[1].id}").status_code == 200
+    assert ideas[1].id not in embedding_service.index
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert response.json()["data"] == []
+
+def test_persistent_index_catches_up_after_restart(client: TestClient, db_session: Session, tmp_path):
+    """Test that a restored HNSW snapshot applies writes made after it was saved."""
+    service = OllamaEmbeddingService(embedding_service.model_name)
+    service.index = HNSWIndex(384, m=8)
+    service.index_path = str(tmp_path / "index.npz")
+
+    ideas = [Idea(title=f"Idea {i}") for i in range(3)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    _store_embedding(db_session, ideas[0].id, _unit_vector(30))
+    _store_embedding(db_session, ideas[1].id, _unit_vector(31))
+    db_session.commit()
+
+    service.load_index(db_session)
+    assert (tmp_path / "index.npz").exists()
+
+    # Writes made while the process is down
+    db_session.query(Embedding).filter(Embedding.idea_id == ideas[1].id).delete()
+    _store_embedding(db_session, ideas[2].id, _unit_vector(32))
+    db_session.commit()
+
+    restarted = OllamaEmbeddingService(embedding_service.model_name)
+    restarted.index = HNSWIndex(384, m=8)
+    restarted.index_path = service.index_path
+    restarted.load_index(db_session)
+    assert restarted.index.ids() == {ideas[0].id, ideas[2].id}
+
+    results = restarted.get_similar_ideas(db_session, ideas[2].id, min_similarity=-1.0, exact=True)
+    assert [item["idea_id"] for item in results] == [ideas[0].id]
+
+def test_mapped_index_picks_up_writes_from_workers_without_it(client: TestClient, db_session: Session, tmp_path):
+    """Test that rows stored by a worker that never mapped the shared matrix still reach it."""
+    path = str(tmp_path / "matrix")
+    worker = OllamaEmbeddingService(embedding_service.model_name)
+    worker.index = MappedVectorIndex(path, 384)
+    worker.index_path = path
+
+    ideas = [Idea(title=f"Idea {i}") for i in range(2)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    _store_embedding(db_session, ideas[0].id, _unit_vector(50))
+    db_session.commit()
+    worker.load_index(db_session)
+
+    # Another worker, whose index is not loaded, only writes the table
+    _store_embedding(db_session, ideas[1].id, _unit_vector(51))
+    db_session.commit()
+    db_session.info.clear()  # a new request reads fresh generations
+    assert worker.load_index(db_session).ids() == {ideas[0].id, ideas[1].id}
+
+def test_quantized_index_reranks_to_exact_results(client: TestClient, db_session: Session):
+    """Test that int8 storage returns the same related ideas and scores as float32."""
+    ideas = [Idea(title=f"Idea {i}") for i in range(30)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    base = _unit_vector(40)
+    for i, idea in enumerate(ideas):
+        _store_embedding(db_session, idea.id, base + 0.1 * i * _unit_vector(100 + i))
+    db_session.commit()
+
+    expected = embedding_service.get_similar_ideas(db_session, ideas[0].id, limit=5, min_similarity=0.0)
+
+    service = OllamaEmbeddingService(embedding_service.model_name)
+    service.index = VectorIndex(384, storage="int8")
+    results = service.get_similar_ideas(db_session, ideas[0].id, limit=5, min_similarity=0.0)
+
+    assert [item["idea_id"] for item in results] == [item["idea_id"] for item in expected]
+    for result, reference in zip(results, expected):
+        assert result["similarity"] == pytest.approx(reference["similarity"], abs=1e-5)
+
+def test_unchanged_embeddings_are_skipped(client: TestClient, db_session: Session, monkeypatch):
+    """Test that regeneration is skipped until the embedded text or the model changes."""
+    calls = []
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", lambda text, model=None: calls.append(text) or _unit_vector(len(calls)).tolist())
+    monkeypatch.setattr(embedding_service, "_call_ollama_batch", lambda texts, model=None: [embedding_service._call_ollama_api(text, model) for text in texts])
+    ideas = [Idea(title=f"Fingerprinted Idea {i}") for i in range(3)]
+    db_session.add_all(ideas)
+    db_session.commit()
+
+    result = embedding_service.update_all_embeddings(db_session)
+    assert result["successful_updates"] == 3 and result["skipped_updates"] == 0
+    stored = db_session.query(Embedding).filter(Embedding.idea_id == ideas[0].id).one()
+    assert stored.model == embedding_service.model_name
+    assert stored.content_hash == embedding_service.content_hash("Fingerprinted Idea 0")
+
+    calls.clear()
+    ideas[0].title = "Renamed Idea"
+    ideas[1].status = "completed"  # Not part of the embedded text
+    db_session.commit()
+    result = embedding_service.update_all_embeddings(db_session)
+    assert result["successful_updates"] == 1 and result["skipped_updates"] == 2
+    assert calls == ["Renamed Idea"]
+
+    # A different model invalidates every fingerprint; force ignores them
+    monkeypatch.setattr(embedding_service, "model_name", "other-model")
+    assert embedding_service.update_all_embeddings(db_session)["successful_updates"] == 3
+    assert embedding_service.update_idea_embedding(db_session, ideas[2]) and len(calls) == 4
+    assert embedding_service.update_all_embeddings(db_session, force=True)["skipped_updates"] == 0
+    assert len(calls) == 7
+
+def test_status_update_does_not_enqueue(client: TestClient, db_session: Session, sample_idea_data):
+    """Test that editing fields outside the embedded text leaves the embedding alone."""
+    from app.models.idea import EmbeddingJob
+    idea_id = client.post("/api/ideas", json=sample_idea_data).json()["data"]["id"]
+    db_session.query(EmbeddingJob).delete()
+    db_session.commit()
+
+    response = client.put(f"/api/ideas/{idea_id}", json={"status": "completed"})
+    assert {tag["name"] for tag in response.json()["data"]["tags"]} == {"test", "api"}
+    assert db_session.query(EmbeddingJob).count() == 0
+    client.put(f"/api/ideas/{idea_id}", json={"tags": ["new-tag"]})
+    assert db_session.query(EmbeddingJob).count() == 1
+
+def test_bulk_refresh_batches_requests(client: TestClient, db_session: Session, monkeypatch):
+    """Test that a bulk refresh sends batch_size texts per request and commits every batch."""
+    batches = []
+    def fake_batch(texts, model=None):
+        batches.append(list(texts))
+        if any("Broken" in text for text in texts):
+            return None
+        return [_unit_vector(len(text)).tolist() for text in texts]
+    monkeypatch.setattr(embedding_service, "_call_ollama_batch", fake_batch)
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", lambda text, model=None: pytest.fail("single-text call in bulk path"))
+    monkeypatch.setattr(embedding_service, "batch_size", 2)
+    monkeypatch.setattr(embedding_service, "max_concurrency", 2)
+    db_session.add_all([Idea(title=f"Batched Idea {i}") for i in range(4)] + [Idea(title="Broken Idea")])
+    db_session.commit()
+
+    result = embedding_service.update_all_embeddings(db_session)
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert result["successful_updates"] == 4
+    assert result["failed_updates"] == 1
+    assert db_session.query(Embedding).count() == 4
+
+def test_batch_call_parses_embed_response(monkeypatch):
+    """Test the /api/embed payload, and the fallback for servers without it."""
+    class FakeResponse:
+        def __init__(self, status_code, data=None):
+            self.status_code = status_code
+            self.data = data
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return self.data
+
+    requests_sent = []
+    def fake_post(url, json, timeout):
+        requests_sent.append((url, json))
+        return FakeResponse(200, {"embeddings": [[3.0, 4.0] for _ in json["input"]]})
+    monkeypatch.setattr(http_clients.ollama, "post", fake_post)
+
+    service = OllamaEmbeddingService()
+    assert service.generate_embeddings(["first", "  ", "second"]) == [[0.6, 0.8], None, [0.6, 0.8]]
+    assert requests_sent == [(f"{service.base_url}/api/embed", {"model": service.model_name, "input": ["first", "second"]})]
+
+    monkeypatch.setattr(http_clients.ollama, "post", lambda url, json, timeout: FakeResponse(404))
+    monkeypatch.setattr(service, "_call_ollama_api", lambda text, model=None: [1.0, 0.0])
+    assert service.generate_embeddings(["old server"]) == [[1.0, 0.0]]
+
+def test_hashing_embedder_is_deterministic_and_topical():
+    """Test that hashed vectors are stable, unit length, and closer for texts sharing terms."""
+    embedder = HashingEmbedder(384)
+    garden = embedder.embed("Vertical herb garden for the kitchen window")
+    assert garden.shape == (384,) and garden.dtype == np.float32
+    assert np.linalg.norm(garden) == pytest.approx(1.0, abs=1e-5)
+    assert np.array_equal(garden, HashingEmbedder(384).embed("Vertical herb garden for the kitchen window"))
+
+    gardening = embedder.embed("Kitchen window herb gardening")
+    firmware = embedder.embed("Robot vacuum firmware update")
+    assert garden @ gardening > 0.4
+    assert garden @ gardening > garden @ firmware + 0.3
+    assert embedder.embed("?!") is None
+
+def test_hashing_backend_runs_pipeline_offline(client: TestClient, db_session: Session, monkeypatch):
+    """Test that EMBEDDING_BACKEND=hashing embeds, searches and relates ideas without a server."""
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    service = create_embedding_service()
+    assert isinstance(service, HashingEmbeddingService)
+    assert service.model_name == HASHING_MODEL
+    assert service.generate_embedding("probe", "nomic-embed-text") is None  # only its own vectors
+
+    titles = ["Herb garden planter", "Herb garden watering", "Bicycle repair stand"]
+    ideas = [Idea(title=title, description=title) for title in titles]
+    db_session.add_all(ideas)
+    db_session.commit()
+    result = service.update_all_embeddings(db_session)
+    assert result["successful_updates"] == 3
+
+    related = service.get_similar_ideas(db_session, ideas[0].id, min_similarity=0.2)
+    assert [item["idea_id"] for item in related] == [ideas[1].id]
+    matches = service.search_ideas(db_session, "bicycle repair", limit=1)
+    assert matches[0][0] == ideas[2].id
+
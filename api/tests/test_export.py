@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.models.idea import Tag
+
 @pytest.fixture
 def sample_idea(client: TestClient, db_session: Session, sample_idea_data):
     """Create a sample idea for testing."""
@@ -116,6 +118,24 @@ def test_import_ideas_with_duplicates(client: TestClient, db_session: Session):
     data = response.json()
     assert data["success"] == True
 
+def test_import_ideas_reports_malformed_tags(client: TestClient, db_session: Session):
+    """Test that an entry with malformed tags is reported in errors and not imported."""
+    import_data = [
+        {"title": "Good", "tags": ["kept"]},
+        {"title": "Number tag", "tags": ["fine", 5]},
+        {"title": "String tags", "tags": "not-a-list"},
+    ]
+    response = client.post("/api/export/import/ideas", json=import_data)
+    data = response.json()["data"]
+    assert data["imported_count"] == 1
+    assert len(data["errors"]) == 2
+    assert "Number tag" in data["errors"][0] and "String tags" in data["errors"][1]
+    assert all("tags must be a list of strings" in error for error in data["errors"])
+    titles = [idea["title"] for idea in client.get("/api/ideas").json()["data"]]
+    assert titles == ["Good"]
+    # Names from a rejected entry don't leave tags behind
+    assert [tag.name for tag in db_session.query(Tag)] == ["kept"]
+
 def test_import_ideas_empty_data(client: TestClient, db_session: Session):
     """Test importing ideas with empty data."""
     import_data = []
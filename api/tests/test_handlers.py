@@ -0,0 +1,73 @@
+import ast
+import asyncio
+import inspect
+import json
+import textwrap
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.services.http_clients import http_clients
+from main import app
+
+def _uses_db(dependant) -> bool:
+    return any(sub.call is get_db or _uses_db(sub) for sub in dependant.dependencies)
+
+def _awaits(function) -> bool:
+    """Whether the function body awaits anything (await, async for, async with)"""
+    tree = ast.parse(textwrap.dedent(inspect.getsource(function)))
+    return any(isinstance(node, (ast.Await, ast.AsyncFor, ast.AsyncWith)) for node in ast.walk(tree))
+
+def test_database_handlers_run_on_the_thread_pool():
+    """Test that an async handler only uses the database session if it awaits other work."""
+    on_loop = [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute)
+        and asyncio.iscoroutinefunction(route.endpoint)
+        and _uses_db(route.dependant)
+        and not _awaits(route.endpoint)
+    ]
+    assert on_loop == []
+
+def test_ollama_calls_leave_the_event_loop(client: TestClient, monkeypatch):
+    """Test that chat and document generation make their blocking Ollama calls off the event loop."""
+    on_loop = []
+
+    class FakeResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_lines(self):
+            yield json.dumps({"message": {"content": "Hello"}}).encode()
+
+        def json(self):
+            return {"response": "# Overview"}
+
+    def post(url, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(url)
+        except RuntimeError:
+            pass  # a worker thread
+        return FakeResponse()
+
+    monkeypatch.setattr(http_clients.ollama, "post", post)
+    body = {
+        "messages": [{"role": "user", "content": "Hi"}],
+        "idea": {"title": "Garden"},
+        "documents": [],
+        "model_provider": "ollama",
+        "model_name": "llama2"
+    }
+    response = client.post("/api/chat/project-overview", json=body)
+    assert "Hello" in response.text
+    response = client.post("/api/chat/generate-document", json={**body, "template": "overview"})
+    assert response.status_code == 200
+    assert on_loop == []
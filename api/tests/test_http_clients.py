@@ -0,0 +1,62 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.ai_service import AIService
+from app.services.embedding_service import OllamaEmbeddingService
+from app.services.http_clients import http_clients
+
+def _fake_ollama():
+    """Local Ollama stand-in that records the client port of every request."""
+    ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            ports.append(self.client_address[1])
+            body = json.dumps({"embedding": [1.0, 0.0]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, ports
+
+def test_ollama_calls_reuse_one_connection():
+    """Test that consecutive embedding calls share a pooled keep-alive connection."""
+    server, ports = _fake_ollama()
+    try:
+        service = OllamaEmbeddingService(base_url=f"http://127.0.0.1:{server.server_port}")
+        for text in ["one", "two", "three"]:
+            assert service.generate_embedding(text) == [1.0, 0.0]
+        assert len(ports) == 3
+        assert len(set(ports)) == 1
+
+        # After shutdown closes the pool, the next call opens a fresh connection
+        http_clients.close()
+        assert service.generate_embedding("four") == [1.0, 0.0]
+        assert len(set(ports)) == 2
+    finally:
+        server.shutdown()
+        http_clients.close()
+
+def test_openai_client_follows_shared_pool(monkeypatch):
+    """Test that the OpenAI client uses the shared httpx client and is rebuilt after close."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    service = AIService()
+    first = service.openai_client
+    assert service.openai_client is first
+    assert service._openai_http_client is http_clients.openai
+
+    http_clients.close()
+    assert service.openai_client is not first
+    assert not service._openai_http_client.is_closed
+    http_clients.close()
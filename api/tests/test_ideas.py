@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.services.embedding_queue import embedding_queue
+
 def test_get_all_ideas_empty(client: TestClient):
     """Test getting all ideas when database is empty."""
     response = client.get("/api/ideas")
@@ -155,6 +157,9 @@ def test_get_related_ideas(client: TestClient, sample_idea_data: dict):
     create_response = client.post("/api/ideas", json=idea2)
     idea_id = create_response.json()["data"]["id"]
     
+    # Embeddings are generated by the background queue
+    embedding_queue.process_pending()
+    
     # Get related ideas
     response = client.get(f"/api/ideas/{idea_id}/related")
     assert response.status_code == 200
@@ -0,0 +1,107 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Embedding, EmbeddingModel
+from app.services.embedding_queue import embedding_queue
+from app.services.embedding_service import embedding_service
+from app.services.model_versions import model_versions
+
+NEW_MODEL = "nomic-embed-text"
+NEW_DIMENSION = 8
+
+def _fake_models(monkeypatch, calls: list):
+    """Two fake models with different output sizes; records (model, text) per call."""
+    def vector(text, model):
+        dimension = NEW_DIMENSION if model == NEW_MODEL else embedding_service.default_dimension
+        return np.random.default_rng(abs(hash((text, model))) % 2 ** 32).standard_normal(dimension).tolist()
+
+    def single(text, model=None):
+        calls.append((model or embedding_service.model_name, text))
+        return vector(text, model or embedding_service.model_name)
+
+    def batch(texts, model=None):
+        return [single(text, model) for text in texts]
+
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", single)
+    monkeypatch.setattr(embedding_service, "_call_ollama_batch", batch)
+
+def _seed(db_session: Session, count: int = 3):
+    ideas = [Idea(title=f"Versioned Idea {i}", category="technology") for i in range(count)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    embedding_service.update_all_embeddings(db_session)
+    return ideas
+
+def _models_in_table(db_session: Session):
+    return {model for (model,) in db_session.query(Embedding.model).distinct()}
+
+def test_shadow_build_cuts_over_and_collects_old_model(client: TestClient, db_session: Session, monkeypatch):
+    """Test the full switch: build in the background, activate at 100%, delete the old vectors."""
+    calls = []
+    _fake_models(monkeypatch, calls)
+    ideas = _seed(db_session)
+    old_model = embedding_service.model_name
+
+    response = client.post("/api/embeddings/models", json={"model": NEW_MODEL})
+    assert response.status_code == 200
+
+    # TestClient runs the background build before returning
+    status = client.get("/api/embeddings/models").json()["data"]
+    assert status["active_model"] == NEW_MODEL
+    assert [model["name"] for model in status["models"]] == [NEW_MODEL]
+    assert _models_in_table(db_session) == {NEW_MODEL}
+    assert embedding_service.embedding_dimension == NEW_DIMENSION
+
+    related = client.get(f"/api/ideas/{ideas[0].id}/related?min_similarity=-1").json()["data"]
+    assert len(related) == 2
+    assert old_model not in {model for model, _ in calls[-2:]}
+
+def test_queries_use_active_model_until_cutover(client: TestClient, db_session: Session, monkeypatch):
+    """Test that a partially built model is written to but never searched."""
+    calls = []
+    _fake_models(monkeypatch, calls)
+    _seed(db_session)
+    old_model = embedding_service.model_name
+
+    assert model_versions.start(db_session, NEW_MODEL) is not None
+    assert embedding_service.shadow_model == (NEW_MODEL, NEW_DIMENSION)
+
+    # New ideas are embedded for both models by the queue
+    idea_id = client.post("/api/ideas", json={"title": "Written during the build"}).json()["data"]["id"]
+    embedding_queue.process_pending()
+    assert {row.model for row in db_session.query(Embedding).filter(Embedding.idea_id == idea_id)} == {old_model, NEW_MODEL}
+
+    calls.clear()
+    response = client.get("/api/search/semantic?q=garden")
+    assert response.json()["data"]["search_type"] == "semantic"
+    assert calls == [(old_model, "garden")]
+
+    assert model_versions.coverage(db_session, NEW_MODEL)["missing"] == 3
+    assert not model_versions.cutover(db_session, NEW_MODEL)
+    assert embedding_service.model_name == old_model
+
+    embedding_service.update_all_embeddings(db_session, model=NEW_MODEL)
+    assert model_versions.cutover(db_session, NEW_MODEL)
+    assert embedding_service.model_name == NEW_MODEL
+    assert model_versions.collect_garbage(db_session) == 4
+    assert _models_in_table(db_session) == {NEW_MODEL}
+
+def test_model_endpoint_conflicts_and_cancel(client: TestClient, db_session: Session, monkeypatch):
+    """Test validation, one build at a time, and cancelling a build."""
+    _fake_models(monkeypatch, [])
+    _seed(db_session)
+
+    active = client.post("/api/embeddings/models", json={"model": embedding_service.model_name})
+    assert active.status_code == 400
+    mismatch = client.post("/api/embeddings/models", json={"model": NEW_MODEL, "dimension": 768})
+    assert mismatch.status_code == 400
+
+    model_versions.start(db_session, NEW_MODEL)
+    embedding_service.update_all_embeddings(db_session, model=NEW_MODEL)
+    assert client.post("/api/embeddings/models", json={"model": "another-model"}).status_code == 409
+
+    assert client.delete(f"/api/embeddings/models/{NEW_MODEL}").status_code == 200
+    assert _models_in_table(db_session) == {embedding_service.model_name}
+    assert db_session.query(EmbeddingModel).filter(EmbeddingModel.name == NEW_MODEL).count() == 0
+    assert client.delete(f"/api/embeddings/models/{NEW_MODEL}").status_code == 404
@@ -0,0 +1,145 @@
+import numpy as np
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Embedding, IdeaNeighbor
+from app.services.embedding_service import embedding_service
+from app.services.neighbor_service import NeighborService
+
+def _vector(rng: np.random.Generator) -> np.ndarray:
+    return rng.standard_normal(384).astype(np.float32)
+
+def _write_embedding(db_session: Session, idea_id: int, vector: np.ndarray):
+    """Store a vector the way update_idea_embedding does, minus the Ollama call."""
+    embedding = db_session.get(Embedding, (idea_id, embedding_service.model_name))
+    if embedding is None:
+        embedding = Embedding(idea_id=idea_id, model=embedding_service.model_name)
+        db_session.add(embedding)
+    embedding.embedding = embedding_service.pack_vector(vector)
+    embedding.updated_at = datetime.utcnow()
+    db_session.commit()
+
+def test_incremental_updates_match_brute_force(client: TestClient, db_session: Session):
+    """Test that per-write maintenance keeps every list equal to a full recompute."""
+    service = NeighborService(embedding_service, k=5)
+    rng = np.random.default_rng(7)
+    ideas = [Idea(title=f"Idea {i}") for i in range(25)]
+    db_session.add_all(ideas)
+    db_session.commit()
+
+    for idea in ideas:
+        _write_embedding(db_session, idea.id, _vector(rng))
+        service.update_idea(db_session, idea.id)
+
+    # Re-embed some ideas and delete others
+    for idea in ideas[3:12:2]:
+        _write_embedding(db_session, idea.id, _vector(rng))
+        service.update_idea(db_session, idea.id)
+    for idea in ideas[15:18]:
+        db_session.query(Embedding).filter(Embedding.idea_id == idea.id).delete()
+        db_session.commit()
+        embedding_service.remove_idea_embedding(idea.id)
+        service.remove_idea(db_session, idea.id)
+
+    report = service.check_consistency(db_session)
+    assert report["mismatched"] == []
+    assert report["orphaned"] == []
+    assert report["consistent"]
+    # Only the first idea, embedded when it had no neighbours, waits for a lazy fill
+    assert report["unfilled"] == [ideas[0].id]
+
+def test_update_reads_only_lists_it_can_affect(client: TestClient, db_session: Session, monkeypatch):
+    """Test that an update scores only ideas above the lowest cut-off and groups only their lists."""
+    service = NeighborService(embedding_service, k=3)
+    rng = np.random.default_rng(11)
+    ideas = [Idea(title=f"Idea {i}") for i in range(30)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    for idea in ideas:
+        _write_embedding(db_session, idea.id, _vector(rng))
+    service.rebuild(db_session)
+
+    searches = []
+    original = embedding_service.search_vectors
+    def recording_search(db, vector, limit, **kwargs):
+        results = original(db, vector, limit, **kwargs)
+        searches.append((kwargs.get("min_similarity"), len(results)))
+        return results
+    monkeypatch.setattr(embedding_service, "search_vectors", recording_search)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        _write_embedding(db_session, ideas[0].id, _vector(rng))
+        service.update_idea(db_session, ideas[0].id)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    floor, scored = searches[0]
+    assert floor is not None and scored < len(ideas) - 1
+    assert all(" IN (" in statement for statement in statements if "GROUP BY" in statement)
+    assert service.check_consistency(db_session)["consistent"]
+
+def test_related_reads_precomputed_list(client: TestClient, db_session: Session):
+    """Test that related ideas come from the neighbor table unless a live search is requested."""
+    ideas = [Idea(title=f"Idea {i}") for i in range(3)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    vector = np.ones(384, dtype=np.float32)
+    for idea in ideas[:2]:
+        _write_embedding(db_session, idea.id, vector)
+
+    # First read fills the list lazily
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id]
+    assert db_session.query(IdeaNeighbor).filter(IdeaNeighbor.idea_id == ideas[0].id).count() == 1
+
+    # A stored row is served as-is...
+    db_session.add(IdeaNeighbor(idea_id=ideas[0].id, neighbor_id=ideas[2].id, score=0.5, rank=1))
+    db_session.commit()
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id, ideas[2].id]
+
+    # ...while exact=true searches the vectors
+    response = client.get(f"/api/ideas/{ideas[0].id}/related?exact=true")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id]
+
+def test_stored_list_skips_the_vector_index(client: TestClient, db_session: Session, monkeypatch):
+    """Test that serving a stored list without document chunks never loads the idea index."""
+    ideas = [Idea(title=f"Idea {i}") for i in range(2)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    for idea in ideas:
+        _write_embedding(db_session, idea.id, np.ones(384, dtype=np.float32))
+    client.get(f"/api/ideas/{ideas[0].id}/related")  # fills the list
+
+    loads = []
+    monkeypatch.setattr(embedding_service, "load_index", lambda db: loads.append(1))
+    response = client.get(f"/api/ideas/{ideas[0].id}/related")
+    assert [item["idea_id"] for item in response.json()["data"]] == [ideas[1].id]
+    assert loads == []
+
+def test_check_endpoint_detects_and_rebuild_repairs(client: TestClient, db_session: Session):
+    """Test the consistency checker and the rebuild endpoint."""
+    rng = np.random.default_rng(3)
+    ideas = [Idea(title=f"Idea {i}") for i in range(6)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    for idea in ideas:
+        _write_embedding(db_session, idea.id, _vector(rng))
+
+    response = client.post("/api/embeddings/neighbors/rebuild")
+    assert response.json()["data"]["ideas"] == 6
+    assert client.get("/api/embeddings/neighbors/check").json()["data"]["consistent"]
+
+    row = db_session.query(IdeaNeighbor).filter(IdeaNeighbor.idea_id == ideas[2].id).first()
+    row.score += 0.2
+    db_session.commit()
+    report = client.get("/api/embeddings/neighbors/check").json()["data"]
+    assert not report["consistent"]
+    assert report["mismatched"] == [ideas[2].id]
+
+    client.post("/api/embeddings/neighbors/rebuild")
+    assert client.get("/api/embeddings/neighbors/check").json()["data"]["consistent"]
@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Tag, Document, ActionPlan
+
+@contextmanager
+def count_statements(db: Session):
+    """Count the SQL statements sent to the database while the block runs"""
+    statements = []
+    engine = db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def seed_tagged_ideas(db: Session, count: int):
+    """Ideas in two categories, each with two of ten shared tags"""
+    tags = [Tag(name=f"tag-{i}") for i in range(10)]
+    db.add_all(tags)
+    for i in range(count):
+        db.add(Idea(
+            title=f"Idea {i}",
+            description=f"Description {i}",
+            category="technology" if i % 2 else "business",
+            status="growing",
+            tags=[tags[i % 10], tags[(i + 1) % 10]]
+        ))
+    db.commit()
+
+@pytest.mark.parametrize("path", [
+    "/api/ideas",
+    "/api/ideas/search?q=Idea",
+    "/api/search/ideas/filter?tags=tag-1&limit=1000",
+    "/api/export/ideas?format=json",
+    "/api/export/ideas?format=csv",
+    "/api/search/ideas/1/recommendations?limit=1000",
+])
+def test_listing_statement_count_does_not_grow_with_ideas(client: TestClient, db_session: Session, path):
+    """Test that listing endpoints load tags with a fixed number of queries, not one per idea."""
+    seed_tagged_ideas(db_session, 10)
+    with count_statements(db_session) as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    few = len(statements)
+
+    # selectinload sends up to 500 keys per IN, so stay within one batch
+    tag = db_session.query(Tag).first()
+    db_session.add_all(Idea(title=f"More {i}", category="technology", tags=[tag]) for i in range(490))
+    db_session.commit()
+    with count_statements(db_session) as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert len(statements) == few, statements
+
+def test_list_returns_every_idea_with_its_tags(client: TestClient, db_session: Session):
+    """Test that 1,000 ideas come back with their tags from a fixed handful of statements."""
+    seed_tagged_ideas(db_session, 1000)
+    with count_statements(db_session) as statements:
+        ideas = client.get("/api/ideas").json()["data"]
+    assert len(ideas) == 1000
+    assert all(len(idea["tags"]) == 2 for idea in ideas)
+    assert len(statements) == 3  # the ideas and two 500-idea batches of tags
+
+def test_full_export_loads_documents_and_action_plans(client: TestClient, db_session: Session):
+    """Test that the full export still includes the idea's documents and action plans."""
+    seed_tagged_ideas(db_session, 1)
+    idea = db_session.query(Idea).first()
+    db_session.add(Document(idea_id=idea.id, title="Notes", content="Soil", document_type="uploaded"))
+    db_session.add(ActionPlan(
+        idea_id=idea.id, title="Plan", content="Dig", timeline="1 week",
+        vision="Harvest", resources="Spade", constraints="Weather"
+    ))
+    db_session.commit()
+
+    data = client.get(f"/api/export/idea/{idea.id}/full?format=json").json()["data"]
+    assert [doc["title"] for doc in data["documents"]] == ["Notes"]
+    assert [plan["title"] for plan in data["action_plans"]] == ["Plan"]
+    assert [tag["name"] for tag in data["idea"]["tags"]] == ["tag-0", "tag-1"]
+
+def test_tags_resolve_in_bulk_on_create_and_update(client: TestClient, db_session: Session):
+    """Test that tag names resolve in a fixed number of statements and updates only write the difference."""
+    tags = [f"tag-{i}" for i in range(50)]
+    with count_statements(db_session) as statements:
+        response = client.post("/api/ideas", json={"title": "Many tags", "tags": tags + ["tag-0"]})
+    assert response.status_code == 201
+    idea_id = response.json()["data"]["id"]
+    assert sorted(tag["name"] for tag in response.json()["data"]["tags"]) == sorted(tags)
+    assert sum("FROM tags" in statement for statement in statements) <= 3  # lookup, re-select, reload
+
+    # Unchanged tags touch no association rows
+    with count_statements(db_session) as statements:
+        response = client.put(f"/api/ideas/{idea_id}", json={"tags": list(reversed(tags))})
+    assert response.status_code == 200
+    assert not any(statement.startswith(("INSERT INTO idea_tags", "DELETE FROM idea_tags")) for statement in statements)
+    assert not any(statement.startswith("INSERT INTO tags") for statement in statements)
+
+    # One tag swapped: one association deleted, one inserted, existing tag reused
+    response = client.put(f"/api/ideas/{idea_id}", json={"tags": tags[1:] + ["fresh"]})
+    names = {tag["name"] for tag in response.json()["data"]["tags"]}
+    assert names == set(tags[1:]) | {"fresh"}
+    assert db_session.query(Tag).count() == 51
+
+def test_get_or_create_tags_tolerates_concurrent_insert(client: TestClient, db_session: Session, monkeypatch):
+    """Test that a tag another writer created between the lookup and the insert is reused, not duplicated."""
+    from app.crud import idea as idea_crud
+
+    db_session.add(Tag(name="raced"))
+    db_session.commit()
+    lookups = []
+    original = idea_crud._tags_named
+
+    def stale_first_lookup(db, names):
+        lookups.append(names)
+        return [] if len(lookups) == 1 else original(db, names)
+
+    monkeypatch.setattr(idea_crud, "_tags_named", stale_first_lookup)
+    tags = idea_crud.get_or_create_tags(db_session, ["raced", "new"])
+    db_session.commit()
+    assert set(tags) == {"raced", "new"}
+    assert db_session.query(Tag).filter(Tag.name == "raced").count() == 1
+
+def test_import_resolves_titles_and_tags_in_bulk(client: TestClient, db_session: Session):
+    """Test that an import's lookups don't grow with the number of ideas, and duplicates are still caught."""
+    def run_import(count: int, prefix: str):
+        ideas = [{"title": f"{prefix} {i}", "tags": [f"{prefix}-{i % 7}", "shared"]} for i in range(count)]
+        with count_statements(db_session) as statements:
+            data = client.post("/api/export/import/ideas", json=ideas + [ideas[0]]).json()["data"]
+        assert data["imported_count"] == count
+        assert data["errors"] == [f"Duplicate idea: {prefix} 0"]
+        return sum(statement.startswith("SELECT") and "FROM tags" in statement for statement in statements)
+
+    assert run_import(10, "Small") == run_import(200, "Large") == 2  # lookup, then re-select of the new ones
+    assert db_session.query(Tag).count() == 15
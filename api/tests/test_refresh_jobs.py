@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.idea import Idea, Embedding, EmbeddingRefreshJob
+from app.services.circuit_breaker import ollama_breaker
+from app.services.embedding_service import embedding_service
+from app.services.refresh_jobs import refresh_jobs
+
+def _seed(db_session: Session, count: int = 10):
+    ideas = [Idea(title=f"Refresh Idea {i}", description="Bulk re-embed", category="technology") for i in range(count)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    return [idea.id for idea in ideas]
+
+def test_paused_job_resumes_from_checkpoint(client: TestClient, db_session: Session, monkeypatch):
+    """Test that a paused job stops at a checkpoint and resuming embeds each remaining idea once."""
+    idea_ids = _seed(db_session)
+    monkeypatch.setattr(refresh_jobs, "chunk_size", 3)
+    job = refresh_jobs.start(db_session, force=True)
+
+    embedded = []
+    generate = embedding_service.generate_embeddings
+
+    def pause_after_first_chunk(texts, model=None):
+        if not embedded:
+            client.post(f"/api/embeddings/update-all/{job.id}/pause")
+        embedded.extend(texts)
+        return generate(texts, model)
+
+    monkeypatch.setattr(embedding_service, "generate_embeddings", pause_after_first_chunk)
+    refresh_jobs.run(job.id)
+
+    status = client.get(f"/api/embeddings/update-all?job_id={job.id}").json()["data"]
+    assert status["status"] == "paused"
+    assert status["checkpoint"] == idea_ids[2]
+    assert status["processed"] == 3
+    assert status["eta_seconds"] is None
+
+    response = client.post(f"/api/embeddings/update-all/{job.id}/resume")
+    assert response.status_code == 200
+    status = client.get("/api/embeddings/update-all").json()["data"]
+    assert status["status"] == "completed"
+    assert status["processed"] == status["embedded"] == 10
+    assert len(embedded) == 10  # nothing before the checkpoint was embedded twice
+    assert db_session.query(Embedding).count() == 10
+
+def test_second_job_is_rejected_while_one_is_active(client: TestClient, db_session: Session):
+    """Test that only one job runs at a time, and that a job whose run died can be taken over."""
+    _seed(db_session, 2)
+    job = refresh_jobs.start(db_session)
+
+    assert client.post("/api/embeddings/update-all").status_code == 409
+    assert client.post(f"/api/embeddings/update-all/{job.id}/resume").status_code == 409
+
+    # No checkpoint for longer than the stale limit: the run is presumed dead
+    db_session.query(EmbeddingRefreshJob).update({"heartbeat_at": datetime.utcnow() - timedelta(hours=1)})
+    db_session.commit()
+    assert client.get("/api/embeddings/update-all").json()["data"]["stale"] is True
+    assert client.post(f"/api/embeddings/update-all/{job.id}/resume").status_code == 200
+    assert client.get("/api/embeddings/update-all").json()["data"]["status"] == "completed"
+
+    second = client.post("/api/embeddings/update-all").json()["data"]
+    assert client.post(f"/api/embeddings/update-all/{second['id']}/cancel").status_code == 404  # already done
+    job = refresh_jobs.start(db_session)
+    assert client.post(f"/api/embeddings/update-all/{job.id}/cancel").json()["data"]["status"] == "cancelled"
+    assert client.post("/api/embeddings/update-all").status_code == 200
+
+def test_job_pauses_when_model_server_is_down(client: TestClient, db_session: Session, monkeypatch):
+    """Test that an open circuit breaker pauses the job without moving its checkpoint."""
+    _seed(db_session, 4)
+    for _ in range(ollama_breaker.failure_threshold):
+        ollama_breaker.record_failure()
+    monkeypatch.setattr(embedding_service, "generate_embeddings", lambda texts, model=None: [None] * len(texts))
+
+    client.post("/api/embeddings/update-all")
+    status = client.get("/api/embeddings/update-all").json()["data"]
+    assert status["status"] == "paused"
+    assert status["checkpoint"] == 0
+    assert "unavailable" in status["last_error"]
+
+    ollama_breaker.reset()
+    monkeypatch.undo()
+    client.post(f"/api/embeddings/update-all/{status['id']}/resume")
+    status = client.get("/api/embeddings/update-all").json()["data"]
+    assert status["status"] == "completed"
+    assert status["embedded"] == 4
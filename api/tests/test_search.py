@@ -1,7 +1,13 @@
 import pytest
+import numpy as np
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from datetime import datetime
+from app.models.idea import Idea, Embedding, Tag
+from app.services.embedding_service import embedding_service
+from app.services.search_service import RRF_K, fuse_rankings
+
 @pytest.fixture
 def sample_idea(client: TestClient, db_session: Session, sample_idea_data):
     """Create a sample idea for testing."""
@@ -26,6 +32,154 @@ def test_semantic_search_with_limit(client: TestClient, db_session: Session):
     assert data["success"] == True
     assert len(data["data"]["results"]) <= 5
 
+def test_semantic_search_ranks_by_embedding(client: TestClient, db_session: Session, monkeypatch):
+    """Test that semantic search returns real similarity scores and caches query embeddings."""
+    query_vector = np.zeros(384, dtype=np.float32)
+    query_vector[0] = 1.0
+    calls = []
+
+    def fake_ollama(text, model=None):
+        calls.append(text)
+        return query_vector.tolist()
+
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", fake_ollama)
+
+    ideas = [Idea(title=f"Idea {i}") for i in range(3)]
+    db_session.add_all(ideas)
+    db_session.commit()
+    for weight, idea in zip([0.9, 0.1, 0.5], ideas):
+        vector = np.full(384, 0.01, dtype=np.float32)
+        vector[0] = weight
+        db_session.add(Embedding(idea_id=idea.id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.commit()
+
+    response = client.get("/api/search/semantic?q=rockets&limit=2")
+    data = response.json()["data"]
+    assert data["search_type"] == "semantic"
+    assert [result["id"] for result in data["results"]] == [ideas[0].id, ideas[2].id]
+    assert 1.0 > data["results"][0]["relevance_score"] > data["results"][1]["relevance_score"]
+
+    # Next page and a repeat of the same query reuse the cached query embedding
+    response = client.get("/api/search/semantic?q=rockets&limit=2&offset=2")
+    assert [result["id"] for result in response.json()["data"]["results"]] == [ideas[1].id]
+    client.get("/api/search/semantic?q=%20rockets%20&limit=2")
+    assert calls == ["rockets"]
+
+def test_semantic_search_falls_back_to_lexical(client: TestClient, db_session: Session, monkeypatch):
+    """Test the substring fallback when the embedding model is unavailable."""
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", lambda text, model=None: None)
+    db_session.add_all([
+        Idea(title="Solar garden", description="Grow plants with solar light"),
+        Idea(title="Garden planner")
+    ])
+    db_session.commit()
+
+    data = client.get("/api/search/semantic?q=solar garden").json()["data"]
+    assert data["search_type"] == "lexical"
+    assert [result["title"] for result in data["results"]] == ["Solar garden", "Garden planner"]
+    assert [result["relevance_score"] for result in data["results"]] == [1.0, 0.5]
+
+def test_fuse_rankings():
+    """Test reciprocal-rank and weighted fusion of two rankings."""
+    rankings = {"vector": [(1, 0.9), (2, 0.8)], "lexical": [(2, 1.0), (3, 0.5)]}
+    weights = {"vector": 0.5, "lexical": 0.5}
+
+    fused = fuse_rankings(rankings, weights, "rrf")
+    assert [entry["id"] for entry in fused] == [2, 1, 3]
+    assert fused[0]["score"] == pytest.approx(0.5 / (RRF_K + 2) + 0.5 / (RRF_K + 1))
+    assert (fused[0]["vector_rank"], fused[0]["lexical_rank"]) == (2, 1)
+
+    fused = fuse_rankings(rankings, {"vector": 1.0, "lexical": 0.0}, "weighted")
+    assert [entry["id"] for entry in fused] == [1, 2, 3]
+    assert fused[0]["score"] == pytest.approx(0.9)
+
+def test_hybrid_search(client: TestClient, db_session: Session, monkeypatch):
+    """Test that hybrid search ranks ideas found by both keyword and vector first."""
+    query_vector = np.zeros(384, dtype=np.float32)
+    query_vector[0] = 1.0
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", lambda text, model=None: query_vector.tolist())
+
+    keyword_only = Idea(title="Compost rockets")
+    vector_only = Idea(title="Orbital gardening")
+    both = Idea(title="Rockets for seeds")
+    unrelated = Idea(title="Tax paperwork")
+    db_session.add_all([keyword_only, vector_only, both, unrelated])
+    db_session.commit()
+    for weight, idea in zip([0.0, 0.9, 0.8, 0.1], [keyword_only, vector_only, both, unrelated]):
+        vector = np.full(384, 0.05, dtype=np.float32)
+        vector[0] = weight
+        db_session.add(Embedding(idea_id=idea.id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.commit()
+
+    response = client.get("/api/search/hybrid?q=rockets&limit=2")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["search_type"] == "hybrid"
+    assert data["results"][0]["id"] == both.id
+    assert (data["results"][0]["lexical_rank"], data["results"][0]["vector_rank"]) == (2, 2)
+    assert data["pagination"]["total"] == 4
+    assert set(data["timings_ms"]) == {"lexical", "embedding", "vector", "fusion", "total"}
+
+    # Each pure weighting follows its own ranking
+    data = client.get("/api/search/hybrid?q=rockets&fusion=weighted&vector_weight=0").json()["data"]
+    assert {result["id"] for result in data["results"][:2]} == {keyword_only.id, both.id}
+    data = client.get("/api/search/hybrid?q=rockets&fusion=weighted&vector_weight=1").json()["data"]
+    assert [result["id"] for result in data["results"][:2]] == [vector_only.id, both.id]
+
+def test_hybrid_search_rejects_unknown_fusion(client: TestClient):
+    """Test validation of the fusion method."""
+    response = client.get("/api/search/hybrid?q=test&fusion=median")
+    assert response.status_code == 400
+
+def test_filtered_similarity_search(client: TestClient, db_session: Session, monkeypatch):
+    """Test that filters select candidates before ranking, so selective filters still fill the page."""
+    query_vector = np.zeros(384, dtype=np.float32)
+    query_vector[0] = 1.0
+    monkeypatch.setattr(embedding_service, "_call_ollama_api", lambda text, model=None: query_vector.tolist())
+
+    space = Tag(name="space")
+    ideas = [Idea(title=f"Personal {i}", category="personal") for i in range(30)]
+    research = [
+        Idea(title=f"Research {i}", category="research", tags=[space] if i % 2 else [],
+             created_at=datetime(2024, 1 + i, 1))
+        for i in range(4)
+    ]
+    db_session.add_all(ideas + research)
+    db_session.commit()
+    # Every personal idea is closer to the query than any research idea
+    for weight, idea in [(0.9, idea) for idea in ideas] + [(0.5 - 0.1 * i, idea) for i, idea in enumerate(research)]:
+        vector = np.full(384, 0.01, dtype=np.float32)
+        vector[0] = weight
+        db_session.add(Embedding(idea_id=idea.id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(vector)))
+    db_session.commit()
+
+    data = client.get("/api/search/ideas/similar?q=telescopes&category=research&limit=3").json()["data"]
+    assert [result["id"] for result in data["results"]] == [idea.id for idea in research[:3]]
+    assert data["candidates"] == 4
+    assert set(data["timings_ms"]) == {"filter", "embedding", "vector", "total"}
+
+    data = client.get("/api/search/ideas/similar?q=telescopes&tags=space").json()["data"]
+    assert [result["id"] for result in data["results"]] == [research[1].id, research[3].id]
+
+    data = client.get(
+        f"/api/search/ideas/similar?idea_id={research[0].id}&category=research&date_from=2024-03-01"
+    ).json()["data"]
+    assert [result["id"] for result in data["results"]] == [research[2].id, research[3].id]
+
+    # A write from another worker is picked up by the attribute masks
+    late = Idea(title="Research late", category="research")
+    db_session.add(late)
+    db_session.commit()
+    db_session.add(Embedding(idea_id=late.id, model=embedding_service.model_name, embedding=embedding_service.pack_vector(query_vector)))
+    db_session.commit()
+    data = client.get("/api/search/ideas/similar?q=telescopes&category=research&limit=1").json()["data"]
+    assert [result["id"] for result in data["results"]] == [late.id]
+
+def test_filtered_similarity_search_validation(client: TestClient):
+    """Test the required query and date format checks."""
+    assert client.get("/api/search/ideas/similar?category=research").status_code == 400
+    assert client.get("/api/search/ideas/similar?q=x&date_from=January").status_code == 400
+
 def test_advanced_filter_ideas(client: TestClient, db_session: Session):
     """Test advanced filtering of ideas."""
     response = client.get("/api/search/ideas/filter")
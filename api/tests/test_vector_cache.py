@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services import vector_cache as vector_cache_module
+from app.services.embedding_service import OllamaEmbeddingService, embedding_service
+from app.services.vector_cache import EmbeddingVectorCache
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    """Test that vectors survive a reopen and the coldest entries go first when full."""
+    clock = iter(range(0, 100000, 100))  # every call is a minute and more later: hits always touch
+    monkeypatch.setattr(vector_cache_module.time, "time", lambda: float(next(clock)))
+    path = str(tmp_path / "embedding_cache.db")
+    cache = EmbeddingVectorCache(path, max_entries=4)
+
+    for i in range(4):
+        cache.put("all-minilm", f"text {i}", [float(i), 1.0])
+    assert cache.get("all-minilm", "text 0") == [0.0, 1.0]  # now the most recently used
+    cache.put("all-minilm", "text 4", [4.0, 1.0])
+
+    # Over the cap: the least recently used go, down to 5% below it
+    assert cache.get("all-minilm", "text 1") is None
+    assert cache.get("all-minilm", "text 2") is None
+    assert cache.get("all-minilm", "text 0") == [0.0, 1.0]
+    assert cache.get("nomic-embed-text", "text 0") is None  # keyed by model
+    assert cache.stats()["evictions"] == 2
+    cache.close()
+
+    reopened = EmbeddingVectorCache(path, max_entries=4)
+    assert reopened.get("all-minilm", "  text   4 ") == [4.0, 1.0]  # whitespace is normalized
+    assert reopened.stats()["entries"] == 3
+    assert reopened.clear("all-minilm") == 3
+
+def test_generate_embedding_consults_cache(client: TestClient, tmp_path, monkeypatch):
+    """Test that repeated texts skip the model, singly and in batches, and show up in the metrics."""
+    service = OllamaEmbeddingService("all-minilm")
+    service.vector_cache = EmbeddingVectorCache(str(tmp_path / "embedding_cache.db"))
+    calls = []
+
+    def single(text, model=None):
+        calls.append(text)
+        return [3.0, 4.0]
+
+    def batch(texts, model=None):
+        calls.extend(texts)
+        return [[3.0, 4.0] for _ in texts]
+
+    monkeypatch.setattr(service, "_call_ollama_api", single)
+    monkeypatch.setattr(service, "_call_ollama_batch", batch)
+
+    assert service.generate_embedding("Garden sensors") == pytest.approx([0.6, 0.8])
+    assert service.generate_embedding("Garden  sensors\n") == pytest.approx([0.6, 0.8])  # stored as float32
+    assert calls == ["Garden sensors"]
+
+    first, second, empty = service.generate_embeddings(["Garden sensors", "Soil moisture", ""])
+    assert first == pytest.approx([0.6, 0.8]) and second == pytest.approx([0.6, 0.8]) and empty is None
+    assert calls == ["Garden sensors", "Soil moisture"]  # only the new text went to the model
+    service.generate_embedding("Garden sensors", "nomic-embed-text")
+    assert len(calls) == 3
+
+    stats = service.vector_cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["model_seconds_saved"] is not None
+
+    monkeypatch.setattr(embedding_service, "vector_cache", service.vector_cache)
+    data = client.get("/api/system/embedding-cache").json()["data"]
+    assert data["entries"] == 3 and data["hit_rate"] == 0.4
+    assert client.delete("/api/system/embedding-cache?model=nomic-embed-text").json()["data"]["deleted"] == 1
+
+def test_shutdown_closes_cache_connection(tmp_path, monkeypatch):
+    """Test that the app's shutdown hook closes the cache's SQLite connection."""
+    from main import app
+
+    cache = EmbeddingVectorCache(str(tmp_path / "embedding_cache.db"))
+    monkeypatch.setattr(embedding_service, "vector_cache", cache)
+    cache.put("all-minilm", "text", [1.0, 0.0])
+    assert cache._conn is not None
+    with TestClient(app):
+        pass
+    assert cache._conn is None
+    assert cache.get("all-minilm", "text") == [1.0, 0.0]  # reopens on demand
@@ -0,0 +1,244 @@
+import pytest
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+from app.services.hnsw_index import HNSWIndex
+from app.services.mapped_vector_index import MappedVectorIndex
+
+def _random_vectors(count: int, dimension: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+def _brute_force(vectors: np.ndarray, ids: list, query: np.ndarray, k: int) -> list:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores)[:k]
+    return [ids[i] for i in order]
+
+def test_search_matches_brute_force():
+    """Test that top-k from the index matches a brute-force ranking."""
+    vectors = _random_vectors(500)
+    ids = list(range(100, 600))
+    index = VectorIndex(dimension=8, initial_capacity=4)
+    index.build(ids, vectors)
+
+    query = _random_vectors(1, seed=1)[0]
+    results = index.search(query, 10)
+    assert [item_id for item_id, _ in results] == _brute_force(vectors, ids, query, 10)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_add_remove_keeps_matrix_dense():
+    """Test that removals move the last row into the freed slot."""
+    index = VectorIndex(dimension=8, initial_capacity=2)
+    vectors = _random_vectors(5)
+    for item_id, vector in enumerate(vectors, start=1):
+        index.add(item_id, vector)
+
+    assert len(index) == 5
+    assert index.remove(2) is True
+    assert index.remove(2) is False
+    assert len(index) == 4
+    assert 2 not in index
+    np.testing.assert_allclose(index.get(5), vectors[4] / np.linalg.norm(vectors[4]), rtol=1e-6)
+
+    results = index.search(vectors[4], 1)
+    assert results[0][0] == 5
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+def test_add_replaces_existing_vector():
+    """Test that adding an existing id overwrites its vector."""
+    index = VectorIndex(dimension=8)
+    vectors = _random_vectors(2)
+    index.add(1, vectors[0])
+    index.add(1, vectors[1])
+    assert len(index) == 1
+    assert index.search(vectors[1], 1)[0][1] == pytest.approx(1.0, abs=1e-5)
+
+def test_search_exclusion_and_threshold():
+    """Test excluded ids and the minimum score filter."""
+    index = VectorIndex(dimension=2)
+    index.build([1, 2, 3], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]])
+
+    results = index.search([1.0, 0.0], 5, exclude_ids=[1], min_score=0.5)
+    assert [item_id for item_id, _ in results] == [2]
+    assert index.search([1.0, 0.0], 0) == []
+
+def test_dimension_mismatch_rejected():
+    """Test that vectors of the wrong size are rejected."""
+    index = VectorIndex(dimension=4)
+    with pytest.raises(ValueError):
+        index.add(1, [1.0, 0.0])
+
+def _clustered_vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((10, dimension))
+    return (centers[rng.integers(0, 10, count)] + 0.5 * rng.standard_normal((count, dimension))).astype(np.float32)
+
+def test_hnsw_recall_against_exact():
+    """Test that the HNSW graph finds nearly all exact top-k neighbours."""
+    vectors = _clustered_vectors(600)
+    ids = list(range(600))
+    index = HNSWIndex(dimension=32, m=8, ef_construction=64, ef_search=64)
+    index.build(ids, vectors)
+
+    queries = _clustered_vectors(20, seed=1)
+    hits = 0
+    for query in queries:
+        approximate = {item_id for item_id, _ in index.search(query, 10)}
+        exact = {item_id for item_id, _ in index.search(query, 10, exact=True)}
+        assert exact == set(_brute_force(vectors, ids, query, 10))
+        hits += len(approximate & exact)
+    assert hits / (10 * len(queries)) >= 0.95
+
+def test_hnsw_incremental_insert_and_delete():
+    """Test tombstoned deletes and re-inserted ids."""
+    vectors = _clustered_vectors(200)
+    index = HNSWIndex(dimension=32, m=8)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector)
+
+    assert index.search(vectors[5], 1)[0][0] == 5
+    assert index.remove(5) is True
+    assert 5 not in index
+    assert all(item_id != 5 for item_id, _ in index.search(vectors[5], 10))
+
+    index.add(5, vectors[6])
+    assert len(index) == 200
+    assert {item_id for item_id, _ in index.search(vectors[6], 2)} == {5, 6}
+
+def test_hnsw_search_fills_k_past_tombstones():
+    """Test that deleted nodes crowding the candidate list don't cut results short of k."""
+    vectors = _clustered_vectors(300)
+    index = HNSWIndex(dimension=32, m=8, ef_search=16)
+    index.build(range(300), vectors)
+
+    query = vectors[0]
+    nearest = [item_id for item_id, _ in index.search(query, 100, exact=True)]
+    for item_id in nearest[:60]:
+        index.remove(item_id)
+
+    results = index.search(query, 10)
+    assert len(results) == 10
+    assert not {item_id for item_id, _ in results} & set(nearest[:60])
+    assert len(index.search(query, 10, exclude_ids=nearest[60:70])) == 10
+
+def test_hnsw_save_and_load(tmp_path):
+    """Test that a saved graph answers queries identically after loading."""
+    vectors = _clustered_vectors(300)
+    index = HNSWIndex(dimension=32, m=8)
+    index.build(range(300), vectors)
+    index.remove(7)
+    index.watermark = "2025-01-01T00:00:00"
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    restored = HNSWIndex(dimension=32, m=8)
+    assert restored.load(path) is True
+    assert len(restored) == 299
+    assert 7 not in restored
+    assert restored.watermark == "2025-01-01T00:00:00"
+    for query in _clustered_vectors(5, seed=2):
+        assert restored.search(query, 5) == index.search(query, 5)
+
+    assert HNSWIndex(dimension=16, m=8).load(path) is False
+
+@pytest.mark.parametrize("storage,itemsize", [("float16", 2), ("int8", 1)])
+def test_quantized_storage_close_to_float32(storage, itemsize):
+    """Test that compact storage shrinks the matrix and keeps scores close."""
+    vectors = _clustered_vectors(400)
+    exact = VectorIndex(dimension=32)
+    exact.build(range(400), vectors)
+    compact = VectorIndex(dimension=32, storage=storage)
+    compact.build(range(400), vectors)
+
+    assert compact.quantized is True
+    assert compact.nbytes == 400 * 32 * itemsize
+    query = vectors[0]
+    approximate = dict(compact.search(query, 40))
+    for item_id, score in exact.search(query, 10):
+        assert approximate[item_id] == pytest.approx(score, abs=0.02)
+
+def test_unknown_storage_rejected():
+    """Test that unsupported storage names are rejected."""
+    with pytest.raises(ValueError):
+        VectorIndex(dimension=4, storage="bfloat16")
+
+def test_mapped_index_shared_between_instances(tmp_path):
+    """Test that writes from one process-local instance are seen by another."""
+    path = str(tmp_path / "matrix")
+    vectors = _random_vectors(6)
+    writer = MappedVectorIndex(path, dimension=8, initial_capacity=2)
+    writer.build([1, 2, 3], vectors[:3])
+
+    reader = MappedVectorIndex(path, dimension=8)
+    assert reader.load() is True
+    assert reader.ids() == {1, 2, 3}
+
+    # Appends past the initial capacity grow the files in place
+    writer.add(4, vectors[3])
+    writer.add(5, vectors[4])
+    writer.remove(2)
+    writer.add(1, vectors[5])
+
+    assert reader.ids() == {1, 3, 4, 5}
+    assert reader.search(vectors[5], 1)[0][0] == 1
+    assert all(item_id != 2 for item_id, _ in reader.search(vectors[1], 5))
+
+    # Tombstoned rows are reused before the file grows again
+    rows_before = reader._size
+    reader.add(6, vectors[1])
+    assert reader._size == rows_before
+    assert writer.search(vectors[1], 1)[0][0] == 6
+
+def test_mapped_index_rebuild_swaps_files_under_readers(tmp_path):
+    """Test that a rebuild replaces the files instead of truncating the ones other workers map."""
+    path = str(tmp_path / "matrix")
+    vectors = _random_vectors(5)
+    writer = MappedVectorIndex(path, dimension=8)
+    writer.build([1, 2, 3], vectors[:3])
+    reader = MappedVectorIndex(path, dimension=8)
+    reader.load()
+    old_matrix = reader._matrix
+
+    writer.build([4, 5], vectors[3:])
+    assert old_matrix[0] == pytest.approx(vectors[0] / np.linalg.norm(vectors[0]))  # old mapping intact
+    assert reader.ids() == {4, 5}
+    assert reader.search(vectors[4], 1)[0][0] == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["matrix.ids", "matrix.lock", "matrix.vectors"]
+
+def test_mapped_index_load_rejects_mismatch(tmp_path):
+    """Test that missing or incompatible files are not mapped."""
+    path = str(tmp_path / "matrix")
+    assert MappedVectorIndex(path, dimension=8).load() is False
+    MappedVectorIndex(path, dimension=8).build([1], _random_vectors(1))
+    assert MappedVectorIndex(path, dimension=16).load() is False
+    assert MappedVectorIndex(path, dimension=8, storage="int8").load() is False
+    assert MappedVectorIndex(path, dimension=8).load() is True
+
+@pytest.mark.parametrize("factory", [
+    lambda tmp_path: VectorIndex(dimension=8),
+    lambda tmp_path: VectorIndex(dimension=8, storage="int8"),
+    lambda tmp_path: HNSWIndex(dimension=8, m=4),
+    lambda tmp_path: MappedVectorIndex(str(tmp_path / "matrix"), dimension=8),
+], ids=["exact", "int8", "hnsw", "mmap"])
+def test_search_restricted_to_candidates(factory, tmp_path):
+    """Test that candidate-restricted search ranks exactly the filtered subset."""
+    vectors = _random_vectors(300)
+    ids = list(range(1, 301))
+    index = factory(tmp_path)
+    index.build(ids, vectors)
+    index.remove(10)
+
+    query = _random_vectors(1, seed=5)[0]
+    # Sparse candidates gather their rows; dense ones scan everything and mask
+    for modulus in (7, 2):
+        candidates = [item_id for item_id in ids if item_id % modulus == 3 % modulus] + [10, 999]
+        results = index.search(query, 5, exclude_ids=[3], candidates=candidates)
+
+        allowed = [item_id for item_id in candidates if item_id not in (3, 10, 999)]
+        expected = _brute_force(vectors[[item_id - 1 for item_id in allowed]], allowed, query, 5)
+        if getattr(index, "quantized", False):
+            assert set(item_id for item_id, _ in results) & set(expected)
+            assert all(item_id in allowed for item_id, _ in results)
+        else:
+            assert [item_id for item_id, _ in results] == expected